@@ -67,7 +67,7 @@ async def validate_magic_link(
     """
     claim_in = deps.get_magic_token(token=obj_in.claim)
     # Get the user
-    user = await crud.user.get(db, id=ObjectId(magic_in.sub))
+    user = await crud.user.get(db, id=ObjectId(magic_in.sub)) if ObjectId.is_valid(magic_in.sub) else None
     # Test the claims
     if (
         (claim_in.sub == magic_in.sub)
@@ -245,7 +245,7 @@ async def reset_password(
     """
     claim_in = deps.get_magic_token(token=claim)
     # Get the user
-    user = await crud.user.get(db, id=ObjectId(magic_in.sub))
+    user = await crud.user.get(db, id=ObjectId(magic_in.sub)) if ObjectId.is_valid(magic_in.sub) else None
     # Test the claims
     if (
         (claim_in.sub == magic_in.sub)
@@ -254,8 +254,6 @@ async def reset_password(
         or not crud.user.is_active(user)
     ):
         raise HTTPException(status_code=400, detail="Password update failed; invalid claim.")
-    # Update the password
-    hashed_password = security.get_password_hash(new_password)
-    user.hashed_password = hashed_password
-    await user.save()
+    # Update the password (hashed off the event loop by `crud.user.update`)
+    await crud.user.update(db, db_obj=user, obj_in={"password": new_password})
     return {"msg": "Password updated successfully."}
@@ -1,6 +1,8 @@
-from typing import Any
+from typing import Any, AsyncIterator
 from pydantic import AnyHttpUrl
-from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 import httpx
 
 from app import models
@@ -12,32 +14,69 @@ router = APIRouter()
 """
 A proxy for the frontend client when hitting cors issues with axios requests. Adjust as required. This version has
 a user-login dependency to reduce the risk of leaking the server as a random proxy.
+
+Requests go through the shared, pooled client from the app lifespan. Request bodies are streamed upstream and
+upstream responses are streamed back chunk by chunk, so large payloads are never buffered in the worker.
 """
 
+# Only these upstream response headers reach the client. Anything else (cookies, CORS, CSP, HSTS, redirects) would
+# let an arbitrary upstream set policy on the API's own origin
+FORWARDED_RESPONSE_HEADERS = {
+    "content-type",
+    "content-length",
+    "content-encoding",
+    "cache-control",
+    "etag",
+    "last-modified",
+}
+
+
+def _response_headers(upstream: httpx.Response) -> dict[str, str]:
+    return {key: value for key, value in upstream.headers.items() if key.lower() in FORWARDED_RESPONSE_HEADERS}
+
+
+async def _send(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    content: AsyncIterator[bytes] | None = None,
+) -> StreamingResponse:
+    try:
+        upstream = await client.send(client.build_request(method, url, headers=headers, content=content), stream=True)
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    # The raw (still encoded) chunks are passed through, so the upstream `Content-Encoding` stays valid
+    return StreamingResponse(
+        upstream.aiter_raw(),
+        status_code=upstream.status_code,
+        headers=_response_headers(upstream),
+        background=BackgroundTask(upstream.aclose),
+    )
+
 
 @router.post("/{path:path}")
 async def proxy_post_request(
     *,
     path: AnyHttpUrl,
     request: Request,
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     # https://www.starlette.io/requests/
-    # https://www.python-httpx.org/quickstart/
+    # https://www.python-httpx.org/async/#streaming-requests
     # https://github.com/tiangolo/fastapi/issues/1788#issuecomment-698698884
     # https://fastapi.tiangolo.com/tutorial/path-params/#__code_13
-    try:
-        data = await request.json()
-        headers = {
+    headers = {
+        key: value
+        for key, value in {
             "Content-Type": request.headers.get("Content-Type"),
+            "Content-Length": request.headers.get("Content-Length"),
             "Authorization": request.headers.get("Authorization"),
-        }
-        async with httpx.AsyncClient() as client:
-            proxy = await client.post(f"{path}", headers=headers, data=data)
-        response = Response(content=proxy.content, status_code=proxy.status_code)
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=403, detail=str(e))
+        }.items()
+        if value is not None
+    }
+    return await _send(client, "POST", f"{path}", headers, content=request.stream())
 
 
 @router.get("/{path:path}")
@@ -45,16 +84,12 @@ async def proxy_get_request(
     *,
     path: AnyHttpUrl,
     request: Request,
+    client: httpx.AsyncClient = Depends(deps.get_http_client),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
-    try:
-        headers = {
-            "Content-Type": request.headers.get("Content-Type", "application/x-www-form-urlencoded"),
-            "Authorization": request.headers.get("Authorization"),
-        }
-        async with httpx.AsyncClient() as client:
-            proxy = await client.get(f"{path}", headers=headers)
-        response = Response(content=proxy.content, status_code=proxy.status_code)
-        return response
-    except Exception as e:
-        raise HTTPException(status_code=403, detail=str(e))
+    headers = {
+        "Content-Type": request.headers.get("Content-Type", "application/x-www-form-urlencoded"),
+    }
+    if request.headers.get("Authorization"):
+        headers["Authorization"] = request.headers["Authorization"]
+    return await _send(client, "GET", f"{path}", headers)
@@ -1,17 +1,22 @@
+import logging
 from typing import Any, List
 
+import httpx
 from bson import ObjectId
-from fastapi import APIRouter, Body, Depends, HTTPException
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response
 from pydantic.networks import EmailStr
-from pydantic import ValidationError
 from motor.core import AgnosticDatabase
-from jose import jwt
+from odmantic.exceptions import DuplicateKeyError
+from qdrant_client.http.exceptions import ApiException
 
 from app import crud, models, schemas
 from app.api import deps
 from app.core.config import settings
 from app.core import security
+from app.core.tokens import TokenDecodeError, decode_token
+from app.crud.pagination import InvalidCursorError
+from app.db.qdrant_outbox import get_outbox_backlog
+from app.db.qdrant_users import build_user_filter, count_users_in_qdrant, scroll_users_page
 from app.utilities import (
     send_new_account_email,
     send_email_validation_email,
@@ -19,6 +24,7 @@ from app.utilities import (
 from app.schemas.emails import EmailValidation
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=schemas.User)
@@ -40,7 +46,14 @@ async def create_user_profile(
         )
     # Create user auth
     user_in = schemas.UserCreate(password=password, email=email, full_name=full_name)
-    user = await crud.user.create(db, obj_in=user_in)
+    try:
+        user = await crud.user.create(db, obj_in=user_in)
+    except DuplicateKeyError:
+        # Lost a registration race for the same email
+        raise HTTPException(
+            status_code=400,
+            detail="This username is not available.",
+        )
     return user
 
 
@@ -58,12 +71,12 @@ async def update_user(
         user = await crud.user.authenticate(db, email=current_user.email, password=obj_in.original)
         if not obj_in.original or not user:
             raise HTTPException(status_code=400, detail="Unable to authenticate this update.")
-    current_user_data = jsonable_encoder(current_user)
-    user_in = schemas.UserUpdate(**current_user_data)
+    # Only the submitted fields are written
+    update_data = {}
     if obj_in.password is not None:
-        user_in.password = obj_in.password
+        update_data["password"] = obj_in.password
     if obj_in.full_name is not None:
-        user_in.full_name = obj_in.full_name
+        update_data["full_name"] = obj_in.full_name
     if obj_in.email is not None:
         check_user = await crud.user.get_by_email(db, email=obj_in.email)
         if check_user and check_user.email != current_user.email:
@@ -71,8 +84,14 @@ async def update_user(
                 status_code=400,
                 detail="This username is not available.",
             )
-        user_in.email = obj_in.email
-    user = await crud.user.update(db, db_obj=current_user, obj_in=user_in)
+        update_data["email"] = obj_in.email
+    try:
+        user = await crud.user.update(db, db_obj=current_user, obj_in=update_data)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="This username is not available.",
+        )
     return user
 
 
@@ -91,13 +110,70 @@ async def read_user(
 async def read_all_users(
     *,
     db: AgnosticDatabase = Depends(deps.get_db),
-    page: int = 0,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = settings.MULTI_MAX,
     current_user: models.User = Depends(deps.get_current_active_superuser),
 ) -> Any:
     """
-    Retrieve all current users.
+    Retrieve current users, one page at a time. Pass the `X-Next-Cursor` response header back as `cursor` to get
+    the next page; the header is absent on the last page.
     """
-    return await crud.user.get_multi(db=db, page=page)
+    try:
+        users, next_cursor = await crud.user.get_multi(db=db, cursor=cursor, limit=limit)
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return users
+
+
+@router.get("/qdrant-sync", response_model=schemas.QdrantSyncStatus)
+async def read_qdrant_sync_status(
+    *,
+    request: Request,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Backlog of user changes waiting to be mirrored into Qdrant (moderator function).
+    """
+    status = await get_outbox_backlog()
+    dispatcher = getattr(request.app.state, "qdrant_sync_dispatcher", None)
+    if dispatcher:
+        status["dispatched"] = dispatcher.dispatched
+        status["failed"] = dispatcher.failed
+    return status
+
+
+@router.get("/search", response_model=schemas.UserSearchResult)
+async def search_users(
+    *,
+    email: str | None = None,
+    is_active: bool | None = None,
+    is_superuser: bool | None = None,
+    email_validated: bool | None = None,
+    offset: int | None = None,
+    limit: int = settings.MULTI_MAX,
+    current_user: models.User = Depends(deps.get_current_active_superuser),
+) -> Any:
+    """
+    Filter users on their Qdrant mirror (moderator function). Every filter field is payload indexed, so the count
+    and the page stay cheap as the collection grows. Pass `next_offset` back as `offset` for the next page.
+    """
+    query_filter = build_user_filter(
+        schemas.UserSearchFilter(
+            email=email, is_active=is_active, is_superuser=is_superuser, email_validated=email_validated
+        )
+    )
+    limit = max(1, min(limit, settings.MULTI_MAX_LIMIT))
+    try:
+        total = await count_users_in_qdrant(query_filter)
+        users, next_offset = await scroll_users_page(query_filter, limit=limit, offset=offset)
+    except (ApiException, httpx.HTTPError) as e:
+        # The Qdrant error can carry its raw response; keep it in the logs
+        logger.error(f"User search failed: {e!r}")
+        raise HTTPException(status_code=503, detail="User search is unavailable.")
+    return {"total": total, "users": users, "next_offset": next_offset}
 
 
 @router.post("/new-totp", response_model=schemas.NewTOTP)
@@ -149,7 +225,13 @@ async def create_user(
             status_code=400,
             detail="The user with this username already exists in the system.",
         )
-    user = await crud.user.create(db, obj_in=user_in)
+    try:
+        user = await crud.user.create(db, obj_in=user_in)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=400,
+            detail="The user with this username already exists in the system.",
+        )
     if settings.EMAILS_ENABLED and user_in.email:
         send_new_account_email(email_to=user_in.email, username=user_in.email, password=user_in.password)
     return user
@@ -192,13 +274,9 @@ async def validate_user_email(
     """
     Validate email with token from email link.
     """
-    # Verify token by decoding it directly
+    # Verify the token through the configured JWT backend
     try:
-        from app.schemas import MagicTokenPayload
-        
-        # Decode the magic token
-        payload = jwt.decode(validation, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
-        token_data = MagicTokenPayload(**payload)
+        token_data = decode_token(validation, schemas.MagicTokenPayload)
         
         # Get user from DB
         user = await crud.user.get(db, id=ObjectId(token_data.sub))
@@ -212,7 +290,7 @@ async def validate_user_email(
         await crud.user.validate_email(db=db, db_obj=user)
         return {"msg": "Email validated successfully."}
         
-    except (jwt.JWTError, ValidationError):
+    except TokenDecodeError:
         raise HTTPException(
             status_code=400, 
             detail="Invalid or expired validation token. Please request a new validation email."
@@ -1,13 +1,14 @@
 from typing import Generator
 
-from fastapi import Depends, HTTPException, status
+import httpx
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
 from pydantic import ValidationError
 from motor.core import AgnosticDatabase
 
 from app import crud, models, schemas
 from app.core.config import settings
+from app.core.tokens import TokenDecodeError, decode_token
 from app.db.session import MongoDatabase
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login/oauth")
@@ -21,11 +22,15 @@ def get_db() -> Generator:
         pass
 
 
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    # Opened and closed by the app lifespan in `app.main`
+    return request.app.state.http_client
+
+
 def get_token_payload(token: str) -> schemas.TokenPayload:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+        token_data = decode_token(token, schemas.TokenPayload)
+    except TokenDecodeError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -43,7 +48,7 @@ async def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud.user.get(db, id=token_data.sub)
+    user = await crud.user.get_cached(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -57,7 +62,7 @@ async def get_totp_user(db: AgnosticDatabase = Depends(get_db), token: str = Dep
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud.user.get(db, id=token_data.sub)
+    user = await crud.user.get_cached(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -65,9 +70,8 @@ async def get_totp_user(db: AgnosticDatabase = Depends(get_db), token: str = Dep
 
 def get_magic_token(token: str = Depends(reusable_oauth2)) -> schemas.MagicTokenPayload:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
-        token_data = schemas.MagicTokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+        token_data = decode_token(token, schemas.MagicTokenPayload)
+    except TokenDecodeError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
@@ -85,22 +89,21 @@ async def get_refresh_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = await crud.user.get(db, id=token_data.sub)
+    user = await crud.user.get_cached(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not crud.user.is_active(user):
         raise HTTPException(status_code=400, detail="Inactive user")
-    # Check and revoke this refresh token
-    token_obj = await crud.token.get(token=token, user=user)
+    # Check and revoke this refresh token in one step, so it cannot be replayed concurrently
+    token_obj = await crud.token.consume(token=token, user=user)
     if not token_obj:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    await crud.token.remove(db, db_obj=token_obj)
 
     # Make sure to revoke all other refresh tokens
-    return await crud.user.get(id=token_data.sub)
+    return await crud.user.get_cached(db, id=token_data.sub)
 
 
 async def get_current_active_user(
@@ -121,14 +124,13 @@ async def get_current_active_superuser(
 
 async def get_active_websocket_user(*, db: AgnosticDatabase, token: str) -> models.User:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError):
+        token_data = decode_token(token, schemas.TokenPayload)
+    except TokenDecodeError:
         raise ValidationError("Could not validate credentials")
     if token_data.refresh:
         # Refresh token is not a valid access token
         raise ValidationError("Could not validate credentials")
-    user = await crud.user.get(db, id=token_data.sub)
+    user = await crud.user.get_cached(db, id=token_data.sub)
     if not user:
         raise ValidationError("User not found")
     if not crud.user.is_active(user):
@@ -0,0 +1,91 @@
+import logging
+import secrets
+import time
+from typing import Any
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app import crud
+from app.core import hashing, tokens
+from app.core.metrics import REGISTRY, Gauge, stats_gauge
+from app.core.config import settings
+from app.db.qdrant_mirror import get_mirror_status
+from app.db.qdrant_outbox import get_outbox_backlog
+from app.db.session import MongoDatabase
+from app.utilities import email_queue
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+"""
+Prometheus scrape endpoint. Besides the request, MongoDB and Qdrant histograms it exposes the counters the app already
+keeps (hashing pool, user cache, JWT cache, email queue, and Qdrant outbox or change-stream mirror) as gauges. Pools
+that have not been started in this process are skipped rather than started by the scrape, and the outbox backlog is
+reused for METRICS_OUTBOX_CACHE_SECONDS. With METRICS_TOKEN set, scrapes must present it as a bearer token.
+"""
+
+
+class _OutboxBacklogCache:
+    backlog: dict[str, Any] | None = None
+    fetched: float = 0.0
+
+
+async def get_cached_outbox_backlog() -> dict[str, Any]:
+    cache, now = _OutboxBacklogCache, time.monotonic()
+    if cache.backlog is None or now - cache.fetched >= settings.METRICS_OUTBOX_CACHE_SECONDS:
+        cache.backlog = await get_outbox_backlog()
+        cache.fetched = now
+    return cache.backlog
+
+
+def reset_outbox_backlog_cache() -> None:
+    _OutboxBacklogCache.backlog = None
+
+
+async def verify_metrics_token(authorization: str | None = Header(None)) -> None:
+    if not settings.METRICS_TOKEN:
+        return
+    expected = f"Bearer {settings.METRICS_TOKEN}".encode()
+    if not secrets.compare_digest((authorization or "").encode(), expected):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def collect_app_stats(request: Request) -> list[Gauge]:
+    gauges = [
+        stats_gauge("app_user_cache", "Authenticated user cache", crud.user.cache.stats()),
+        stats_gauge("app_user_single_flight", "Collapsed concurrent user reads", crud.user.single_flight.stats()),
+    ]
+    if hasattr(hashing._HashingServiceSingleton, "instance"):
+        gauges.append(stats_gauge("app_password_hashing", "Password hashing pool", hashing.get_hashing_stats()))
+    if hasattr(tokens._TokenDecoderSingleton, "instance"):
+        gauges.append(stats_gauge("app_jwt_cache", "Decoded JWT payload cache", tokens.get_token_cache_stats()))
+    if hasattr(email_queue._EmailDispatcherSingleton, "instance"):
+        gauges.append(stats_gauge("app_email_queue", "Background email delivery", email_queue.get_email_queue_stats()))
+    if settings.QDRANT_SYNC_MODE == "change_stream":
+        # The mirror runs in its own process; report what it last persisted
+        try:
+            mirror = await get_mirror_status(MongoDatabase())
+        except Exception as e:
+            logger.warning(f"Could not read the Qdrant mirror state for metrics: {e}")
+            mirror = {}
+        gauges.append(stats_gauge("app_qdrant_mirror", "Mongo to Qdrant change-stream mirror", mirror))
+        return gauges
+    outbox = {}
+    dispatcher = getattr(request.app.state, "qdrant_sync_dispatcher", None)
+    if dispatcher:
+        outbox.update(dispatched=dispatcher.dispatched, failed=dispatcher.failed)
+    try:
+        outbox.update(await get_cached_outbox_backlog())
+    except Exception as e:
+        logger.warning(f"Could not read the Qdrant outbox backlog for metrics: {e}")
+    gauges.append(stats_gauge("app_qdrant_outbox", "Mongo to Qdrant sync outbox", outbox))
+    return gauges
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+async def metrics(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(
+        REGISTRY.render(await collect_app_stats(request)), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,5 +1,5 @@
 import secrets
-from typing import Any, Dict, List, Union, Annotated
+from typing import Any, Dict, List, Literal, Union, Annotated
 
 from pydantic import AnyHttpUrl, EmailStr, HttpUrl, field_validator, BeforeValidator, model_validator
 from pydantic_core.core_schema import ValidationInfo
@@ -20,6 +20,10 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_SECONDS: int = 60 * 30
     REFRESH_TOKEN_EXPIRE_SECONDS: int = 60 * 60 * 24 * 30
     JWT_ALGO: str = "HS512"
+    # "jose" (python-jose) or "pyjwt" (PyJWT, optional and faster; falls back to jose when not installed)
+    JWT_BACKEND: str = "jose"
+    # Per-process LRU of decoded and validated token payloads, each kept until its `exp`. 0 disables it.
+    JWT_CACHE_SIZE: int = 4096
     TOTP_ALGO: str = "SHA-1"
     SERVER_NAME: str
     SERVER_HOST: AnyHttpUrl
@@ -43,6 +47,37 @@ class Settings(BaseSettings):
     # GENERAL SETTINGS
 
     MULTI_MAX: int = 20
+    # Hard cap on the page size a client can request from keyset-paginated listings
+    MULTI_MAX_LIMIT: int = 100
+
+    # Argon2 hashing runs off the event loop on this pool ("thread" or "process")
+    PASSWORD_HASH_POOL_TYPE: str = "thread"
+    PASSWORD_HASH_POOL_SIZE: int = 4
+
+    # Per-process cache of authenticated users, invalidated on every user write
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 30.0
+
+    # Request, MongoDB and Qdrant latency metrics, served in Prometheus text format on /metrics. Off by default; with
+    # METRICS_TOKEN set, scrapers must send `Authorization: Bearer <token>`, otherwise restrict /metrics at the proxy
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str | None = None
+    # A scrape reuses the Qdrant outbox backlog (three MongoDB queries) for this many seconds
+    METRICS_OUTBOX_CACHE_SECONDS: float = 15.0
+
+    # Shared outbound HTTP client used by the proxy endpoints, opened and closed with the app lifespan
+    PROXY_MAX_CONNECTIONS: int = 100
+    PROXY_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    PROXY_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    PROXY_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    PROXY_READ_TIMEOUT_SECONDS: float = 30.0
+    PROXY_WRITE_TIMEOUT_SECONDS: float = 30.0
+    PROXY_POOL_TIMEOUT_SECONDS: float = 5.0
+
+    # Async Celery tasks share one event loop per worker process; run the worker with `-P threads`
+    CELERY_ASYNC_MAX_IN_FLIGHT: int = 32
+    CELERY_ASYNC_TASK_TIMEOUT_SECONDS: float = 300.0
 
     # COMPONENT SETTINGS
     MONGO_DATABASE: str
@@ -52,6 +87,21 @@ class Settings(BaseSettings):
     QDRANT_PORT: int = 6333
     QDRANT_API_KEY: str | None = None
     QDRANT_HTTPS: bool = False
+    # Mongo -> Qdrant user sync goes through the `qdrant_outbox` collection
+    QDRANT_OUTBOX_DISPATCHER_ENABLED: bool = True
+    QDRANT_OUTBOX_BATCH_SIZE: int = 256
+    QDRANT_OUTBOX_POLL_SECONDS: float = 1.0
+    QDRANT_OUTBOX_LEASE_SECONDS: int = 60
+    QDRANT_OUTBOX_BASE_BACKOFF_SECONDS: float = 2.0
+    QDRANT_OUTBOX_MAX_BACKOFF_SECONDS: float = 300.0
+    # "outbox": CRUD writes enqueue syncs for the dispatcher above. "change_stream": the standalone `qdrant_mirror.py`
+    # service tails the users collection instead and sees every write (needs a replica set); no outbox is written
+    QDRANT_SYNC_MODE: Literal["outbox", "change_stream"] = "outbox"
+    QDRANT_MIRROR_BATCH_SIZE: int = 256
+    QDRANT_MIRROR_COALESCE_SECONDS: float = 0.5
+    # Reconciliation only checks users modified since its last watermark, minus the overlap for late commits
+    QDRANT_RECONCILE_BATCH_SIZE: int = 500
+    QDRANT_RECONCILE_OVERLAP_SECONDS: float = 300.0
 
     SMTP_TLS: bool = True
     SMTP_PORT: int = 587
@@ -69,8 +119,17 @@ class Settings(BaseSettings):
             self.EMAILS_FROM_NAME = self.PROJECT_NAME
         return self
 
+    # Emails are queued and delivered by background threads, each holding one persistent SMTP connection
+    EMAIL_QUEUE_WORKERS: int = 2
+    EMAIL_QUEUE_MAX_SIZE: int = 10_000
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_SMTP_TIMEOUT_SECONDS: float = 10.0
+    EMAIL_SMTP_IDLE_SECONDS: float = 30.0
+
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
     EMAIL_TEMPLATES_DIR: str = "/app/app/email-templates/build"
+    # Development only: recompile a template when its file changes on disk
+    EMAIL_TEMPLATES_AUTO_RELOAD: bool = False
     EMAILS_ENABLED: bool = False
 
     @field_validator("EMAILS_ENABLED", mode="before")
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+
+"""
+Argon2 hashing is deliberately expensive (m=65536, t=3, p=4 by default), and tens of milliseconds spent in
+`pwd_context.hash` or `pwd_context.verify` on the event loop stalls every other request on the worker. These helpers
+move that work onto a bounded executor. argon2-cffi releases the GIL while hashing, so a thread pool is the default;
+set `PASSWORD_HASH_POOL_TYPE="process"` to isolate hashing in worker processes instead.
+"""
+
+
+def _timed_call(func: Callable[..., Any], *args: Any) -> tuple[float, float, Any]:
+    # Runs inside the executor. Returns the start/finish timestamps so the caller can split wait time from run time.
+    started = time.monotonic()
+    result = func(*args)
+    return started, time.monotonic(), result
+
+
+def _hash(password: str) -> str:
+    from app.core.security import pwd_context
+
+    return pwd_context.hash(password)
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    from app.core.security import pwd_context
+
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingStats:
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        # Jobs beyond the pool size are waiting for a free worker
+        return max(0, self.in_flight - self.max_workers)
+
+    def as_dict(self) -> dict[str, float | int]:
+        finished = self.completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "avg_wait_seconds": self.total_wait_seconds / finished,
+            "max_wait_seconds": self.max_wait_seconds,
+            "avg_run_seconds": self.total_run_seconds / finished,
+        }
+
+
+class _HashingServiceSingleton:
+    executor: Executor
+    stats: HashingStats
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            cls.instance = super(_HashingServiceSingleton, cls).__new__(cls)
+            max_workers = max(1, settings.PASSWORD_HASH_POOL_SIZE)
+            if settings.PASSWORD_HASH_POOL_TYPE == "process":
+                cls.instance.executor = ProcessPoolExecutor(max_workers=max_workers)
+            else:
+                cls.instance.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="argon2")
+            cls.instance.stats = HashingStats(max_workers=max_workers)
+        return cls.instance
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        stats = self.stats
+        submitted = time.monotonic()
+        stats.submitted += 1
+        stats.in_flight += 1
+        try:
+            started, finished, result = await loop.run_in_executor(self.executor, _timed_call, func, *args)
+        except Exception:
+            stats.failed += 1
+            raise
+        finally:
+            stats.in_flight -= 1
+        wait = max(0.0, started - submitted)
+        stats.completed += 1
+        stats.total_wait_seconds += wait
+        stats.max_wait_seconds = max(stats.max_wait_seconds, wait)
+        stats.total_run_seconds += finished - started
+        return result
+
+
+def get_hashing_service() -> _HashingServiceSingleton:
+    return _HashingServiceSingleton()
+
+
+def get_hashing_stats() -> dict[str, float | int]:
+    return get_hashing_service().stats.as_dict()
+
+
+def shutdown_hashing_service() -> None:
+    if hasattr(_HashingServiceSingleton, "instance"):
+        _HashingServiceSingleton.instance.executor.shutdown(wait=False, cancel_futures=True)
+        del _HashingServiceSingleton.instance
+
+
+async def run_hash(password: str) -> str:
+    return await get_hashing_service().run(_hash, password)
+
+
+async def run_verify(plain_password: str, hashed_password: str) -> bool:
+    return await get_hashing_service().run(_verify, plain_password, hashed_password)
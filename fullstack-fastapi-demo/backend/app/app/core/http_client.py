@@ -0,0 +1,23 @@
+import httpx
+
+from app.core.config import settings
+
+"""
+A single pooled `httpx.AsyncClient` is opened in the app lifespan and shared by every request, so outbound calls reuse
+keep-alive connections (httpx keeps one pool per origin) instead of paying TCP and TLS setup on each call.
+"""
+
+
+def create_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.PROXY_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.PROXY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.PROXY_KEEPALIVE_EXPIRY_SECONDS,
+    )
+    timeout = httpx.Timeout(
+        connect=settings.PROXY_CONNECT_TIMEOUT_SECONDS,
+        read=settings.PROXY_READ_TIMEOUT_SECONDS,
+        write=settings.PROXY_WRITE_TIMEOUT_SECONDS,
+        pool=settings.PROXY_POOL_TIMEOUT_SECONDS,
+    )
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
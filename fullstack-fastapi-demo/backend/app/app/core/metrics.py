@@ -0,0 +1,256 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterable
+
+from pymongo import monitoring
+
+"""
+Minimal, dependency-free Prometheus instrumentation.
+
+Histograms use fixed, preallocated bucket arrays: an observation is one `bisect` and two increments, and the series
+for a label set is allocated once, the first time it is seen. Cumulative bucket counts are only computed when
+`/metrics` is scraped. Metric updates take a per-metric lock, since Motor reports command events from its worker
+threads.
+"""
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Finer buckets for database and vector store round trips
+IO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: tuple[str, ...] = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def set(self, labels: tuple[str, ...], value: float) -> None:
+        with self._lock:
+            self.values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values -> [per-bucket counts (last slot is +Inf), sum]
+        self.series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, labels: tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        bounds = self.buckets + (float("inf"),)
+        for labels, (counts, total) in list(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, list(counts)):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self, extra: Iterable[_Metric] = ()) -> str:
+        lines: list[str] = []
+        for metric in [*self.metrics.values(), *extra]:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS: Histogram = REGISTRY.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"))
+)
+HTTP_REQUESTS_IN_FLIGHT: Gauge = REGISTRY.register(
+    Gauge("http_requests_in_flight", "HTTP requests currently being served", ("method",))
+)
+HTTP_EXCEPTIONS: Counter = REGISTRY.register(
+    Counter("http_request_exceptions_total", "Requests that raised an unhandled exception", ("method", "route"))
+)
+MONGO_COMMAND_SECONDS: Histogram = REGISTRY.register(
+    Histogram("mongo_command_duration_seconds", "MongoDB command latency", ("command", "outcome"), IO_BUCKETS)
+)
+QDRANT_CALL_SECONDS: Histogram = REGISTRY.register(
+    Histogram("qdrant_call_duration_seconds", "Qdrant client call latency", ("method", "outcome"), IO_BUCKETS)
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _route_label(scope: dict[str, Any]) -> str:
+    # Starlette stores the matched route in the scope; its template keeps label cardinality bounded
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app: Callable):
+        """
+        Pure ASGI middleware recording per-route, per-status latency, in-flight requests and unhandled exceptions.
+        Unlike `BaseHTTPMiddleware` it does not wrap the request or response bodies.
+        """
+        self.app = app
+
+    async def __call__(self, scope: dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status = [500]
+
+        async def send_wrapper(message: dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            HTTP_EXCEPTIONS.inc((method, _route_label(scope)))
+            raise
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec((method,))
+            HTTP_REQUEST_SECONDS.observe((method, _route_label(scope), str(status[0])), time.perf_counter() - started)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener; pass to the Motor client with `event_listeners=[...]`."""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        MONGO_COMMAND_SECONDS.observe((event.command_name, "success"), event.duration_micros / 1e6)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        MONGO_COMMAND_SECONDS.observe((event.command_name, "failure"), event.duration_micros / 1e6)
+
+
+class InstrumentedQdrantClient:
+    def __init__(self, client: Any):
+        """
+        Transparent proxy around an `AsyncQdrantClient` that times every coroutine method. Wrappers are built once
+        per method name.
+        """
+        self._client = client
+        self._wrapped: dict[str, Callable] = {}
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        async def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            outcome = "success"
+            try:
+                return await method(*args, **kwargs)
+            except Exception:
+                outcome = "failure"
+                raise
+            finally:
+                QDRANT_CALL_SECONDS.observe((name, outcome), time.perf_counter() - started)
+
+        return timed
+
+    def __getattr__(self, name: str) -> Any:
+        wrapped = self._wrapped.get(name)
+        if wrapped is not None:
+            return wrapped
+        attr = getattr(self._client, name)
+        if inspect.iscoroutinefunction(attr):
+            wrapped = self._wrapped[name] = self._wrap(name, attr)
+            return wrapped
+        return attr
+
+
+def stats_gauge(name: str, documentation: str, stats: dict[str, Any]) -> Gauge:
+    """Expose a `stats()`-style dict of numbers as one gauge with a `stat` label."""
+    gauge = Gauge(name, documentation, ("stat",))
+    for key, value in stats.items():
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, (int, float)):
+            gauge.values[(key,)] = value
+    return gauge
@@ -7,6 +7,7 @@ from passlib.totp import TOTP
 from passlib.exc import TokenError, MalformedTokenError
 import uuid
 
+from app.core import hashing
 from app.core.config import settings
 from app.schemas import NewTOTP
 
@@ -85,11 +86,9 @@ def verify_totp(*, token: str, secret: str, last_counter: int = None) -> Union[s
     last_counter: int from user in db (may be None)
     """
     try:
-        if secret.strip().startswith("{"):
-            totp = TOTP.from_json(secret)
-            match = totp.verify(token, last_counter=last_counter)
-        else:
-            match = totp_factory.verify(token, secret, last_counter=last_counter)
+        # The factory accepts both JSON and URI secrets, and holds the application secrets needed to decrypt the
+        # keys `create_new_totp` stores
+        match = totp_factory.verify(token, secret, last_counter=last_counter)
     except (MalformedTokenError, TokenError, ValueError):
         return False
     else:
@@ -102,3 +101,17 @@ def verify_password(*, plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+async def verify_password_async(*, plain_password: str, hashed_password: str) -> bool:
+    """
+    Non-blocking `verify_password` for async request paths. The argon2 work runs on the hashing pool in `hashing.py`.
+    """
+    return await hashing.run_verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Non-blocking `get_password_hash` for async request paths.
+    """
+    return await hashing.run_hash(password)
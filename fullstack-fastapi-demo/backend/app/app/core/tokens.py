@@ -0,0 +1,118 @@
+import logging
+import time
+from typing import Any, Protocol, TypeVar
+
+from jose import jwt as jose_jwt
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+from app.crud.cache import TTLCache
+
+"""
+Verifying a JWT (signature, `exp`) and validating its claims into a Pydantic payload happens on every authenticated
+request, usually for the same handful of live tokens. `decode_token` keeps the validated payload in a bounded LRU keyed
+by the raw token until the token's own `exp`, so repeated requests skip both steps. Only tokens that verified are
+cached, and none outlives its expiry, so the result is the same as decoding again.
+"""
+
+logger = logging.getLogger(__name__)
+
+PayloadType = TypeVar("PayloadType", bound=BaseModel)
+
+
+class TokenDecodeError(Exception):
+    pass
+
+
+class JWTBackend(Protocol):
+    name: str
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        ...
+
+
+class JoseBackend:
+    name = "jose"
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        try:
+            return jose_jwt.decode(token, key, algorithms=algorithms)
+        except jose_jwt.JWTError as e:
+            raise TokenDecodeError(str(e)) from e
+
+
+class PyJWTBackend:
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt as pyjwt
+
+        self.pyjwt = pyjwt
+
+    def decode(self, token: str, key: str, algorithms: list[str]) -> dict[str, Any]:
+        try:
+            return self.pyjwt.decode(token, key, algorithms=algorithms)
+        except self.pyjwt.PyJWTError as e:
+            raise TokenDecodeError(str(e)) from e
+
+
+def create_jwt_backend(name: str) -> JWTBackend:
+    if name == "pyjwt":
+        try:
+            return PyJWTBackend()
+        except ImportError:
+            logger.warning("JWT_BACKEND is 'pyjwt' but PyJWT is not installed, using python-jose")
+    return JoseBackend()
+
+
+class _TokenDecoderSingleton:
+    backend: JWTBackend
+    cache: TTLCache[BaseModel]
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            cls.instance = super(_TokenDecoderSingleton, cls).__new__(cls)
+            cls.instance.backend = create_jwt_backend(settings.JWT_BACKEND)
+            # The TTL is set per entry from the token's `exp`
+            cls.instance.cache = TTLCache(max_size=settings.JWT_CACHE_SIZE, ttl_seconds=0.0)
+        return cls.instance
+
+    def decode(self, token: str, schema: type[PayloadType]) -> PayloadType:
+        key = (schema, token)
+        payload = self.cache.get(key)
+        if payload is not None:
+            return payload
+        try:
+            claims = self.backend.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
+            payload = schema(**claims)
+        except ValidationError as e:
+            raise TokenDecodeError(str(e)) from e
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and exp - time.time() > 0:
+            self.cache.set(key, payload, ttl_seconds=exp - time.time())
+        return payload
+
+
+def get_token_decoder() -> _TokenDecoderSingleton:
+    return _TokenDecoderSingleton()
+
+
+def reset_token_decoder() -> None:
+    if hasattr(_TokenDecoderSingleton, "instance"):
+        del _TokenDecoderSingleton.instance
+
+
+def decode_token(token: str, schema: type[PayloadType]) -> PayloadType:
+    """
+    Verify `token` and validate its claims into `schema`. The returned payload may be shared with other requests for
+    the same token; treat it as read-only.
+
+    Raises:
+        TokenDecodeError: if the signature, expiry or claims are invalid
+    """
+    return get_token_decoder().decode(token, schema)
+
+
+def get_token_cache_stats() -> dict[str, Any]:
+    decoder = get_token_decoder()
+    return {"backend": decoder.backend.name, **decoder.cache.stats()}
@@ -1,20 +1,32 @@
 from typing import Any, Dict, Generic, Type, TypeVar, Union
 
+import pymongo.errors
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 from motor.core import AgnosticDatabase
 from odmantic import AIOEngine
+from odmantic.exceptions import DuplicateKeyError
 
 from app.db.base_class import Base
 from app.core.config import settings
+from app.crud.pagination import decode_cursor, encode_cursor
+from app.crud.single_flight import SingleFlight
 from app.db.session import get_engine
+from app.models.user import datetime_now_sec
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def copy_model(obj: ModelType | None) -> ModelType | None:
+    return obj.model_copy(deep=True) if obj is not None else None
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Mongo projection applied by `get_multi`. Objects loaded with a projection are read-only views; do not `save` them
+    list_projection: Dict[str, int] | None = None
+
     def __init__(self, model: Type[ModelType]):
         """
         CRUD object with default methods to Create, Read, Update, Delete (CRUD).
@@ -26,13 +38,41 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """
         self.model = model
         self.engine: AIOEngine = get_engine()
+        # Concurrent identical point reads share one query; callers that joined it get their own copy of the model,
+        # since `update` mutates the instance it is given
+        self.single_flight: SingleFlight[ModelType | None] = SingleFlight(copy=copy_model)
 
     async def get(self, db: AgnosticDatabase, id: Any) -> ModelType | None:
-        return await self.engine.find_one(self.model, self.model.id == id)
+        return await self.single_flight.do(
+            ("id", str(id)), lambda: self.engine.find_one(self.model, self.model.id == id)
+        )
 
-    async def get_multi(self, db: AgnosticDatabase, *, page: int = 0, page_break: bool = False) -> list[ModelType]: # noqa
-        offset = {"skip": page * settings.MULTI_MAX, "limit": settings.MULTI_MAX} if page_break else {} # noqa
-        return await self.engine.find(self.model, **offset)
+    async def get_multi(
+        self,
+        db: AgnosticDatabase,
+        *,
+        cursor: str | None = None,
+        limit: int | None = None,
+        query: Dict[str, Any] | None = None,
+    ) -> tuple[list[ModelType], str | None]:
+        """
+        Keyset-paginated read in `_id` order. Returns the page and the opaque cursor for the next page, or None on
+        the last page. `limit` defaults to `MULTI_MAX` and is capped at `MULTI_MAX_LIMIT`. Raises
+        `InvalidCursorError` for a malformed cursor.
+        """
+        limit = max(1, min(limit or settings.MULTI_MAX, settings.MULTI_MAX_LIMIT))
+        filters = dict(query or {})
+        if cursor:
+            filters["_id"] = {"$gt": decode_cursor(cursor)}
+        # Fetch one extra document to learn whether there is a next page
+        if self.list_projection is None:
+            items = await self.engine.find(self.model, filters, sort=self.model.id, limit=limit + 1)
+        else:
+            collection = self.engine.get_collection(self.model)
+            docs = await collection.find(filters, self.list_projection).sort("_id", 1).limit(limit + 1).to_list(None)
+            items = [self.model.model_validate_doc(doc) for doc in docs]
+        next_cursor = encode_cursor(items[limit - 1].id) if len(items) > limit else None
+        return items[:limit], next_cursor
 
     async def create(self, db: AgnosticDatabase, *, obj_in: CreateSchemaType) -> ModelType: # noqa
         obj_in_data = jsonable_encoder(obj_in)
@@ -42,18 +82,48 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     async def update(
         self, db: AgnosticDatabase, *, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]] # noqa
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        # TODO: Check if this saves changes with the setattr calls
-        await self.engine.save(db_obj)
+        await self._apply_update(db_obj, update_data)
         return db_obj
 
+    async def _apply_update(self, db_obj: ModelType, update_data: Dict[str, Any]) -> set[str]:
+        """
+        Write only the fields whose value actually changes, as a single `$set` on the document, and bump `modified`
+        (where the model has it) in the same atomic update. Unknown keys are ignored. Returns the changed fields;
+        nothing is written when it is empty.
+        """
+        fields = self.model.model_fields
+        previous = {
+            field: getattr(db_obj, field)
+            for field, value in update_data.items()
+            if field in fields and field != "id" and getattr(db_obj, field) != value
+        }
+        if not previous:
+            return set()
+        try:
+            for field in previous:
+                # Assignment runs the model's validation, so the document below holds the coerced values
+                setattr(db_obj, field, update_data[field])
+            written = set(previous)
+            if "modified" in fields:
+                db_obj.modified = datetime_now_sec()
+                written.add("modified")
+            doc = db_obj.model_dump_doc(include=written)
+            await self.engine.get_collection(self.model).update_one({"_id": db_obj.id}, {"$set": doc})
+        except Exception as e:
+            # Keep the in-memory object consistent with the database
+            for field, value in previous.items():
+                object.__setattr__(db_obj, field, value)
+            if isinstance(e, pymongo.errors.DuplicateKeyError):
+                raise DuplicateKeyError(db_obj, e)
+            raise
+        # Already persisted, so a later `engine.save` need not rewrite these fields
+        object.__setattr__(db_obj, "__fields_modified__", set())
+        return set(previous)
+
     async def remove(self, db: AgnosticDatabase, *, id: int) -> ModelType:
         obj = await self.model.get(id)
         if obj:
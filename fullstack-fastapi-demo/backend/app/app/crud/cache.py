@@ -0,0 +1,111 @@
+import time
+from collections import OrderedDict
+from typing import Any, Generic, Hashable, TypeVar
+
+ValueType = TypeVar("ValueType")
+
+
+class TTLCache(Generic[ValueType]):
+    def __init__(self, *, max_size: int, ttl_seconds: float, enabled: bool = True):
+        """
+        Bounded, in-process LRU cache where every entry also expires `ttl_seconds` after it was stored.
+
+        The cache is local to each worker process. Writes must call `invalidate`, and the TTL bounds how long another
+        worker can keep serving a value that was changed elsewhere. A reader that fills the cache after a slow fetch
+        passes the `generation()` it took before fetching to `set`, which then drops the value if the key was
+        invalidated in the meantime.
+
+        **Parameters**
+
+        * `max_size`: Maximum number of entries before the least recently used one is evicted
+        * `ttl_seconds`: Lifetime of an entry
+        * `enabled`: When False, `get` always misses and `set` is a no-op
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled and max_size > 0
+        self._data: OrderedDict[Hashable, tuple[float, ValueType]] = OrderedDict()
+        # Generation of the latest `invalidate` per key, for the last `max_size` invalidated keys. Older ones are
+        # forgotten, and a fill that started before the newest forgotten one is dropped to be safe
+        self._generation = 0
+        self._invalidated: OrderedDict[Hashable, int] = OrderedDict()
+        self._forgotten_generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> ValueType | None:
+        if not self.enabled:
+            return None
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self) -> int:
+        """Take before fetching a value to `set`; see `set`."""
+        return self._generation
+
+    def set(
+        self, key: Hashable, value: ValueType, *, ttl_seconds: float | None = None, generation: int | None = None
+    ) -> None:
+        """
+        Store `value`, expiring after `ttl_seconds` if given, otherwise after the cache-wide TTL. With `generation`,
+        the value is dropped when `key` was invalidated after that generation was taken: it may predate the write.
+        """
+        if not self.enabled:
+            return
+        if generation is not None and self._invalidated_since(key, generation):
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self._generation += 1
+        self._invalidated[key] = self._generation
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > max(self.max_size, 1):
+            _, forgotten = self._invalidated.popitem(last=False)
+            self._forgotten_generation = forgotten
+        if self._data.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def _invalidated_since(self, key: Hashable, generation: int) -> bool:
+        return self._invalidated.get(key, 0) > generation or self._forgotten_generation > generation
+
+    def clear(self) -> None:
+        # Every fill in flight may predate whatever prompted the clear
+        self._generation += 1
+        self._forgotten_generation = self._generation
+        self._invalidated.clear()
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -1,40 +1,70 @@
 from __future__ import annotations
+import hashlib
+from datetime import datetime, timezone
+
+from jose import jwt
 from motor.core import AgnosticDatabase
+from odmantic.exceptions import DuplicateKeyError
 
 from app.crud.base import CRUDBase
 from app.models import User, Token
+from app.models.qdrant_sync import datetime_utcnow
 from app.schemas import RefreshTokenCreate, RefreshTokenUpdate
-from app.core.config import settings
+
+
+def hash_token(token: str) -> str:
+    # Refresh tokens are high-entropy signed JWTs, so an unsalted digest is enough to keep them out of the database
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def token_expiry(token: str) -> datetime:
+    """UTC expiry (`exp` claim) of a JWT this app issued, as the naive datetime Mongo TTL indexes expect."""
+    exp = jwt.get_unverified_claims(token).get("exp")
+    if exp is None:
+        return datetime_utcnow()
+    return datetime.fromtimestamp(exp, tz=timezone.utc).replace(tzinfo=None)
 
 
 class CRUDToken(CRUDBase[Token, RefreshTokenCreate, RefreshTokenUpdate]):
-    # Everything is user-dependent
+    # Everything is user-dependent. Tokens live only in their own collection: no user document is touched.
     async def create(self, db: AgnosticDatabase, *, obj_in: str, user_obj: User) -> Token:
-        db_obj = await self.engine.find_one(self.model, self.model.token == obj_in)
-        if db_obj:
-            if db_obj.authenticates_id != user_obj.id:
+        token_hash = hash_token(obj_in)
+        db_obj = self.model(token_hash=token_hash, authenticates_id=user_obj.id, expires=token_expiry(obj_in))
+        try:
+            return await self.engine.save(db_obj)
+        except DuplicateKeyError:
+            db_obj = await self.engine.find_one(self.model, self.model.token_hash == token_hash)
+            if not db_obj or db_obj.authenticates_id != user_obj.id:
                 raise ValueError("Token mismatch between key and user.")
             return db_obj
-        else:
-            new_token = self.model(token=obj_in, authenticates_id=user_obj)
-            user_obj.refresh_tokens.append(new_token.id)
-            await self.engine.save_all([new_token, user_obj])
-            return new_token
 
-    async def get(self, *, user: User, token: str) -> Token:
-        return await self.engine.find_one(User, ((User.id == user.id) & (User.refresh_tokens == token)))
+    async def get(self, *, user: User, token: str) -> Token | None:
+        return await self.engine.find_one(
+            self.model, (self.model.token_hash == hash_token(token)) & (self.model.authenticates_id == user.id)
+        )
+
+    async def consume(self, *, user: User, token: str) -> Token | None:
+        """
+        Atomically look up and revoke a refresh token, so it can only be exchanged once. Expired tokens are ignored
+        even if the TTL monitor (which runs about once a minute) has not removed them yet.
+        """
+        doc = await self.engine.get_collection(self.model).find_one_and_delete(
+            {"token_hash": hash_token(token), "authenticates_id": user.id, "expires": {"$gt": datetime_utcnow()}}
+        )
+        return self.model.model_validate_doc(doc) if doc else None
 
-    async def get_multi(self, *, user: User, page: int = 0, page_break: bool = False) -> list[Token]:
-        offset = {"skip": page * settings.MULTI_MAX, "limit": settings.MULTI_MAX} if page_break else {}
-        return await self.engine.find(User, (User.refresh_tokens.in_([user.refresh_tokens])), **offset)
+    async def get_multi(
+        self, db: AgnosticDatabase, *, user: User, cursor: str | None = None, limit: int | None = None
+    ) -> tuple[list[Token], str | None]:
+        return await super().get_multi(db, cursor=cursor, limit=limit, query={"authenticates_id": user.id})
 
     async def remove(self, db: AgnosticDatabase, *, db_obj: Token) -> None:
-        users = []
-        async for user in self.engine.find(User, User.refresh_tokens.in_([db_obj.id])):
-            user.refresh_tokens.remove(db_obj.id)
-            users.append(user)
-        await self.engine.save(users)
         await self.engine.delete(db_obj)
 
+    async def remove_all(self, db: AgnosticDatabase, *, user: User) -> int:
+        """Revoke every refresh token of a user. Returns the number revoked."""
+        result = await self.engine.get_collection(self.model).delete_many({"authenticates_id": user.id})
+        return result.deleted_count
+
 
 token = CRUDToken(Token)
@@ -1,99 +1,127 @@
+import logging
 from typing import Any, Dict, Union
 
 from motor.core import AgnosticDatabase
 
-from app.core.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.core.security import get_password_hash_async, verify_password_async
 from app.crud.base import CRUDBase
+from app.crud.cache import TTLCache
 from app.models.user import User
-from app.schemas.user import UserCreate, UserInDB, UserUpdate
+from app.schemas.user import UserCreate, UserUpdate
 from app.schemas.totp import NewTOTP
-from app.db.qdrant_users import save_user_to_qdrant, update_user_in_qdrant, delete_user_from_qdrant
+from app.db.qdrant_outbox import enqueue_user_sync
+from app.db.qdrant_users import SYNC_UPSERT, user_sync_op
+
+logger = logging.getLogger(__name__)
 
 
 # ODM, Schema, Schema
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    def __init__(self, model: type[User]):
+        super().__init__(model)
+        self.cache: TTLCache[User] = TTLCache(
+            max_size=settings.USER_CACHE_MAX_SIZE,
+            ttl_seconds=settings.USER_CACHE_TTL_SECONDS,
+            enabled=settings.USER_CACHE_ENABLED,
+        )
+
+    async def get_cached(self, db: AgnosticDatabase, id: Any) -> User | None: # noqa
+        """
+        `get` for the authentication dependencies. Repeat lookups of the same user are served from `self.cache` until
+        the entry expires or a write through this class invalidates it. The cached instance is shared, so callers
+        must persist changes through `update` (or call `invalidate`) rather than mutating it in place.
+        """
+        key = str(id)
+        user = self.cache.get(key)
+        if user is None:
+            # An update committed while `get` is awaited must not be overwritten by the user read before it
+            generation = self.cache.generation()
+            user = await self.get(db, id=id)
+            if user is not None:
+                self.cache.set(key, user, generation=generation)
+        return user
+
+    def invalidate(self, id: Any) -> None:
+        self.cache.invalidate(str(id))
+        self.single_flight.forget(("id", str(id)))
+
     async def get_by_email(self, db: AgnosticDatabase, *, email: str) -> User | None: # noqa
-        return await self.engine.find_one(User, User.email == email)
+        return await self.single_flight.do(("email", email), lambda: self.engine.find_one(User, User.email == email))
 
     async def create(self, db: AgnosticDatabase, *, obj_in: UserCreate) -> User: # noqa
-        # TODO: Figure out what happens when you have a unique key like 'email'
+        # `user_email_unique` (see app/db/indexes.py) makes a duplicate email raise odmantic's DuplicateKeyError
         user = {
             **obj_in.model_dump(),
             "email": obj_in.email,
-            "hashed_password": get_password_hash(obj_in.password) if obj_in.password is not None else None, # noqa
+            "hashed_password": await get_password_hash_async(obj_in.password) if obj_in.password is not None else None, # noqa
             "full_name": obj_in.full_name,
             "is_superuser": obj_in.is_superuser,
         }
 
         saved_user = await self.engine.save(User(**user))
-        
-        # Save user to Qdrant asynchronously
-        try:
-            await save_user_to_qdrant(saved_user)
-        except Exception as e:
-            # Log error but don't fail user creation if Qdrant fails
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to save user to Qdrant: {e}")
-        
+        # An email lookup already in flight may have missed the new user
+        self.single_flight.forget(("email", saved_user.email))
+        await self._enqueue_qdrant_sync(saved_user)
         return saved_user
 
     async def update(self, db: AgnosticDatabase, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]) -> User: # noqa
         if isinstance(obj_in, dict):
-            update_data = obj_in
+            update_data = dict(obj_in)
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         if update_data.get("password"):
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash_async(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
         if update_data.get("email") and db_obj.email != update_data["email"]:
             update_data["email_validated"] = False
-        
-        updated_user = await super().update(db, db_obj=db_obj, obj_in=update_data)
-        
-        # Update user in Qdrant asynchronously
+
+        previous_email = db_obj.email
         try:
-            await update_user_in_qdrant(updated_user)
+            changed = await self._apply_update(db_obj, update_data)
+        finally:
+            self.invalidate(db_obj.id)
+            self.single_flight.forget(("email", previous_email))
+            self.single_flight.forget(("email", db_obj.email))
+        # Payload-only changes skip the vector; unmirrored fields (e.g. the TOTP counter) skip Qdrant entirely
+        op = user_sync_op(changed)
+        if op:
+            await self._enqueue_qdrant_sync(db_obj, op)
+        return db_obj
+
+    @staticmethod
+    async def _enqueue_qdrant_sync(user: User, op: str = SYNC_UPSERT) -> None:
+        # Qdrant is mirrored from the outbox by `QdrantSyncDispatcher`, off the request path
+        if settings.QDRANT_SYNC_MODE != "outbox":
+            # The change-stream mirror (app/db/qdrant_mirror.py) picks up the write by itself
+            return
+        try:
+            await enqueue_user_sync(user.id, op)
         except Exception as e:
-            # Log error but don't fail user update if Qdrant fails
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Failed to update user in Qdrant: {e}")
-        
-        return updated_user
+            # Log error but don't fail the user write if the outbox insert fails
+            logger.error(f"Failed to enqueue Qdrant sync for user {user.id}: {e}")
 
     async def authenticate(self, db: AgnosticDatabase, *, email: str, password: str) -> User | None: # noqa
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(plain_password=password, hashed_password=user.hashed_password): # noqa
+        if not await verify_password_async(plain_password=password, hashed_password=user.hashed_password): # noqa
             return None
         return user
 
     async def validate_email(self, db: AgnosticDatabase, *, db_obj: User) -> User: # noqa
-        obj_in = UserUpdate(**UserInDB.model_validate(db_obj).model_dump())
-        obj_in.email_validated = True
-        return await self.update(db=db, db_obj=db_obj, obj_in=obj_in)
+        return await self.update(db=db, db_obj=db_obj, obj_in={"email_validated": True})
 
     async def activate_totp(self, db: AgnosticDatabase, *, db_obj: User, totp_in: NewTOTP) -> User: # noqa
-        obj_in = UserUpdate(**UserInDB.model_validate(db_obj).model_dump())
-        obj_in = obj_in.model_dump(exclude_unset=True)
-        obj_in["totp_secret"] = totp_in.secret.get_secret_value() if totp_in.secret else None
-        return await self.update(db=db, db_obj=db_obj, obj_in=obj_in)
+        totp_secret = totp_in.secret.get_secret_value() if totp_in.secret else None
+        return await self.update(db=db, db_obj=db_obj, obj_in={"totp_secret": totp_secret})
 
     async def deactivate_totp(self, db: AgnosticDatabase, *, db_obj: User) -> User: # noqa
-        obj_in = UserUpdate(**UserInDB.model_validate(db_obj).model_dump())
-        obj_in = obj_in.model_dump(exclude_unset=True)
-        obj_in["totp_secret"] = None
-        obj_in["totp_counter"] = None
-        return await self.update(db=db, db_obj=db_obj, obj_in=obj_in)
+        return await self.update(db=db, db_obj=db_obj, obj_in={"totp_secret": None, "totp_counter": None})
 
     async def update_totp_counter(self, db: AgnosticDatabase, *, db_obj: User, new_counter: int) -> User:  # noqa
-        obj_in = UserUpdate(**UserInDB.model_validate(db_obj).model_dump())
-        obj_in = obj_in.model_dump(exclude_unset=True)
-        obj_in["totp_counter"] = new_counter
-        return await self.update(db=db, db_obj=db_obj, obj_in=obj_in)
+        return await self.update(db=db, db_obj=db_obj, obj_in={"totp_counter": new_counter})
 
     async def toggle_user_state(self, db: AgnosticDatabase, *, obj_in: Union[UserUpdate, Dict[str, Any]]) -> User: # noqa
         db_obj = await self.get_by_email(db, email=obj_in.email)
@@ -0,0 +1,26 @@
+import base64
+import binascii
+
+from odmantic import ObjectId
+
+"""
+Keyset pagination helpers. A cursor is the url-safe base64 of the last `_id` on a page, so the next page is a
+`{"_id": {"$gt": last_id}}` range read on the primary key index instead of a `skip` over every preceding document.
+Clients must treat it as opaque.
+"""
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(last_id: ObjectId) -> str:
+    return base64.urlsafe_b64encode(last_id.binary).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> ObjectId:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return ObjectId(raw)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,54 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+ResultType = TypeVar("ResultType")
+
+
+class SingleFlight(Generic[ResultType]):
+    def __init__(self, copy: Callable[[ResultType], ResultType] | None = None):
+        """
+        Collapses concurrent identical reads: while a call for `key` is in flight, later callers await the same result
+        instead of issuing their own query. Nothing is kept once the call completes, so this is not a cache.
+
+        The call runs in its own task, so a caller that is cancelled (for example on client disconnect) does not
+        cancel it for the others. The caller that started the call receives its result; callers that joined it
+        receive `copy(result)`, so none of them can mutate another's object. Without `copy` every caller receives the
+        same object and must treat it as read-only.
+        """
+        self._copy = copy
+        self._in_flight: dict[Hashable, asyncio.Future[ResultType]] = {}
+        self.calls = 0
+        self.executed = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[ResultType]]) -> ResultType:
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            self.executed += 1
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+            return await asyncio.shield(future)
+        self.collapsed += 1
+        result = await asyncio.shield(future)
+        return self._copy(result) if self._copy else result
+
+    def _done(self, key: Hashable, future: asyncio.Future[ResultType]) -> None:
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def forget(self, key: Hashable) -> None:
+        """Let the next caller start a fresh call, e.g. after a write that the in-flight read may not reflect."""
+        self._in_flight.pop(key, None)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "executed": self.executed,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._in_flight),
+        }
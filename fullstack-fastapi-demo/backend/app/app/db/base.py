@@ -1,3 +1,4 @@
 from app.db.base_class import Base  # noqa
 from app.models.user import User  # noqa
 from app.models.token import Token  # noqa
+from app.models.qdrant_sync import QdrantSyncEvent  # noqa
@@ -0,0 +1,157 @@
+"""Declarative MongoDB index registry, applied at startup by `init_db`."""
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.db.base_class import Base
+from app.db.session import get_engine
+from app.models import QdrantSyncEvent, Token, User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    model: type[Base]
+    keys: tuple[tuple[str, int], ...]
+    name: str
+    unique: bool = False
+    sparse: bool = False
+    expire_after_seconds: int | None = None
+
+    def options(self) -> dict[str, Any]:
+        options: dict[str, Any] = {"name": self.name}
+        if self.unique:
+            options["unique"] = True
+        if self.sparse:
+            options["sparse"] = True
+        if self.expire_after_seconds is not None:
+            options["expireAfterSeconds"] = self.expire_after_seconds
+        return options
+
+    def to_index_model(self) -> IndexModel:
+        return IndexModel(list(self.keys), **self.options())
+
+    def matches(self, info: dict[str, Any]) -> bool:
+        """Compare with an entry of `collection.index_information()`."""
+        return (
+            tuple((key, int(direction)) for key, direction in info["key"]) == self.keys
+            and bool(info.get("unique", False)) == self.unique
+            and bool(info.get("sparse", False)) == self.sparse
+            and info.get("expireAfterSeconds") == self.expire_after_seconds
+        )
+
+
+@dataclass
+class IndexDriftReport:
+    # Registered but absent from the database
+    missing: list[str] = field(default_factory=list)
+    # Present under the registered name, but with different keys or options
+    changed: list[str] = field(default_factory=list)
+    # Present in a registered collection but not in the registry
+    unexpected: list[str] = field(default_factory=list)
+
+    @property
+    def has_drift(self) -> bool:
+        return bool(self.missing or self.changed or self.unexpected)
+
+
+_REGISTRY: dict[str, IndexSpec] = {}
+# Indexes that used to be registered and are dropped by `apply_indexes`: (model, index name)
+_RETIRED: list[tuple[type[Base], str]] = []
+
+
+def register_indexes(*specs: IndexSpec) -> None:
+    """Add indexes to the registry. New models declare their indexes here, or call this from their own module."""
+    for spec in specs:
+        _REGISTRY[spec.name] = spec
+
+
+def retire_indexes(model: type[Base], *names: str) -> None:
+    """Mark indexes for removal, for example when the field they cover is gone."""
+    _RETIRED.extend((model, name) for name in names)
+
+
+def registered_indexes() -> list[IndexSpec]:
+    return list(_REGISTRY.values())
+
+
+register_indexes(
+    # Every login, registration, magic link and recovery looks up by email; uniqueness also closes the
+    # check-then-create race in `create_user_profile`
+    IndexSpec(User, (("email", ASCENDING),), name="user_email_unique", unique=True),
+    # Incremental Qdrant reconciliation reads users changed since a watermark, in (`modified`, `_id`) order
+    IndexSpec(User, (("modified", ASCENDING), ("_id", ASCENDING)), name="user_modified"),
+    # Sparse so that documents not yet migrated by `app.db.token_migration` (no hash) don't collide
+    IndexSpec(Token, (("token_hash", ASCENDING),), name="token_hash_unique", unique=True, sparse=True),
+    IndexSpec(Token, (("authenticates_id", ASCENDING),), name="token_authenticates_id"),
+    # Mongo deletes each token once `expires` has passed
+    IndexSpec(Token, (("expires", ASCENDING),), name="token_expires_ttl", expire_after_seconds=0),
+    IndexSpec(QdrantSyncEvent, (("available_at", ASCENDING),), name="qdrant_outbox_available_at"),
+    IndexSpec(QdrantSyncEvent, (("lease", ASCENDING),), name="qdrant_outbox_lease", sparse=True),
+)
+# Refresh tokens moved out of `User.refresh_tokens` and are stored by hash
+retire_indexes(User, "user_refresh_tokens")
+retire_indexes(Token, "token_token_unique")
+
+
+def _by_collection(specs: list[IndexSpec]) -> dict[str, list[IndexSpec]]:
+    engine = get_engine()
+    grouped: dict[str, list[IndexSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(engine.get_collection(spec.model).name, []).append(spec)
+    return grouped
+
+
+async def apply_indexes() -> dict[str, str]:
+    """
+    Drop retired indexes, then create every registered index. Both are idempotent, so this is safe on every start. A
+    failure (for example duplicate emails blocking the unique index) is logged and reported rather than aborting
+    startup.
+
+    Returns:
+        Index name mapped to "ok" or the error message
+    """
+    engine = get_engine()
+    results: dict[str, str] = {}
+    for model, name in _RETIRED:
+        collection = engine.get_collection(model)
+        try:
+            if name in await collection.index_information():
+                await collection.drop_index(name)
+                logger.info(f"Dropped retired index '{name}' on '{collection.name}'")
+        except OperationFailure as e:
+            logger.error(f"Could not drop retired index '{name}' on '{collection.name}': {e}")
+    for collection_name, specs in _by_collection(registered_indexes()).items():
+        collection = engine.database[collection_name]
+        for spec in specs:
+            try:
+                await collection.create_indexes([spec.to_index_model()])
+                results[spec.name] = "ok"
+            except OperationFailure as e:
+                logger.error(f"Could not create index '{spec.name}' on '{collection_name}': {e}")
+                results[spec.name] = str(e)
+    return results
+
+
+async def detect_index_drift() -> IndexDriftReport:
+    """Compare the registry with the indexes that actually exist."""
+    engine = get_engine()
+    report = IndexDriftReport()
+    for collection_name, specs in _by_collection(registered_indexes()).items():
+        existing = await engine.database[collection_name].index_information()
+        for spec in specs:
+            if spec.name not in existing:
+                report.missing.append(f"{collection_name}.{spec.name}")
+            elif not spec.matches(existing[spec.name]):
+                report.changed.append(f"{collection_name}.{spec.name}")
+        registered = {spec.name for spec in specs} | {"_id_"}
+        report.unexpected.extend(f"{collection_name}.{name}" for name in existing if name not in registered)
+    if report.has_drift:
+        logger.warning(
+            f"Index drift: missing={report.missing} changed={report.changed} unexpected={report.unexpected}"
+        )
+    return report
@@ -2,9 +2,12 @@ from pymongo.database import Database
 
 from app import crud, schemas
 from app.core.config import settings
+from app.db.indexes import apply_indexes, detect_index_drift
 
 
 async def init_db(db: Database) -> None:
+    await apply_indexes()
+    await detect_index_drift()
     user = await crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
     if not user:
         # Create user auth
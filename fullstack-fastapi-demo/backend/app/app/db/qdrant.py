@@ -1,5 +1,6 @@
 from qdrant_client import AsyncQdrantClient
 from app.core.config import settings
+from app.core.metrics import InstrumentedQdrantClient
 
 class _QdrantClientSingleton:
     async_client: AsyncQdrantClient | None = None
@@ -7,12 +8,14 @@ class _QdrantClientSingleton:
     def __new__(cls):
         if not hasattr(cls, "instance"):
             cls.instance = super(_QdrantClientSingleton, cls).__new__(cls)
-            cls.instance.async_client = AsyncQdrantClient(
+            client = AsyncQdrantClient(
                 host=settings.QDRANT_HOST,
                 port=settings.QDRANT_PORT,
                 api_key=settings.QDRANT_API_KEY,
                 https=settings.QDRANT_HTTPS,
             )
+            # Same interface, with every call timed
+            cls.instance.async_client = InstrumentedQdrantClient(client) if settings.METRICS_ENABLED else client
         return cls.instance
 
 def get_qdrant_client() -> AsyncQdrantClient:
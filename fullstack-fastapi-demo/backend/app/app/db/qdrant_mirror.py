@@ -0,0 +1,234 @@
+"""Change-stream mirror of MongoDB users into Qdrant."""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any
+
+from motor.core import AgnosticDatabase
+from odmantic import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import settings
+from app.db.qdrant_outbox import apply_user_changes, merge_sync_ops, retry_delay
+from app.db.qdrant_resync import SYNC_STATE_COLLECTION
+from app.db.qdrant_users import SYNC_UPSERT, user_sync_op
+from app.db.session import get_engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+MIRROR_STATE_KEY = "users_change_stream"
+# The resume token fell out of the oplog (ChangeStreamHistoryLost) or the stream can't be resumed (ChangeStreamFatal)
+UNRESUMABLE_ERROR_CODES = {280, 286}
+WATCHED_OPERATIONS = ["insert", "update", "replace", "delete"]
+# While idle the state is still saved this often, as a heartbeat and so the resume token keeps up with the oplog
+IDLE_STATE_SAVE_SECONDS = 10.0
+
+
+async def load_mirror_state(db: AgnosticDatabase, key: str = MIRROR_STATE_KEY) -> dict[str, Any]:
+    return await db[SYNC_STATE_COLLECTION].find_one({"_id": key}) or {}
+
+
+async def save_mirror_state(db: AgnosticDatabase, state: dict[str, Any], key: str = MIRROR_STATE_KEY) -> None:
+    await db[SYNC_STATE_COLLECTION].update_one(
+        {"_id": key}, {"$set": {**state, "updated": datetime.utcnow()}}, upsert=True
+    )
+
+
+def classify_change(event: dict[str, Any]) -> tuple[ObjectId, str] | None:
+    """
+    The user a change event touches and how it has to be mirrored, or None when no mirrored field changed (a TOTP
+    counter bump, a password change, a bare `modified`). Deletes are full syncs: the user is re-read and, being gone,
+    removed from Qdrant.
+    """
+    user_id = event["documentKey"]["_id"]
+    if event["operationType"] != "update":
+        return user_id, SYNC_UPSERT
+    description = event.get("updateDescription") or {}
+    # Dotted paths ("a.b") and array truncations still change their top-level field
+    changed = {path.split(".")[0] for path in description.get("updatedFields", {})}
+    changed |= {path.split(".")[0] for path in description.get("removedFields", [])}
+    changed |= {truncated["field"].split(".")[0] for truncated in description.get("truncatedArrays", [])}
+    op = user_sync_op(changed)
+    return (user_id, op) if op else None
+
+
+class UserChangeStreamMirror:
+    def __init__(
+        self,
+        db: AgnosticDatabase,
+        *,
+        batch_size: int | None = None,
+        coalesce_seconds: float | None = None,
+        state_key: str = MIRROR_STATE_KEY,
+    ):
+        """
+        Tails a change stream on the users collection and mirrors every write into Qdrant, whichever code path made
+        it. Needs a replica set (a single-node one is enough).
+
+        Events are coalesced per user for up to `coalesce_seconds` (or `batch_size` users), then the latest Mongo state
+        of the batch is applied with `apply_user_changes`. The resume token is persisted in `qdrant_sync_state` only
+        after Qdrant accepted the batch, so a restart replays at most one batch (delivery is at-least-once, and every
+        Qdrant write is idempotent). A failed batch is retried with the outbox backoff without advancing the token.
+
+        **Parameters**
+
+        * `db`: Database holding the users and `qdrant_sync_state` collections
+        * `batch_size`: Maximum users per Qdrant batch, defaults to `QDRANT_MIRROR_BATCH_SIZE`
+        * `coalesce_seconds`: How long to gather events before applying them, defaults to
+          `QDRANT_MIRROR_COALESCE_SECONDS`
+        * `state_key`: Key of the resume-token document in `qdrant_sync_state`
+        """
+        self.db = db
+        self.batch_size = batch_size or settings.QDRANT_MIRROR_BATCH_SIZE
+        if coalesce_seconds is None:
+            coalesce_seconds = settings.QDRANT_MIRROR_COALESCE_SECONDS
+        self.coalesce_seconds = coalesce_seconds
+        self.state_key = state_key
+        self.engine = get_engine()
+        self.collection = db[self.engine.get_collection(User).name]
+        self.events = 0
+        self.skipped = 0
+        self.coalesced = 0
+        self.applied = 0
+        self.batches = 0
+        self.failed = 0
+        # Seconds between the cluster time of the newest applied event and the moment Qdrant accepted it
+        self.lag_seconds = 0.0
+        self.last_event_at: datetime | None = None
+        self._stopping = asyncio.Event()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "events": self.events,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "applied": self.applied,
+            "batches": self.batches,
+            "failed": self.failed,
+            "lag_seconds": self.lag_seconds,
+        }
+
+    async def run(self) -> None:
+        """Mirror until `stop` is called, reopening the stream after errors."""
+        attempts = 0
+        while not self._stopping.is_set():
+            try:
+                await self._tail()
+                attempts = 0
+            except OperationFailure as e:
+                if e.code not in UNRESUMABLE_ERROR_CODES:
+                    attempts += 1
+                    logger.error(f"Qdrant mirror change stream failed, reopening: {e}")
+                    await self._sleep(retry_delay(attempts).total_seconds())
+                    continue
+                # Changes between the stored token and now are lost to the stream; only a resync recovers them
+                logger.error(f"Qdrant mirror cannot resume ({e}), restarting from now; run resync_users.py to catch up")
+                await save_mirror_state(self.db, {"resume_token": None}, self.state_key)
+            except PyMongoError as e:
+                attempts += 1
+                logger.error(f"Qdrant mirror lost its change stream, reopening: {e}")
+                await self._sleep(retry_delay(attempts).total_seconds())
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def _sleep(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _tail(self) -> None:
+        state = await load_mirror_state(self.db, self.state_key)
+        pipeline = [{"$match": {"operationType": {"$in": WATCHED_OPERATIONS}}}]
+        max_await_ms = max(1, int(min(self.coalesce_seconds, 1.0) * 1000))
+        async with self.collection.watch(
+            pipeline, resume_after=state.get("resume_token"), max_await_time_ms=max_await_ms
+        ) as stream:
+            saved_token, saved_at = state.get("resume_token"), time.monotonic()
+            while not self._stopping.is_set():
+                changes, last_event_at = await self._collect(stream)
+                if changes:
+                    if not await self._apply(changes, last_event_at):
+                        # Stopped before Qdrant accepted the batch: keep the old token so it is replayed
+                        return
+                else:
+                    self.lag_seconds = 0.0
+                token = stream.resume_token
+                if token != saved_token or time.monotonic() - saved_at >= IDLE_STATE_SAVE_SECONDS:
+                    await save_mirror_state(self.db, self._state(token), self.state_key)
+                    saved_token, saved_at = token, time.monotonic()
+
+    async def _collect(self, stream: Any) -> tuple[dict[ObjectId, str], datetime | None]:
+        """Gather events until the coalescing window closes or the batch is full. Returns the pending changes."""
+        changes: dict[ObjectId, str] = {}
+        last_event_at = None
+        deadline = None
+        while len(changes) < self.batch_size and not self._stopping.is_set():
+            event = await stream.try_next()
+            if event is None:
+                if deadline is None or time.monotonic() >= deadline:
+                    break
+                continue
+            self.events += 1
+            if "clusterTime" in event:
+                last_event_at = event["clusterTime"].as_datetime()
+            change = classify_change(event)
+            if change is None:
+                self.skipped += 1
+                continue
+            user_id, op = change
+            if user_id in changes:
+                self.coalesced += 1
+            changes[user_id] = merge_sync_ops(changes.get(user_id), op)
+            if deadline is None:
+                deadline = time.monotonic() + self.coalesce_seconds
+            if time.monotonic() >= deadline:
+                break
+        return changes, last_event_at
+
+    async def _apply(self, changes: dict[ObjectId, str], last_event_at: datetime | None) -> bool:
+        """Apply a batch, retrying until it succeeds. Returns False if the mirror was stopped first."""
+        attempts = 0
+        while True:
+            try:
+                await apply_user_changes(self.engine, changes)
+                break
+            except Exception as e:
+                attempts += 1
+                self.failed += len(changes)
+                logger.error(f"Failed to mirror {len(changes)} user(s) to Qdrant, retrying: {e}")
+                await self._sleep(retry_delay(attempts).total_seconds())
+                if self._stopping.is_set():
+                    return False
+        self.batches += 1
+        self.applied += len(changes)
+        if last_event_at:
+            self.last_event_at = last_event_at
+            self.lag_seconds = max(0.0, (datetime.now(timezone.utc) - last_event_at).total_seconds())
+        return True
+
+    def _state(self, resume_token: Any) -> dict[str, Any]:
+        return {
+            "resume_token": resume_token,
+            "last_event_at": self.last_event_at.replace(tzinfo=None) if self.last_event_at else None,
+            "lag_seconds": self.lag_seconds,
+            "stats": self.stats(),
+        }
+
+
+async def get_mirror_status(db: AgnosticDatabase, key: str = MIRROR_STATE_KEY) -> dict[str, Any]:
+    """
+    Progress of the mirror service as last persisted, for processes that don't run it (the API's /metrics).
+    `age_seconds` is how long ago the mirror last saved its state; it keeps saving while idle, so a large value means
+    the service is down or stuck.
+    """
+    state = await load_mirror_state(db, key)
+    if not state:
+        return {}
+    status = {**state.get("stats", {}), "lag_seconds": state.get("lag_seconds", 0.0)}
+    if state.get("updated"):
+        status["age_seconds"] = (datetime.utcnow() - state["updated"]).total_seconds()
+    return status
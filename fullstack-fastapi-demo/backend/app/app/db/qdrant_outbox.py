@@ -0,0 +1,173 @@
+"""Transactional outbox for mirroring MongoDB users into Qdrant."""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any
+
+from odmantic import AIOEngine, ObjectId
+from pymongo import ASCENDING, UpdateOne
+
+from app.core.config import settings
+from app.db.qdrant_users import (
+    SYNC_PAYLOAD,
+    SYNC_UPSERT,
+    build_user_points,
+    delete_user_points,
+    set_user_payloads,
+    upsert_user_points,
+    user_point_id,
+)
+from app.db.session import get_engine
+from app.models.qdrant_sync import QdrantSyncEvent
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_user_sync(user_id: ObjectId, op: str = SYNC_UPSERT) -> None:
+    """
+    Record that a user needs to be mirrored into Qdrant. This is a single Mongo insert made next to the user write,
+    so request latency no longer depends on Qdrant. `op` is SYNC_PAYLOAD when only payload fields changed.
+    """
+    await get_engine().save(QdrantSyncEvent(user_id=user_id, op=op))
+
+
+def merge_sync_ops(current: str | None, op: str) -> str:
+    """Coalesce two pending syncs of the same user: anything but payload-only updates needs the whole point."""
+    return SYNC_PAYLOAD if current in (None, SYNC_PAYLOAD) and op == SYNC_PAYLOAD else SYNC_UPSERT
+
+
+async def apply_user_changes(engine: AIOEngine, changes: dict[ObjectId, str]) -> None:
+    """
+    Mirror the current Mongo state of the given users into Qdrant, with at most one call per kind of write: an
+    `upsert` for SYNC_UPSERT users, a `set_payload` batch for SYNC_PAYLOAD users and a `delete` for users that no
+    longer exist. Errors are raised so callers can retry; every write is idempotent.
+    """
+    users = await engine.find(User, User.id.in_(list(changes)))
+    found = {user.id for user in users}
+    partial = [user for user in users if changes[user.id] == SYNC_PAYLOAD]
+    await upsert_user_points(build_user_points([user for user in users if changes[user.id] != SYNC_PAYLOAD]))
+    if partial:
+        try:
+            await set_user_payloads(partial)
+        except Exception as e:
+            # For example a point that was never created: upsert the whole point instead
+            logger.warning(f"Payload update of {len(partial)} user(s) failed, upserting instead: {e}")
+            await upsert_user_points(build_user_points(partial))
+    await delete_user_points([user_point_id(str(user_id)) for user_id in changes if user_id not in found])
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff for failed events, capped at QDRANT_OUTBOX_MAX_BACKOFF_SECONDS."""
+    seconds = settings.QDRANT_OUTBOX_BASE_BACKOFF_SECONDS * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.QDRANT_OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+class QdrantSyncDispatcher:
+    def __init__(self, *, batch_size: int | None = None, poll_seconds: float | None = None):
+        """
+        Drains the outbox into Qdrant with at-least-once delivery.
+
+        Each pass leases a batch of due events, loads the current state of those users from Mongo and applies it with
+        one `upsert` (and one `delete` for users that no longer exist). Users whose events are all payload-only get a
+        `set_payload` instead, which leaves their vectors (and the HNSW graph) alone. Events are only removed once
+        Qdrant has accepted the batch; on failure they are released with exponential backoff. Several events for the
+        same user collapse into a single write, since the latest Mongo state is what gets written.
+
+        **Parameters**
+
+        * `batch_size`: Maximum events per pass, defaults to `QDRANT_OUTBOX_BATCH_SIZE`
+        * `poll_seconds`: Idle sleep between passes, defaults to `QDRANT_OUTBOX_POLL_SECONDS`
+        """
+        self.batch_size = batch_size or settings.QDRANT_OUTBOX_BATCH_SIZE
+        self.poll_seconds = poll_seconds or settings.QDRANT_OUTBOX_POLL_SECONDS
+        self.engine = get_engine()
+        self.collection = self.engine.get_collection(QdrantSyncEvent)
+        self.dispatched = 0
+        self.failed = 0
+        self._stopping = asyncio.Event()
+
+    async def _lease(self) -> list[dict[str, Any]]:
+        now = datetime.utcnow()
+        due = await self.collection.find(
+            {"available_at": {"$lte": now}}, {"_id": 1}, sort=[("available_at", ASCENDING)], limit=self.batch_size
+        ).to_list(length=self.batch_size)
+        if not due:
+            return []
+        lease = uuid.uuid4().hex
+        # Only events still due are claimed, so concurrent dispatchers never process the same event twice per lease
+        await self.collection.update_many(
+            {"_id": {"$in": [doc["_id"] for doc in due]}, "available_at": {"$lte": now}},
+            {"$set": {"lease": lease, "available_at": now + timedelta(seconds=settings.QDRANT_OUTBOX_LEASE_SECONDS)}},
+        )
+        return await self.collection.find({"lease": lease}).to_list(length=self.batch_size)
+
+    async def _apply(self, events: list[dict[str, Any]]) -> None:
+        changes: dict[ObjectId, str] = {}
+        for event in events:
+            changes[event["user_id"]] = merge_sync_ops(changes.get(event["user_id"]), event.get("op", SYNC_UPSERT))
+        await apply_user_changes(self.engine, changes)
+
+    async def _release(self, events: list[dict[str, Any]], error: Exception) -> None:
+        now = datetime.utcnow()
+        requests = []
+        for event in events:
+            attempts = event.get("attempts", 0) + 1
+            requests.append(
+                UpdateOne(
+                    {"_id": event["_id"]},
+                    {
+                        "$set": {
+                            "attempts": attempts,
+                            "available_at": now + retry_delay(attempts),
+                            "lease": None,
+                            "last_error": str(error)[:500],
+                        }
+                    },
+                )
+            )
+        await self.collection.bulk_write(requests, ordered=False)
+
+    async def drain_once(self) -> int:
+        """Process a single batch. Returns the number of events delivered to Qdrant."""
+        events = await self._lease()
+        if not events:
+            return 0
+        try:
+            await self._apply(events)
+        except Exception as e:
+            self.failed += len(events)
+            logger.error(f"Failed to sync {len(events)} user(s) to Qdrant, will retry: {e}")
+            await self._release(events, e)
+            return 0
+        await self.collection.delete_many({"_id": {"$in": [event["_id"] for event in events]}})
+        self.dispatched += len(events)
+        return len(events)
+
+    async def run(self) -> None:
+        """Drain continuously until `stop` is called, backing off to `poll_seconds` when the outbox is idle."""
+        while not self._stopping.is_set():
+            try:
+                delivered = await self.drain_once()
+            except Exception as e:
+                logger.error(f"Qdrant outbox dispatcher error: {e}")
+                delivered = 0
+            if delivered < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+async def get_outbox_backlog() -> dict[str, Any]:
+    """Size and age of the pending sync backlog."""
+    collection = get_engine().get_collection(QdrantSyncEvent)
+    pending = await collection.count_documents({})
+    retrying = await collection.count_documents({"attempts": {"$gt": 0}})
+    oldest = await collection.find_one({}, {"created": 1}, sort=[("created", ASCENDING)])
+    oldest_age = (datetime.utcnow() - oldest["created"]).total_seconds() if oldest else None
+    return {"pending": pending, "retrying": retrying, "oldest_age_seconds": oldest_age}
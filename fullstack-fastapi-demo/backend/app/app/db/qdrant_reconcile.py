@@ -0,0 +1,198 @@
+"""Incremental reconciliation of the Qdrant user mirror against MongoDB."""
+import logging
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator
+
+from motor.core import AgnosticDatabase
+from odmantic import ObjectId
+from pymongo import ASCENDING
+
+from app.core.config import settings
+from app.db.qdrant import get_qdrant_client
+from app.db.qdrant_outbox import apply_user_changes
+from app.db.qdrant_resync import SYNC_STATE_COLLECTION
+from app.db.qdrant_users import (
+    SYNC_UPSERT,
+    USER_COLLECTION_NAME,
+    build_user_payload,
+    delete_user_points,
+    scroll_points,
+    user_point_id,
+)
+from app.db.session import get_engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_WATERMARK_KEY = "users_reconcile"
+
+
+@dataclass
+class ReconcileReport:
+    # `modified` watermark the pass started from; None for a full pass
+    since: datetime | None
+    checked: int = 0
+    missing: int = 0
+    mismatched: int = 0
+    fixed: int = 0
+    points_scanned: int = 0
+    orphans_deleted: int = 0
+    watermark: datetime | None = None
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """JSON-friendly form, for task results and scripts."""
+        return {
+            key: value.isoformat() if isinstance(value, datetime) else value for key, value in asdict(self).items()
+        }
+
+
+async def load_watermark(db: AgnosticDatabase, key: str = RECONCILE_WATERMARK_KEY) -> datetime | None:
+    doc = await db[SYNC_STATE_COLLECTION].find_one({"_id": key})
+    return doc.get("modified") if doc else None
+
+
+async def save_watermark(db: AgnosticDatabase, modified: datetime | None, key: str = RECONCILE_WATERMARK_KEY) -> None:
+    await db[SYNC_STATE_COLLECTION].update_one(
+        {"_id": key}, {"$set": {"modified": modified, "updated": datetime.utcnow()}}, upsert=True
+    )
+
+
+async def stream_changed_users(
+    db: AgnosticDatabase, *, since: datetime | None = None, batch_size: int = 500
+) -> AsyncIterator[list[User]]:
+    """
+    Users with `modified` at or after `since` (all users when None), in (`modified`, `_id`) order so the
+    `user_modified` index serves both the filter and the sort. Only one batch is held in memory.
+    """
+    query: dict[str, Any] = {"modified": {"$gte": since}} if since else {}
+    collection = db[get_engine().get_collection(User).name]
+    cursor = collection.find(query).sort([("modified", ASCENDING), ("_id", ASCENDING)]).batch_size(batch_size)
+    batch: list[User] = []
+    async for doc in cursor:
+        batch.append(User.model_validate_doc(doc))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class UserReconciler:
+    def __init__(
+        self,
+        db: AgnosticDatabase,
+        *,
+        batch_size: int | None = None,
+        overlap_seconds: float | None = None,
+        watermark_key: str = RECONCILE_WATERMARK_KEY,
+    ):
+        """
+        Repairs drift between MongoDB users and their Qdrant points, touching only users changed since the last pass.
+
+        Users whose `modified` is past the stored watermark are streamed from Mongo; for each batch only the stored
+        `checksum` payload field is read back from Qdrant and compared with `user_payload_checksum` of the Mongo
+        state. Missing or stale points are rewritten, everything else is left alone. The watermark only advances when
+        the whole pass succeeded. Orphaned points (no Mongo user) are found by streaming point ids and user ids only.
+
+        **Parameters**
+
+        * `db`: Mongo database
+        * `batch_size`: Users per Mongo batch and Qdrant `retrieve`, defaults to `QDRANT_RECONCILE_BATCH_SIZE`
+        * `overlap_seconds`: How far before the watermark a pass starts, to cover writes that committed late,
+          defaults to `QDRANT_RECONCILE_OVERLAP_SECONDS`
+        * `watermark_key`: Key of the watermark document in `qdrant_sync_state`
+        """
+        self.db = db
+        self.batch_size = batch_size or settings.QDRANT_RECONCILE_BATCH_SIZE
+        if overlap_seconds is None:
+            overlap_seconds = settings.QDRANT_RECONCILE_OVERLAP_SECONDS
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.watermark_key = watermark_key
+        self.engine = get_engine()
+
+    async def _reconcile_batch(self, users: list[User], report: ReconcileReport) -> None:
+        client = get_qdrant_client()
+        points = await client.retrieve(
+            collection_name=USER_COLLECTION_NAME,
+            ids=[user_point_id(str(user.id)) for user in users],
+            with_payload=["checksum"],
+            with_vectors=False,
+        )
+        stored = {point.id: (point.payload or {}).get("checksum") for point in points}
+        stale: dict[ObjectId, str] = {}
+        for user in users:
+            point_id = user_point_id(str(user.id))
+            if point_id not in stored:
+                report.missing += 1
+            elif stored[point_id] != build_user_payload(user)["checksum"]:
+                report.mismatched += 1
+            else:
+                continue
+            stale[user.id] = SYNC_UPSERT
+        report.checked += len(users)
+        if stale:
+            await apply_user_changes(self.engine, stale)
+            report.fixed += len(stale)
+
+    async def reconcile_changed(self, *, full: bool = False) -> ReconcileReport:
+        """Check every user changed since the watermark (every user with `full`) and fix the stale points."""
+        watermark = None if full else await load_watermark(self.db, self.watermark_key)
+        since = watermark - self.overlap if watermark else None
+        report = ReconcileReport(since=since, watermark=watermark)
+        started = time.perf_counter()
+        async for users in stream_changed_users(self.db, since=since, batch_size=self.batch_size):
+            await self._reconcile_batch(users, report)
+            # Batches come in `modified` order, but never move the watermark backwards because of the overlap
+            report.watermark = max(report.watermark or users[-1].modified, users[-1].modified)
+        if report.watermark and report.watermark != watermark:
+            await save_watermark(self.db, report.watermark, self.watermark_key)
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Reconciled {report.checked} changed user(s) since {since}: {report.missing} missing, "
+            f"{report.mismatched} stale, {report.fixed} fixed in {report.seconds:.1f}s"
+        )
+        return report
+
+    async def delete_orphans(self, report: ReconcileReport | None = None) -> ReconcileReport:
+        """Delete Qdrant points whose user no longer exists in Mongo, streaming only ids."""
+        report = report or ReconcileReport(since=None)
+        started = time.perf_counter()
+        collection = self.engine.get_collection(User)
+        page: list[tuple[int, str | None]] = []
+
+        async def flush() -> None:
+            user_ids = [ObjectId(user_id) for _, user_id in page if user_id and ObjectId.is_valid(user_id)]
+            docs = await collection.find({"_id": {"$in": user_ids}}, {"_id": 1}).to_list(None)
+            existing = {doc["_id"] for doc in docs}
+            orphans = [
+                point_id
+                for point_id, user_id in page
+                if not (user_id and ObjectId.is_valid(user_id) and ObjectId(user_id) in existing)
+            ]
+            # Collected per page and deleted afterwards, so the deletes don't shift the scroll under us
+            orphan_ids.extend(orphans)
+            page.clear()
+
+        orphan_ids: list[int] = []
+        async for point in scroll_points(with_payload=["user_id"], page_size=self.batch_size):
+            report.points_scanned += 1
+            page.append((point.id, (point.payload or {}).get("user_id")))
+            if len(page) >= self.batch_size:
+                await flush()
+        if page:
+            await flush()
+        for i in range(0, len(orphan_ids), self.batch_size):
+            await delete_user_points(orphan_ids[i:i + self.batch_size])
+        report.orphans_deleted += len(orphan_ids)
+        report.seconds += time.perf_counter() - started
+        logger.info(f"Scanned {report.points_scanned} Qdrant point(s), deleted {len(orphan_ids)} orphan(s)")
+        return report
+
+    async def run(self, *, full: bool = False, orphans: bool = True) -> ReconcileReport:
+        report = await self.reconcile_changed(full=full)
+        if orphans:
+            await self.delete_orphans(report)
+        return report
@@ -0,0 +1,167 @@
+"""Streaming, checkpointed resync of MongoDB users into Qdrant."""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+from motor.core import AgnosticDatabase
+from odmantic import ObjectId
+
+from app.db.qdrant_users import build_user_points, upsert_user_points
+from app.db.session import get_engine
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Small key/value collection for sync bookkeeping (checkpoints, watermarks, resume tokens)
+SYNC_STATE_COLLECTION = "qdrant_sync_state"
+RESYNC_CHECKPOINT_KEY = "users_resync"
+
+
+@dataclass
+class BatchReport:
+    index: int
+    first_id: ObjectId
+    last_id: ObjectId
+    users: int
+    failed: int
+    seconds: float
+    error: str | None = None
+
+
+@dataclass
+class ResyncReport:
+    started_after: ObjectId | None
+    synced: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    checkpoint: ObjectId | None = None
+    batches: list[BatchReport] = field(default_factory=list)
+
+    @property
+    def users_per_second(self) -> float:
+        return self.synced / self.seconds if self.seconds else 0.0
+
+
+async def load_checkpoint(db: AgnosticDatabase, key: str = RESYNC_CHECKPOINT_KEY) -> ObjectId | None:
+    doc = await db[SYNC_STATE_COLLECTION].find_one({"_id": key})
+    return doc.get("last_id") if doc else None
+
+
+async def save_checkpoint(db: AgnosticDatabase, last_id: ObjectId | None, key: str = RESYNC_CHECKPOINT_KEY) -> None:
+    await db[SYNC_STATE_COLLECTION].update_one(
+        {"_id": key}, {"$set": {"last_id": last_id, "updated": datetime.utcnow()}}, upsert=True
+    )
+
+
+async def stream_user_batches(
+    db: AgnosticDatabase, *, after: ObjectId | None = None, batch_size: int = 500
+) -> AsyncIterator[list[User]]:
+    """
+    Stream users in `_id` order from a server-side cursor, `batch_size` at a time. Only one batch is held in memory.
+    """
+    query: dict[str, Any] = {"_id": {"$gt": after}} if after else {}
+    collection = db[get_engine().get_collection(User).name]
+    cursor = collection.find(query).sort("_id", 1).batch_size(batch_size)
+    batch: list[User] = []
+    async for doc in cursor:
+        batch.append(User.model_validate_doc(doc))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class UserResyncEngine:
+    def __init__(
+        self,
+        db: AgnosticDatabase,
+        *,
+        batch_size: int = 500,
+        concurrency: int = 4,
+        checkpoint_key: str = RESYNC_CHECKPOINT_KEY,
+    ):
+        """
+        Mirror every MongoDB user into Qdrant.
+
+        Users are streamed from a Motor cursor and upserted in batches, with up to `concurrency` batch upserts in
+        flight. The checkpoint (last `_id`) only advances past a batch once it and every batch before it succeeded,
+        so a resumed run never skips users. A failed batch is retried on the next run.
+
+        **Parameters**
+
+        * `db`: Mongo database
+        * `batch_size`: Users per Qdrant upsert
+        * `concurrency`: Maximum concurrent batch upserts
+        * `checkpoint_key`: Key of the checkpoint document in `qdrant_sync_state`
+        """
+        self.db = db
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_key = checkpoint_key
+
+    async def _sync_batch(self, index: int, users: list[User], semaphore: asyncio.Semaphore) -> BatchReport:
+        started = time.perf_counter()
+        try:
+            await upsert_user_points(build_user_points(users))
+            error, failed = None, 0
+        except Exception as e:
+            error, failed = str(e), len(users)
+        finally:
+            semaphore.release()
+        report = BatchReport(
+            index=index,
+            first_id=users[0].id,
+            last_id=users[-1].id,
+            users=len(users),
+            failed=failed,
+            seconds=time.perf_counter() - started,
+            error=error,
+        )
+        if error:
+            logger.error(f"Resync batch {index} ({report.first_id}..{report.last_id}) failed: {error}")
+        else:
+            logger.info(f"Resync batch {index}: {report.users} users in {report.seconds:.2f}s")
+        return report
+
+    async def run(self, *, resume: bool = True) -> ResyncReport:
+        after = await load_checkpoint(self.db, self.checkpoint_key) if resume else None
+        report = ResyncReport(started_after=after, checkpoint=after)
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        pending: dict[int, asyncio.Task[BatchReport]] = {}
+        next_to_commit = 0
+        checkpoint_blocked = False
+
+        async def commit_finished() -> None:
+            # Advance the checkpoint over the contiguous prefix of finished batches
+            nonlocal next_to_commit, checkpoint_blocked
+            while next_to_commit in pending and pending[next_to_commit].done():
+                batch = pending.pop(next_to_commit).result()
+                report.batches.append(batch)
+                report.synced += batch.users - batch.failed
+                report.failed += batch.failed
+                if batch.failed:
+                    checkpoint_blocked = True
+                elif not checkpoint_blocked:
+                    report.checkpoint = batch.last_id
+                    await save_checkpoint(self.db, batch.last_id, self.checkpoint_key)
+                next_to_commit += 1
+
+        index = 0
+        async for users in stream_user_batches(self.db, after=after, batch_size=self.batch_size):
+            await semaphore.acquire()
+            pending[index] = asyncio.create_task(self._sync_batch(index, users, semaphore))
+            index += 1
+            await commit_finished()
+        if pending:
+            await asyncio.wait(list(pending.values()))
+        await commit_finished()
+        report.seconds = time.perf_counter() - started
+        if not checkpoint_blocked:
+            # A clean full pass: the next run starts from the beginning again
+            await save_checkpoint(self.db, None, self.checkpoint_key)
+        return report
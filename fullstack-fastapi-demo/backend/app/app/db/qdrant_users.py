@@ -1,11 +1,17 @@
 """Qdrant integration for user storage."""
+import asyncio
 import hashlib
+import json
 import logging
-from typing import Optional
+import weakref
+from typing import AsyncIterator, Optional, Sequence
 
+import numpy as np
 from qdrant_client import models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from app.db.qdrant import get_qdrant_client
 from app.models.user import User
+from app.schemas.qdrant import UserSearchFilter
 
 logger = logging.getLogger(__name__)
 
@@ -13,57 +19,275 @@ logger = logging.getLogger(__name__)
 USER_COLLECTION_NAME = "users_collection"
 # Vector size for user embeddings (using 128 dimensions)
 USER_VECTOR_SIZE = 128
+# Layout of the stored vectors. 1: SHA-256 bytes in the first 32 dimensions, zero padded. 2: SHAKE-256, all dimensions
+USER_VECTOR_VERSION = 2
+# Payload fields that admin filters use. Without an index every filtered scroll or count scans all payloads
+USER_PAYLOAD_INDEXES: dict[str, models.PayloadSchemaType] = {
+    "email": models.PayloadSchemaType.KEYWORD,
+    "is_active": models.PayloadSchemaType.BOOL,
+    "is_superuser": models.PayloadSchemaType.BOOL,
+    "email_validated": models.PayloadSchemaType.BOOL,
+    "vector_version": models.PayloadSchemaType.INTEGER,
+}
+# Inputs of `user_vector_seed`: a change to any of them needs a new vector, so the whole point is upserted
+USER_VECTOR_FIELDS = frozenset({"id", "email", "full_name"})
+# User fields mirrored into the payload by `build_user_payload`. `modified` is left out on purpose: a bump on its own
+# isn't worth a Qdrant write, and it is carried along with the next mirrored change
+USER_PAYLOAD_FIELDS = frozenset({"email", "full_name", "is_active", "is_superuser", "email_validated", "created"})
+# Sync operations recorded in the outbox
+SYNC_UPSERT = "upsert"
+SYNC_PAYLOAD = "payload"
 
 
-async def init_users_collection() -> None:
-    """Initialize users collection in Qdrant if it doesn't exist."""
+class _CollectionState:
+    # Set once the users collection is known to exist, so writes skip the `get_collections` round trip
+    ready: bool = False
+    # One bootstrap lock per running event loop, created on first use: an asyncio.Lock binds to the loop it is first
+    # contended on, and workers and tests run more than one loop per process
+    locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+
+def _collection_lock() -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    lock = _CollectionState.locks.get(loop)
+    if lock is None:
+        lock = _CollectionState.locks[loop] = asyncio.Lock()
+    return lock
+
+
+async def init_users_collection(collection_name: str = USER_COLLECTION_NAME) -> None:
+    """
+    Initialize users collection in Qdrant if it doesn't exist. Another `collection_name` gets the same layout, for
+    example a benchmark dataset kept apart from the app's users.
+    """
     client = get_qdrant_client()
     
     try:
         collections = await client.get_collections()
         collection_names = [c.name for c in collections.collections]
         
-        if USER_COLLECTION_NAME not in collection_names:
+        if collection_name not in collection_names:
             await client.create_collection(
-                collection_name=USER_COLLECTION_NAME,
+                collection_name=collection_name,
                 vectors_config=models.VectorParams(
                     size=USER_VECTOR_SIZE,
                     distance=models.Distance.COSINE
                 ),
             )
-            logger.info(f"Collection '{USER_COLLECTION_NAME}' created in Qdrant.")
+            logger.info(f"Collection '{collection_name}' created in Qdrant.")
         else:
-            logger.info(f"Collection '{USER_COLLECTION_NAME}' already exists in Qdrant.")
+            logger.info(f"Collection '{collection_name}' already exists in Qdrant.")
+        await ensure_user_payload_indexes(collection_name)
+        if collection_name == USER_COLLECTION_NAME:
+            _CollectionState.ready = True
     except Exception as e:
         logger.error(f"Error initializing users collection: {e}")
         raise
 
 
-def generate_user_vector(user: User) -> list[float]:
+async def ensure_user_payload_indexes(collection_name: str = USER_COLLECTION_NAME) -> list[str]:
+    """
+    Create the payload indexes in USER_PAYLOAD_INDEXES that the collection doesn't have yet. Existing collections get
+    them too, so this is safe on every start.
+
+    Returns:
+        Names of the fields that were indexed
+    """
+    client = get_qdrant_client()
+    info = await client.get_collection(collection_name=collection_name)
+    existing = info.payload_schema or {}
+    created = []
+    for field_name, schema in USER_PAYLOAD_INDEXES.items():
+        if field_name in existing:
+            continue
+        await client.create_payload_index(
+            collection_name=collection_name,
+            field_name=field_name,
+            field_schema=schema,
+        )
+        created.append(field_name)
+    if created:
+        logger.info(f"Created payload index(es) {created} on '{collection_name}'.")
+    return created
+
+
+async def ensure_users_collection() -> None:
+    """
+    Bootstrap the users collection at most once per process. `init_qdrant` normally does this at startup; later
+    callers only pay for the check again after `reset_users_collection_state`.
+    """
+    if _CollectionState.ready:
+        return
+    async with _collection_lock():
+        if not _CollectionState.ready:
+            await init_users_collection()
+
+
+def reset_users_collection_state() -> None:
+    _CollectionState.ready = False
+
+
+def is_missing_collection_error(error: Exception) -> bool:
+    return isinstance(error, UnexpectedResponse) and error.status_code == 404
+
+
+def user_vector_seed(user_id: str, email: str, full_name: str | None) -> bytes:
+    return f"{user_id}_{email}_{full_name or ''}".encode()
+
+
+def generate_vectors_from_seeds(seeds: list[bytes]) -> np.ndarray:
+    """
+    Hash-based vectors for a batch of seeds, shape (len(seeds), USER_VECTOR_SIZE).
+
+    SHAKE-256 is an extendable-output hash, so every seed yields exactly USER_VECTOR_SIZE bytes and every dimension
+    carries data. The bytes of the whole batch are converted in one NumPy operation rather than per element.
     """
-    Generate a vector representation for a user.
+    if not seeds:
+        return np.empty((0, USER_VECTOR_SIZE), dtype=np.float32)
+    digests = b"".join(hashlib.shake_256(seed).digest(USER_VECTOR_SIZE) for seed in seeds)
+    vectors = np.frombuffer(digests, dtype=np.uint8).reshape(len(seeds), USER_VECTOR_SIZE)
+    return vectors.astype(np.float32) / np.float32(255.0)
+
+
+def generate_user_vectors(users: list[User]) -> np.ndarray:
+    """
+    Generate vector representations for a batch of users.
     Uses a hash-based approach to create consistent vectors from user data.
     """
-    # Create a hash from user email and ID for consistency
-    user_string = f"{user.id}_{user.email}_{user.full_name or ''}"
-    
-    # Generate hash
-    hash_obj = hashlib.sha256(user_string.encode())
-    hash_hex = hash_obj.hexdigest()
-    
-    # Convert hash to vector (128 dimensions)
-    vector = []
-    for i in range(0, min(len(hash_hex), USER_VECTOR_SIZE * 2), 2):
-        # Convert hex pair to float between 0 and 1
-        hex_pair = hash_hex[i:i+2]
-        value = int(hex_pair, 16) / 255.0
-        vector.append(value)
-    
-    # Pad or truncate to exact size
-    while len(vector) < USER_VECTOR_SIZE:
-        vector.append(0.0)
-    
-    return vector[:USER_VECTOR_SIZE]
+    return generate_vectors_from_seeds([user_vector_seed(str(user.id), user.email, user.full_name) for user in users])
+
+
+def generate_user_vector(user: User) -> list[float]:
+    """Single-user convenience wrapper around `generate_user_vectors`."""
+    return generate_user_vectors([user])[0].tolist()
+
+
+def user_point_id(user_id: str) -> int:
+    """
+    Qdrant point id for a user. Qdrant supports string ids too, but we use a hash-based integer of the ObjectId.
+    """
+    return int(hashlib.md5(str(user_id).encode()).hexdigest()[:8], 16)
+
+
+# Payload keys left out of `user_payload_checksum`. `vector_version` describes the stored vector, not the user, and
+# payload-only writes leave it alone; outdated vectors are `migrate_user_vectors`' job
+UNCHECKED_PAYLOAD_FIELDS = ("modified", "checksum", "vector_version")
+
+
+def user_payload_checksum(payload: dict) -> str:
+    """
+    Digest of a user payload, stored alongside it so reconciliation can compare Mongo and Qdrant without fetching
+    whole payloads. `modified` is excluded: a write that changes nothing mirrored does not make the point stale.
+    """
+    checked = {key: value for key, value in payload.items() if key not in UNCHECKED_PAYLOAD_FIELDS}
+    return hashlib.sha256(json.dumps(checked, sort_keys=True, separators=(",", ":")).encode()).hexdigest()[:16]
+
+
+def build_user_payload(user: User) -> dict:
+    """User metadata mirrored into the Qdrant payload."""
+    payload = {
+        "user_id": str(user.id),
+        "email": user.email,
+        "full_name": user.full_name or "",
+        "is_active": user.is_active,
+        "is_superuser": user.is_superuser,
+        "email_validated": user.email_validated,
+        "created": user.created.isoformat() if hasattr(user, 'created') and user.created else None,
+        "modified": user.modified.isoformat() if hasattr(user, 'modified') and user.modified else None,
+        "vector_version": USER_VECTOR_VERSION,
+    }
+    payload["checksum"] = user_payload_checksum(payload)
+    return payload
+
+
+def build_user_payload_update(user: User) -> dict:
+    """
+    The part of `build_user_payload` a payload-only write sets: the mirrored fields, `modified` and `checksum`.
+    `vector_version` is left as stored, since the vector itself is not rewritten.
+    """
+    payload = build_user_payload(user)
+    return {key: payload[key] for key in (*sorted(USER_PAYLOAD_FIELDS), "modified", "checksum")}
+
+
+def build_user_points(users: list[User]) -> list[models.PointStruct]:
+    vectors = generate_user_vectors(users)
+    return [
+        models.PointStruct(id=user_point_id(str(user.id)), vector=vector.tolist(), payload=build_user_payload(user))
+        for user, vector in zip(users, vectors)
+    ]
+
+
+def build_user_point(user: User) -> models.PointStruct:
+    return build_user_points([user])[0]
+
+
+async def upsert_user_points(points: list[models.PointStruct], collection_name: str = USER_COLLECTION_NAME) -> None:
+    """
+    Upsert a batch of user points in a single Qdrant call. Unlike `save_user_to_qdrant`, errors are raised so that
+    callers can retry. A `collection_name` other than the app's must already exist (see `init_users_collection`).
+    """
+    if not points:
+        return
+    client = get_qdrant_client()
+    if collection_name != USER_COLLECTION_NAME:
+        await client.upsert(collection_name=collection_name, points=points)
+        return
+    await ensure_users_collection()
+    try:
+        await client.upsert(collection_name=USER_COLLECTION_NAME, points=points)
+    except UnexpectedResponse as e:
+        if not is_missing_collection_error(e):
+            raise
+        # The collection was dropped behind our back: bootstrap again and retry once
+        reset_users_collection_state()
+        await ensure_users_collection()
+        await client.upsert(collection_name=USER_COLLECTION_NAME, points=points)
+
+
+def user_sync_op(changed_fields: set[str]) -> Optional[str]:
+    """
+    How a user write has to be mirrored: SYNC_UPSERT when the vector inputs changed, SYNC_PAYLOAD when only mirrored
+    payload fields did, None when nothing Qdrant stores changed (for example `totp_counter` or `hashed_password`).
+    """
+    if changed_fields & USER_VECTOR_FIELDS:
+        return SYNC_UPSERT
+    if changed_fields & USER_PAYLOAD_FIELDS:
+        return SYNC_PAYLOAD
+    return None
+
+
+async def set_user_payloads(users: list[User]) -> None:
+    """
+    Overwrite the mirrored payload fields of existing user points without touching their vectors (or their
+    `vector_version`), so Qdrant doesn't re-index them.
+    One `batch_update_points` call for the whole batch. Errors are raised, including when a point doesn't exist yet.
+    """
+    if not users:
+        return
+    client = get_qdrant_client()
+    await ensure_users_collection()
+    await client.batch_update_points(
+        collection_name=USER_COLLECTION_NAME,
+        update_operations=[
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload=build_user_payload_update(user), points=[user_point_id(str(user.id))]
+                )
+            )
+            for user in users
+        ],
+    )
+
+
+async def delete_user_points(point_ids: list[int]) -> None:
+    """Delete a batch of user points in a single Qdrant call. Errors are raised."""
+    if not point_ids:
+        return
+    client = get_qdrant_client()
+    await client.delete(
+        collection_name=USER_COLLECTION_NAME,
+        points_selector=models.PointIdsList(points=point_ids),
+    )
 
 
 async def save_user_to_qdrant(user: User) -> bool:
@@ -77,42 +301,7 @@ async def save_user_to_qdrant(user: User) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        client = get_qdrant_client()
-        
-        # Ensure collection exists
-        await init_users_collection()
-        
-        # Generate vector for user
-        vector = generate_user_vector(user)
-        
-        # Convert user ID to integer for Qdrant (using hash of ObjectId)
-        # Qdrant supports string IDs too, but we'll use a hash-based integer
-        user_id_hash = int(hashlib.md5(str(user.id).encode()).hexdigest()[:8], 16)
-        
-        # Prepare payload (user metadata)
-        payload = {
-            "user_id": str(user.id),
-            "email": user.email,
-            "full_name": user.full_name or "",
-            "is_active": user.is_active,
-            "is_superuser": user.is_superuser,
-            "email_validated": user.email_validated,
-            "created": user.created.isoformat() if hasattr(user, 'created') and user.created else None,
-            "modified": user.modified.isoformat() if hasattr(user, 'modified') and user.modified else None,
-        }
-        
-        # Upsert user to Qdrant
-        await client.upsert(
-            collection_name=USER_COLLECTION_NAME,
-            points=[
-                models.PointStruct(
-                    id=user_id_hash,
-                    vector=vector,
-                    payload=payload
-                )
-            ]
-        )
-        
+        await upsert_user_points([build_user_point(user)])
         logger.info(f"User {user.email} saved to Qdrant successfully.")
         return True
         
@@ -121,12 +310,25 @@ async def save_user_to_qdrant(user: User) -> bool:
         return False
 
 
-async def update_user_in_qdrant(user: User) -> bool:
+async def update_user_in_qdrant(user: User, changed_fields: Optional[set[str]] = None) -> bool:
     """
     Update user data in Qdrant.
-    Uses the same logic as save_user_to_qdrant (upsert updates existing).
+
+    With `changed_fields` only what changed is written (see `user_sync_op`): a payload-only change becomes a
+    `set_payload`, and a change to unmirrored fields skips Qdrant. Without it, the whole point is upserted.
     """
-    return await save_user_to_qdrant(user)
+    op = SYNC_UPSERT if changed_fields is None else user_sync_op(changed_fields)
+    if op is None:
+        return True
+    if op == SYNC_UPSERT:
+        return await save_user_to_qdrant(user)
+    try:
+        await set_user_payloads([user])
+        return True
+    except Exception as e:
+        # Most likely the point was never written; an upsert creates it
+        logger.warning(f"Could not update the payload of user {user.email} in Qdrant, upserting instead: {e}")
+        return await save_user_to_qdrant(user)
 
 
 async def delete_user_from_qdrant(user_id: str) -> bool:
@@ -140,18 +342,7 @@ async def delete_user_from_qdrant(user_id: str) -> bool:
         bool: True if successful, False otherwise
     """
     try:
-        client = get_qdrant_client()
-        
-        # Convert user ID to hash (same as in save_user_to_qdrant)
-        user_id_hash = int(hashlib.md5(user_id.encode()).hexdigest()[:8], 16)
-        
-        # Delete point from Qdrant
-        await client.delete(
-            collection_name=USER_COLLECTION_NAME,
-            points_selector=models.PointIdsList(
-                points=[user_id_hash]
-            )
-        )
+        await delete_user_points([user_point_id(user_id)])
         
         logger.info(f"User {user_id} deleted from Qdrant successfully.")
         return True
@@ -161,9 +352,152 @@ async def delete_user_from_qdrant(user_id: str) -> bool:
         return False
 
 
+async def migrate_user_vectors(batch_size: int = 256) -> int:
+    """
+    Rewrite the vectors of points stored with an older layout to USER_VECTOR_VERSION.
+
+    Only Qdrant is involved: the vector inputs are read back from the payload and vectors are replaced in place with
+    `update_vectors`. Migrated points stop matching the filter, so each pass simply takes the next batch.
+
+    Returns:
+        Number of migrated points
+    """
+    client = get_qdrant_client()
+    outdated = models.Filter(
+        must_not=[models.FieldCondition(key="vector_version", match=models.MatchValue(value=USER_VECTOR_VERSION))]
+    )
+    migrated = 0
+    while True:
+        points, _ = await client.scroll(
+            collection_name=USER_COLLECTION_NAME,
+            scroll_filter=outdated,
+            limit=batch_size,
+            with_payload=["user_id", "email", "full_name"],
+            with_vectors=False,
+        )
+        if not points:
+            return migrated
+        seeds = [
+            user_vector_seed(point.payload["user_id"], point.payload["email"], point.payload.get("full_name"))
+            for point in points
+        ]
+        vectors = generate_vectors_from_seeds(seeds)
+        ids = [point.id for point in points]
+        await client.update_vectors(
+            collection_name=USER_COLLECTION_NAME,
+            points=[models.PointVectors(id=point_id, vector=vector.tolist()) for point_id, vector in zip(ids, vectors)],
+        )
+        await client.set_payload(
+            collection_name=USER_COLLECTION_NAME,
+            payload={"vector_version": USER_VECTOR_VERSION},
+            points=ids,
+        )
+        migrated += len(ids)
+        logger.info(f"Migrated {migrated} user vector(s) to layout v{USER_VECTOR_VERSION}.")
+
+
+def build_user_filter(query: UserSearchFilter) -> Optional[models.Filter]:
+    """
+    Translate the typed search filter into a Qdrant filter on indexed payload fields. Unset fields don't constrain
+    the search; returns None when nothing is set.
+    """
+    conditions = [
+        models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        for key, value in query.model_dump(exclude_none=True).items()
+    ]
+    return models.Filter(must=conditions) if conditions else None
+
+
+async def count_users_in_qdrant(query_filter: Optional[models.Filter] = None) -> int:
+    """Exact number of user points matching the filter. Errors are raised."""
+    client = get_qdrant_client()
+    result = await client.count(collection_name=USER_COLLECTION_NAME, count_filter=query_filter, exact=True)
+    return result.count
+
+
+async def scroll_users_page(
+    query_filter: Optional[models.Filter] = None,
+    limit: int = 10,
+    offset: Optional[int] = None,
+) -> tuple[list[dict], Optional[int]]:
+    """
+    One page of user payloads matching the filter, ordered by point id. Errors are raised.
+
+    Returns:
+        The payloads and the offset of the next page, None on the last page
+    """
+    client = get_qdrant_client()
+    points, next_offset = await client.scroll(
+        collection_name=USER_COLLECTION_NAME,
+        scroll_filter=query_filter,
+        limit=limit,
+        offset=offset,
+        with_payload=True,
+        with_vectors=False,
+    )
+    return [point.payload for point in points], next_offset
+
+
+async def scroll_points(
+    scroll_filter: Optional[models.Filter] = None,
+    *,
+    with_payload: bool | Sequence[str] = True,
+    with_vectors: bool | Sequence[str] = False,
+    page_size: int = 256,
+    limit: Optional[int] = None,
+    collection_name: str = USER_COLLECTION_NAME,
+) -> AsyncIterator[models.Record]:
+    """
+    Stream every point matching the filter by following `next_page_offset`, rather than stopping after one `scroll`
+    page. The next page is requested as soon as the current one arrives, so its round trip overlaps with the caller
+    processing the current page. Errors are raised.
+
+    Args:
+        scroll_filter: Payload filter, see `build_user_filter`
+        with_payload: True, False or the payload fields to return
+        with_vectors: Whether (or which named) vectors to return
+        page_size: Points per `scroll` request
+        limit: Stop after this many points; None streams the whole collection
+        collection_name: Defaults to the users collection
+    """
+    client = get_qdrant_client()
+    remaining = limit
+
+    async def fetch(offset: Optional[models.ExtendedPointId]) -> tuple[list[models.Record], Optional[int]]:
+        size = page_size if remaining is None else max(1, min(page_size, remaining))
+        return await client.scroll(
+            collection_name=collection_name,
+            scroll_filter=scroll_filter,
+            limit=size,
+            offset=offset,
+            with_payload=list(with_payload) if isinstance(with_payload, (list, tuple)) else with_payload,
+            with_vectors=list(with_vectors) if isinstance(with_vectors, (list, tuple)) else with_vectors,
+        )
+
+    if remaining is not None and remaining <= 0:
+        return
+    pending: Optional[asyncio.Future] = asyncio.ensure_future(fetch(None))
+    try:
+        while pending is not None:
+            points, next_offset = await pending
+            pending = None
+            if remaining is not None:
+                points = points[:remaining]
+                remaining -= len(points)
+            if next_offset is not None and (remaining is None or remaining > 0):
+                # Prefetch: the request is in flight while the caller iterates over `points`
+                pending = asyncio.ensure_future(fetch(next_offset))
+            for point in points:
+                yield point
+    finally:
+        # The caller stopped early (or failed): don't leave the prefetch running
+        if pending is not None:
+            pending.cancel()
+
+
 async def search_users_in_qdrant(
     query_vector: Optional[list[float]] = None,
-    filter_conditions: Optional[dict] = None,
+    query_filter: Optional[models.Filter] = None,
     limit: int = 10
 ) -> list[dict]:
     """
@@ -171,7 +505,7 @@ async def search_users_in_qdrant(
     
     Args:
         query_vector: Vector to search for (if None, uses scroll)
-        filter_conditions: Filter conditions for payload
+        query_filter: Payload filter, see `build_user_filter`
         limit: Maximum number of results
         
     Returns:
@@ -185,20 +519,14 @@ async def search_users_in_qdrant(
             results = await client.search(
                 collection_name=USER_COLLECTION_NAME,
                 query_vector=query_vector,
-                query_filter=models.Filter(**filter_conditions) if filter_conditions else None,
+                query_filter=query_filter,
                 limit=limit,
                 with_payload=True
             )
             return [result.payload for result in results]
         else:
-            # Scroll through all users
-            response = await client.scroll(
-                collection_name=USER_COLLECTION_NAME,
-                limit=limit,
-                with_payload=True,
-                with_vectors=False
-            )
-            return [point.payload for point in response[0]]
+            # Stream matching users until `limit` is reached, across as many pages as needed
+            return [point.payload async for point in scroll_points(query_filter, limit=limit)]
             
     except Exception as e:
         logger.error(f"Error searching users in Qdrant: {e}")
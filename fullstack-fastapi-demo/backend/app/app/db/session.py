@@ -1,5 +1,6 @@
 from app.core.config import settings
 from app.__version__ import __version__
+from app.core.metrics import MongoCommandMetrics
 from motor import motor_asyncio, core
 from odmantic import AIOEngine
 from pymongo.driver_info import DriverInfo
@@ -15,7 +16,9 @@ class _MongoClientSingleton:
         if not hasattr(cls, "instance"):
             cls.instance = super(_MongoClientSingleton, cls).__new__(cls)
             cls.instance.mongo_client = motor_asyncio.AsyncIOMotorClient(
-                settings.MONGO_DATABASE_URI, driver=DRIVER_INFO
+                settings.MONGO_DATABASE_URI,
+                driver=DRIVER_INFO,
+                event_listeners=[MongoCommandMetrics()] if settings.METRICS_ENABLED else [],
             )
             cls.instance.engine = AIOEngine(client=cls.instance.mongo_client, database=settings.MONGO_DATABASE)
         return cls.instance
@@ -0,0 +1,84 @@
+"""One-off migration of refresh tokens into the hashed, TTL-indexed `token` collection."""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from jose import JWTError
+from motor.core import AgnosticDatabase
+from pymongo import DeleteOne, UpdateOne
+
+from app.crud.crud_token import hash_token, token_expiry
+from app.db.session import get_engine
+from app.models import Token, User
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TokenMigrationReport:
+    tokens_migrated: int = 0
+    # Documents without a readable token; they could never be matched again
+    tokens_removed: int = 0
+    users_drained: int = 0
+    seconds: float = 0.0
+
+
+def _migrate_token(doc: dict[str, Any]) -> UpdateOne | DeleteOne:
+    raw = doc.get("token")
+    try:
+        expires = token_expiry(raw) if raw else None
+    except JWTError:
+        expires = None
+    if expires is None:
+        return DeleteOne({"_id": doc["_id"]})
+    return UpdateOne(
+        {"_id": doc["_id"]},
+        {
+            "$set": {
+                "token_hash": hash_token(raw),
+                "expires": expires,
+                "created": doc["_id"].generation_time.replace(tzinfo=None),
+            },
+            "$unset": {"token": ""},
+        },
+    )
+
+
+async def migrate_refresh_tokens(db: AgnosticDatabase, *, batch_size: int = 1000) -> TokenMigrationReport:
+    """
+    Replace each legacy `token` document's raw token with its hash and expiry, then drop the `refresh_tokens` arrays
+    from every user in a single update. Idempotent: documents that already have a `token_hash` are skipped.
+
+    Run `apply_indexes` (done by `init_db` at startup) afterwards to build the hash and TTL indexes.
+    """
+    engine = get_engine()
+    tokens = db[engine.get_collection(Token).name]
+    users = db[engine.get_collection(User).name]
+    report = TokenMigrationReport()
+    started = time.perf_counter()
+
+    requests: list[UpdateOne | DeleteOne] = []
+
+    async def flush() -> None:
+        if requests:
+            result = await tokens.bulk_write(requests, ordered=False)
+            report.tokens_migrated += result.modified_count
+            report.tokens_removed += result.deleted_count
+            requests.clear()
+
+    cursor = tokens.find({"token_hash": {"$exists": False}}, {"token": 1}).batch_size(batch_size)
+    async for doc in cursor:
+        requests.append(_migrate_token(doc))
+        if len(requests) >= batch_size:
+            await flush()
+    await flush()
+
+    result = await users.update_many({"refresh_tokens": {"$exists": True}}, {"$unset": {"refresh_tokens": ""}})
+    report.users_drained = result.modified_count
+    report.seconds = time.perf_counter() - started
+    logger.info(
+        f"Refresh token migration: {report.tokens_migrated} migrated, {report.tokens_removed} removed, "
+        f"{report.users_drained} user(s) drained in {report.seconds:.1f}s"
+    )
+    return report
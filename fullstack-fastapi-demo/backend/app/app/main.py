@@ -1,14 +1,39 @@
+import asyncio
+
 from fastapi import FastAPI
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.api.api_v1.api import api_router
+from app.api.metrics import router as metrics_router
 from app.core.config import settings
+from app.core.hashing import shutdown_hashing_service
+from app.core.http_client import create_http_client
+from app.core.metrics import MetricsMiddleware
+from app.db.qdrant_outbox import QdrantSyncDispatcher
+from app.utilities.email_queue import get_email_dispatcher, shutdown_email_dispatcher
+from app.utilities.email_templates import get_email_templates
 
 
 @asynccontextmanager
 async def app_init(app: FastAPI):
+    dispatcher = None
+    if settings.QDRANT_OUTBOX_DISPATCHER_ENABLED and settings.QDRANT_SYNC_MODE == "outbox":
+        dispatcher = QdrantSyncDispatcher()
+        dispatcher_task = asyncio.create_task(dispatcher.run())
+    app.state.qdrant_sync_dispatcher = dispatcher
+    app.state.http_client = create_http_client()
+    if settings.EMAILS_ENABLED:
+        get_email_templates().load_all()
+        get_email_dispatcher().start()
     yield
+    await app.state.http_client.aclose()
+    # Give queued emails a chance to go out before the worker exits
+    await asyncio.to_thread(shutdown_email_dispatcher, settings.EMAIL_SMTP_TIMEOUT_SECONDS)
+    if dispatcher:
+        dispatcher.stop()
+        await dispatcher_task
+    shutdown_hashing_service()
 
 
 app = FastAPI(
@@ -18,6 +43,8 @@ app = FastAPI(
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 # Set all CORS enabled origins
 if settings.BACKEND_CORS_ORIGINS:
@@ -28,5 +55,9 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
+if settings.METRICS_ENABLED:
+    # Added last so it wraps everything, including CORS preflight responses
+    app.add_middleware(MetricsMiddleware)
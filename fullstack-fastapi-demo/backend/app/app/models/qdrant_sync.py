@@ -0,0 +1,23 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Optional
+from odmantic import ObjectId, Field
+
+from app.db.base_class import Base
+
+
+def datetime_utcnow():
+    return datetime.utcnow()
+
+
+# Outbox of pending Mongo -> Qdrant user syncs. Written next to the user write, drained by `QdrantSyncDispatcher`.
+class QdrantSyncEvent(Base):
+    user_id: ObjectId
+    op: str = Field(default="upsert")
+    created: datetime = Field(default_factory=datetime_utcnow)
+    available_at: datetime = Field(default_factory=datetime_utcnow)
+    attempts: int = Field(default=0)
+    lease: Optional[str] = Field(default=None)
+    last_error: Optional[str] = Field(default=None)
+
+    model_config = {"collection": "qdrant_outbox"}
@@ -1,13 +1,16 @@
 from __future__ import annotations
-
-from odmantic import Reference
+from datetime import datetime
+from odmantic import ObjectId, Field
 
 from app.db.base_class import Base
 
-from .user import User  # noqa: F401
+from .qdrant_sync import datetime_utcnow
 
 
-# Consider reworking to consolidate information to a userId. This may not work well
+# One document per issued refresh token. Only a hash of the token is stored; `expires` carries a TTL index, so Mongo
+# reaps expired tokens on its own.
 class Token(Base):
-    token: str
-    authenticates_id: User = Reference()
+    token_hash: str
+    authenticates_id: ObjectId
+    created: datetime = Field(default_factory=datetime_utcnow)
+    expires: datetime
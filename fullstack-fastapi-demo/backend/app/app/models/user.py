@@ -1,14 +1,11 @@
 from __future__ import annotations
-from typing import TYPE_CHECKING, Any, Optional
+from typing import Any, Optional
 from datetime import datetime
 from pydantic import EmailStr
-from odmantic import ObjectId, Field
+from odmantic import Field
 
 from app.db.base_class import Base
 
-if TYPE_CHECKING:
-    from . import Token  # noqa: F401
-
 
 def datetime_now_sec():
     return datetime.now().replace(microsecond=0)
@@ -25,4 +22,3 @@ class User(Base):
     email_validated: bool = Field(default=False)
     is_active: bool = Field(default=False)
     is_superuser: bool = Field(default=False)
-    refresh_tokens: list[ObjectId] = Field(default_factory=list)
@@ -13,3 +13,4 @@ from .token import (
 from .user import User, UserCreate, UserInDB, UserUpdate, UserLogin
 from .emails import EmailContent, EmailValidation
 from .totp import NewTOTP, EnableTOTP
+from .qdrant import QdrantSyncStatus, UserSearchFilter, UserSearchResult
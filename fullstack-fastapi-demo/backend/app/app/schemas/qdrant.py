@@ -0,0 +1,26 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class QdrantSyncStatus(BaseModel):
+    pending: int
+    retrying: int
+    oldest_age_seconds: float | None = None
+    dispatched: int | None = None
+    failed: int | None = None
+
+
+class UserSearchFilter(BaseModel):
+    # Each set field must match exactly; all are indexed in the Qdrant payload
+    email: str | None = None
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+    email_validated: bool | None = None
+
+
+class UserSearchResult(BaseModel):
+    total: int
+    users: list[dict[str, Any]]
+    # Pass back as `offset` for the next page; absent on the last page
+    next_offset: int | None = None
@@ -32,8 +32,9 @@ class TokenPayload(BaseModel):
 
 
 class MagicTokenPayload(BaseModel):
-    sub: ObjectId | None = None
-    fingerprint: ObjectId | None = None
+    # The emailed token's `sub` is the user id; the claim token's `sub` and the shared fingerprint are UUIDs
+    sub: str | None = None
+    fingerprint: str | None = None
 
 
 class WebToken(BaseModel):
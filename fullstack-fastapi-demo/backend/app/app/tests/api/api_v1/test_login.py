@@ -1,7 +1,14 @@
 from typing import Dict
+from unittest.mock import AsyncMock, patch
 
+import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
+from app import crud, schemas
+from app.api import deps
+from app.api.api_v1.endpoints import login
+from app.core import security
 from app.core.config import settings
 
 
@@ -25,3 +32,15 @@ def test_use_access_token(client: TestClient, superuser_token_headers: Dict[str,
     result = r.json()
     assert r.status_code == 200
     assert "email" in result
+
+
+@pytest.mark.asyncio
+async def test_claim_with_swapped_magic_tokens_is_rejected() -> None:
+    # Presenting the claim token as the emailed one puts a UUID where the user id belongs
+    emailed, claim = security.create_magic_tokens(subject="64b7f0c2a1b2c3d4e5f60718")
+    with patch.object(crud.user, "get", AsyncMock()) as get, pytest.raises(HTTPException) as exc:
+        await login.validate_magic_link(
+            db=None, obj_in=schemas.WebToken(claim=emailed), magic_in=deps.get_magic_token(token=claim)
+        )
+    assert exc.value.status_code == 400
+    get.assert_not_awaited()
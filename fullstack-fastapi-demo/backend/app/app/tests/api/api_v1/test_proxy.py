@@ -0,0 +1,80 @@
+from typing import Generator
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.core.config import settings
+from app.main import app
+from app.models import User
+
+
+class ChunkedStream(httpx.AsyncByteStream):
+    def __init__(self, chunks: list[bytes]):
+        self.chunks = chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class UpstreamTransport(httpx.AsyncBaseTransport):
+    # Unlike `httpx.MockTransport`, leaves the response body unread so it can be streamed
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "POST":
+            body = b"".join([chunk async for chunk in request.stream])
+            return httpx.Response(201, stream=ChunkedStream([body]), headers={"Content-Type": "application/json"})
+        return httpx.Response(
+            200,
+            stream=ChunkedStream([b"x" * 10_000] * 10),
+            headers={
+                "Content-Type": "application/octet-stream",
+                "ETag": '"v1"',
+                "Set-Cookie": "session=upstream; Path=/",
+                "Access-Control-Allow-Origin": "*",
+                "Strict-Transport-Security": "max-age=0",
+            },
+        )
+
+
+@pytest.fixture
+def proxy_client() -> Generator:
+    upstream = httpx.AsyncClient(transport=UpstreamTransport())
+    app.dependency_overrides[deps.get_http_client] = lambda: upstream
+    app.dependency_overrides[deps.get_current_active_user] = lambda: User(email="proxy@example.com")
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_proxy_get_streams_upstream_body(proxy_client: TestClient) -> None:
+    r = proxy_client.get(f"{settings.API_V1_STR}/proxy/https://upstream.example.com/file")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/octet-stream"
+    assert len(r.content) == 100_000
+
+
+def test_proxy_forwards_only_allowlisted_headers(proxy_client: TestClient) -> None:
+    r = proxy_client.get(f"{settings.API_V1_STR}/proxy/https://upstream.example.com/file")
+    assert r.headers["etag"] == '"v1"'
+    assert "set-cookie" not in r.headers
+    assert not r.cookies
+    assert "access-control-allow-origin" not in r.headers
+    assert "strict-transport-security" not in r.headers
+
+
+def test_proxy_post_streams_request_body(proxy_client: TestClient) -> None:
+    r = proxy_client.post(f"{settings.API_V1_STR}/proxy/https://upstream.example.com/echo", json={"hello": "world"})
+    assert r.status_code == 201
+    assert r.json() == {"hello": "world"}
+
+
+def test_proxy_upstream_error(proxy_client: TestClient) -> None:
+    def fail(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("unreachable", request=request)
+
+    app.dependency_overrides[deps.get_http_client] = lambda: httpx.AsyncClient(transport=httpx.MockTransport(fail))
+    r = proxy_client.get(f"{settings.API_V1_STR}/proxy/https://upstream.example.com/file")
+    assert r.status_code == 403
@@ -1,10 +1,17 @@
 from typing import Dict
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from motor.core import AgnosticDatabase
 import pytest
+from qdrant_client.http.exceptions import UnexpectedResponse
 
-from app import crud
+from app import crud, models
+from app.api.api_v1.endpoints import users
+from app.core import security
+from app.core.tokens import get_token_decoder, reset_token_decoder
 from app.core.config import settings
 from app.schemas.user import UserCreate
 from app.tests.utils.utils import random_email, random_lower_string
@@ -85,3 +92,38 @@ async def test_retrieve_users(client: TestClient, superuser_token_headers: dict,
     assert len(all_users) > 1
     for item in all_users:
         assert "email" in item
+
+
+@pytest.mark.asyncio
+async def test_search_users_hides_qdrant_errors() -> None:
+    error = UnexpectedResponse(500, "Internal Server Error", b"secret internals", httpx.Headers())
+    with patch.object(users, "count_users_in_qdrant", AsyncMock(side_effect=error)), pytest.raises(
+        HTTPException
+    ) as exc:
+        await users.search_users(current_user=models.User(email="admin@example.com", is_superuser=True))
+    assert exc.value.status_code == 503
+    assert exc.value.detail == "User search is unavailable."
+
+
+@pytest.mark.asyncio
+async def test_validate_email_decodes_through_the_configured_backend() -> None:
+    user = models.User(email="validate@example.com", email_validated=False)
+    validation = security.create_magic_tokens(subject=user.id)[0]
+    reset_token_decoder()
+    decoder = get_token_decoder()
+    decoder.backend = MagicMock(wraps=decoder.backend)
+    try:
+        with patch.object(crud.user, "get", AsyncMock(return_value=user)), patch.object(
+            crud.user, "validate_email", AsyncMock()
+        ) as validate_email:
+            assert await users.validate_user_email(db=None, validation=validation) == {
+                "msg": "Email validated successfully."
+            }
+            with pytest.raises(HTTPException) as exc:
+                await users.validate_user_email(db=None, validation=validation + "x")
+        decoder.backend.decode.assert_called()
+        validate_email.assert_awaited_once()
+        assert exc.value.status_code == 400
+        assert "expired" in exc.value.detail
+    finally:
+        reset_token_decoder()
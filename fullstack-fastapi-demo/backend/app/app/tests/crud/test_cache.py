@@ -0,0 +1,93 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app import crud
+from app.crud.cache import TTLCache
+from app.models import User
+
+
+def test_cache_hit_and_miss() -> None:
+    cache: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=60)
+    assert cache.get("a") is None
+    cache.set("a", "alpha")
+    assert cache.get("a") == "alpha"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", "alpha")
+    cache.set("b", "beta")
+    # Touch "a" so "b" becomes the eviction candidate
+    cache.get("a")
+    cache.set("c", "gamma")
+    assert cache.get("b") is None
+    assert cache.get("a") == "alpha"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_entries_expire() -> None:
+    cache: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=0.01)
+    cache.set("a", "alpha")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_invalidate_and_disable() -> None:
+    cache: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", "alpha")
+    cache.invalidate("a")
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1
+
+    disabled: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=60, enabled=False)
+    disabled.set("a", "alpha")
+    assert disabled.get("a") is None
+    assert len(disabled) == 0
+
+
+def test_fill_is_dropped_after_invalidation() -> None:
+    cache: TTLCache[str] = TTLCache(max_size=2, ttl_seconds=60)
+    generation = cache.generation()
+    cache.invalidate("a")
+    cache.set("a", "stale", generation=generation)
+    assert cache.get("a") is None
+    # Other keys, and fills that started after the invalidation, are stored
+    cache.set("b", "beta", generation=generation)
+    cache.set("a", "fresh", generation=cache.generation())
+    assert cache.get("a") == "fresh" and cache.get("b") == "beta"
+    # Once the invalidation of "a" is forgotten, fills from before it are dropped for every key
+    generation = cache.generation()
+    for key in ["a", "c", "d"]:
+        cache.invalidate(key)
+    cache.set("e", "stale", generation=generation)
+    assert cache.get("e") is None
+
+
+@pytest.mark.asyncio
+async def test_update_during_cache_fill_is_not_overwritten() -> None:
+    user = User(email="toggled@example.com", is_active=True)
+    fetching, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_find_one(*args, **kwargs) -> User:
+        fetching.set()
+        await release.wait()
+        return user
+
+    crud.user.cache.clear()
+    with patch.object(crud.user.engine, "find_one", side_effect=slow_find_one), patch.object(
+        crud.user, "_apply_update", AsyncMock(return_value=set())
+    ):
+        read = asyncio.ensure_future(crud.user.get_cached(None, id=user.id))
+        await fetching.wait()
+        # Commits and invalidates while the read is still awaiting its query
+        await crud.user.update(None, db_obj=user, obj_in={"is_active": False})
+        release.set()
+        assert await read is user
+    assert crud.user.cache.get(str(user.id)) is None
@@ -0,0 +1,17 @@
+import pytest
+from odmantic import ObjectId
+
+from app.crud.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    last_id = ObjectId()
+    cursor = encode_cursor(last_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "YWJj"])
+def test_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
@@ -0,0 +1,86 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from app import crud
+from app.crud.single_flight import SingleFlight
+from app.models import User
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution() -> None:
+    single_flight: SingleFlight[int] = SingleFlight()
+    executions = 0
+
+    async def query() -> int:
+        nonlocal executions
+        executions += 1
+        await asyncio.sleep(0.01)
+        return 42
+
+    results = await asyncio.gather(*[single_flight.do("user", query) for _ in range(10)])
+    assert results == [42] * 10
+    assert executions == 1
+    assert single_flight.stats() == {"calls": 10, "executed": 1, "collapsed": 9, "in_flight": 0}
+    # Completed calls are not cached
+    await single_flight.do("user", query)
+    assert executions == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller() -> None:
+    single_flight: SingleFlight[int] = SingleFlight()
+
+    async def query() -> int:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*[single_flight.do("k", query) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others() -> None:
+    single_flight: SingleFlight[str] = SingleFlight()
+
+    async def query() -> str:
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(single_flight.do("k", query))
+    second = asyncio.ensure_future(single_flight.do("k", query))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
+
+
+@pytest.mark.asyncio
+async def test_joined_callers_get_copies() -> None:
+    single_flight: SingleFlight[list[int]] = SingleFlight(copy=list)
+
+    async def query() -> list[int]:
+        await asyncio.sleep(0.01)
+        return [1, 2]
+
+    first, second, third = await asyncio.gather(*[single_flight.do("k", query) for _ in range(3)])
+    assert first == second == third == [1, 2]
+    assert first is not second and second is not third
+    second.append(3)
+    assert first == third == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_user_reads_do_not_share_instances() -> None:
+    stored = User(email="shared@example.com", full_name="Stored")
+
+    async def find_one(*args, **kwargs) -> User:
+        await asyncio.sleep(0.01)
+        return stored
+
+    with patch.object(crud.user.engine, "find_one", side_effect=find_one) as find:
+        users = await asyncio.gather(*[crud.user.get_by_email(None, email=stored.email) for _ in range(3)])
+    find.assert_called_once()
+    assert len({id(user) for user in users}) == 3
+    users[1].full_name = "Changed by one request"
+    assert users[0].full_name == users[2].full_name == "Stored"
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import pytest
+from motor.core import AgnosticDatabase
+
+from app import crud
+from app.core import security
+from app.crud.crud_token import hash_token, token_expiry
+from app.db.token_migration import migrate_refresh_tokens
+from app.schemas.user import UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def test_token_expiry_matches_exp_claim() -> None:
+    token = security.create_refresh_token(subject="user", expires_delta=timedelta(hours=1))
+    expires = token_expiry(token)
+    assert abs((expires - datetime.utcnow()) - timedelta(hours=1)) < timedelta(seconds=5)
+    assert hash_token(token) == hash_token(token) != token
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_is_consumed_once(db: AgnosticDatabase) -> None:
+    user = await crud.user.create(db, obj_in=UserCreate(email=random_email(), password=random_lower_string()))
+    refresh_token = security.create_refresh_token(subject=user.id)
+    token_obj = await crud.token.create(db, obj_in=refresh_token, user_obj=user)
+    assert token_obj.token_hash == hash_token(refresh_token)
+    # Creating the same token again returns the stored document
+    assert (await crud.token.create(db, obj_in=refresh_token, user_obj=user)).id == token_obj.id
+    assert await crud.token.get(user=user, token=refresh_token)
+    assert await crud.token.consume(user=user, token=refresh_token)
+    assert await crud.token.consume(user=user, token=refresh_token) is None
+
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_refresh_tokens(db: AgnosticDatabase) -> None:
+    user = await crud.user.create(db, obj_in=UserCreate(email=random_email(), password=random_lower_string()))
+    refresh_token = security.create_refresh_token(subject=user.id)
+    users = db[crud.user.engine.get_collection(crud.user.model).name]
+    tokens = db[crud.token.engine.get_collection(crud.token.model).name]
+    # Legacy layout: raw token, plus its id appended to the user
+    legacy = await tokens.insert_one({"token": refresh_token, "authenticates_id": user.id})
+    await users.update_one({"_id": user.id}, {"$push": {"refresh_tokens": legacy.inserted_id}})
+
+    report = await migrate_refresh_tokens(db)
+    assert report.tokens_migrated >= 1
+    assert "refresh_tokens" not in await users.find_one({"_id": user.id})
+    assert await crud.token.consume(user=user, token=refresh_token)
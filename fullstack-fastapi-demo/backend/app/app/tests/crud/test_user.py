@@ -102,3 +102,18 @@ async def test_update_user(db: AgnosticDatabase) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(plain_password=new_password, hashed_password=user_2.hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_update_user_only_sets_changed_fields(db: AgnosticDatabase) -> None:
+    user = await crud.user.create(db, obj_in=UserCreate(email=random_email(), password=random_lower_string()))
+    # A concurrent write to another field must survive a partial update
+    await db[crud.user.engine.get_collection(crud.user.model).name].update_one(
+        {"_id": user.id}, {"$set": {"totp_counter": 42}}
+    )
+    await crud.user.update(db, db_obj=user, obj_in={"full_name": "Partial Update"})
+    stored = await db[crud.user.engine.get_collection(crud.user.model).name].find_one({"_id": user.id})
+    assert stored["full_name"] == "Partial Update"
+    assert stored["totp_counter"] == 42
+    assert stored["modified"] >= user.created
+    assert await crud.user._apply_update(user, {"full_name": "Partial Update"}) == set()
@@ -0,0 +1,140 @@
+from datetime import date, datetime
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from odmantic import AIOEngine
+from qdrant_client import AsyncQdrantClient
+
+from app.core import security
+from app.core.config import settings
+from app.db.qdrant_users import USER_COLLECTION_NAME
+from benchmarks import standins
+from benchmarks.baseline import build_results, compare_results, summarize_samples
+from benchmarks.dataset import (
+    BENCHMARK_COLLECTION_NAME,
+    DatasetSpec,
+    SyntheticUsers,
+    check_mongo_database,
+    generate_dataset,
+)
+from benchmarks.endpoints import percentile, summarize
+
+
+def test_percentile_is_nearest_rank() -> None:
+    values = [float(n) for n in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([0.2], 99) == 0.2
+    assert percentile([], 50) == 0.0
+
+
+def test_summarize() -> None:
+    report = summarize([0.003, 0.001, 0.002, 0.004], errors=1, seconds=0.5)
+    assert report["requests"] == 5
+    assert report["errors"] == 1
+    assert report["error_rate"] == 0.2
+    assert report["req_per_s"] == 8.0
+    assert report["p50_ms"] == 2.0
+    assert report["p99_ms"] == 4.0
+    assert report["mean_ms"] == 2.5
+
+
+def results(environment: dict[str, Any] | None = None, **samples: list[float]) -> dict[str, Any]:
+    return {
+        "environment": environment or {"cpu": "test", "python": "3.11"},
+        "metrics": {name: summarize_samples(values, "us") for name, values in samples.items()},
+    }
+
+
+def test_compare_flags_slowdowns_beyond_threshold_and_noise() -> None:
+    baseline = results(steady=[10.0, 10.0, 10.1], noisy=[10.0, 13.0, 7.0], faster=[10.0, 10.0, 10.0], gone=[1.0])
+    current = results(
+        {"cpu": "other", "python": "3.11"},
+        steady=[12.0, 12.1, 12.0],
+        noisy=[12.0, 12.0, 12.0],
+        faster=[5.0, 5.0, 5.0],
+        new=[1.0],
+    )
+    report = compare_results(baseline, current, threshold_pct=10, noise_factor=3)
+    status = {metric.name: metric.status for metric in report.metrics}
+    # 20% slower: past the threshold, and the samples are tight
+    assert status["steady"] == "regression"
+    # Also 20% slower, but within three MADs (30%) of the noisy baseline
+    assert status["noisy"] == "unchanged"
+    assert status["faster"] == "improvement"
+    assert [metric.name for metric in report.regressions] == ["steady"]
+    assert report.missing == ["gone"]
+    assert report.added == ["new"]
+    assert report.environment_changes == {"cpu": ["test", "other"]}
+    assert report.failed
+
+
+def test_compare_fails_on_endpoint_errors_and_missing_metrics() -> None:
+    def endpoint_report(p50_ms: float, error_rate: float) -> dict[str, Any]:
+        return {"endpoints": {"login_oauth": {"p50_ms": p50_ms, "p95_ms": p50_ms, "error_rate": error_rate}}}
+
+    baseline = build_results({}, [endpoint_report(20.0, 0.0)] * 3, {})
+    # Fast because every request now fails
+    current = build_results({}, [endpoint_report(2.0, 1.0)] * 3, {})
+    report = compare_results(baseline, current)
+    assert [metric.name for metric in report.regressions] == ["endpoint.login_oauth.error_rate"]
+    assert report.failed
+    assert not compare_results(baseline, baseline).failed
+    crashed = build_results({}, [], {})
+    report = compare_results(baseline, crashed)
+    assert not report.regressions
+    assert report.missing and report.failed
+
+
+def test_synthetic_dataset_is_deterministic() -> None:
+    spec = DatasetSpec(users=300, seed=7, anchor=date(2025, 1, 1), totp_ratio=0.5, mean_tokens_per_user=4)
+
+    def dump(generator: SyntheticUsers) -> list:
+        return [([user.model_dump_doc() for user in users], tokens) for users, tokens in generator.batches(128)]
+
+    first = dump(SyntheticUsers(spec))
+    assert first == dump(SyntheticUsers(spec))
+    assert first != dump(SyntheticUsers(DatasetSpec(users=300, seed=8, anchor=date(2025, 1, 1))))
+    assert [len(users) for users, _ in first] == [128, 128, 44]
+    users = [user for batch, _ in first for user in batch]
+    assert len({user["email"] for user in users}) == 300
+    assert [user["_id"] for user in users] == sorted(user["_id"] for user in users)
+    totp_user = next(user for user in users if user["totp_secret"] and user["totp_counter"] is None)
+    code = security.totp_factory.from_source(totp_user["totp_secret"]).generate().token
+    assert security.verify_totp(token=code, secret=totp_user["totp_secret"])
+    tokens = [token for _, batch in first for token in batch]
+    assert len({token["token_hash"] for token in tokens}) == len(tokens) > 0
+    assert all(token["expires"] > datetime(2025, 1, 1) for token in tokens)
+
+
+@pytest.mark.asyncio
+async def test_dataset_loads_points_into_the_benchmark_collection() -> None:
+    pytest.importorskip("mongomock_motor")
+    engine = AIOEngine(client=standins.mock_mongo_client(), database="benchmark")
+    qdrant = AsyncQdrantClient(location=":memory:")
+    spec = DatasetSpec(users=50, seed=3, anchor=date(2025, 1, 1))
+    with patch("benchmarks.dataset.get_engine", return_value=engine), patch(
+        "benchmarks.dataset.get_qdrant_client", return_value=qdrant
+    ), patch("app.db.qdrant_users.get_qdrant_client", return_value=qdrant), patch(
+        "benchmarks.dataset.apply_indexes", AsyncMock()
+    ):
+        stats = await generate_dataset(spec, batch_size=20)
+        with pytest.raises(ValueError):
+            await generate_dataset(spec, qdrant_collection=USER_COLLECTION_NAME)
+    assert stats.users == 50
+    assert stats.points == 50 - stats.point_id_collisions
+    assert (await qdrant.count(BENCHMARK_COLLECTION_NAME, exact=True)).count == stats.points
+    assert not await qdrant.collection_exists(USER_COLLECTION_NAME)
+
+
+def test_dataset_refuses_the_app_database(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "MONGO_DATABASE", "app")
+    with pytest.raises(ValueError):
+        check_mongo_database("app")
+    check_mongo_database("app", allow_app_database=True)
+    check_mongo_database(standins.BENCHMARK_DATABASE)
+    # The benchmark settings name the benchmark database as MONGO_DATABASE
+    monkeypatch.setattr(settings, "MONGO_DATABASE", standins.BENCHMARK_DATABASE)
+    check_mongo_database(standins.BENCHMARK_DATABASE)
@@ -0,0 +1,93 @@
+from typing import Generator
+from unittest.mock import patch
+
+import pytest
+from emails.backend.response import SMTPResponse
+
+from app.utilities import email_queue
+
+
+class FakeSMTP:
+    opened = 0
+
+    def __init__(self):
+        FakeSMTP.opened += 1
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+@pytest.fixture
+def dispatcher() -> Generator:
+    email_queue.shutdown_email_dispatcher()
+    FakeSMTP.opened = 0
+    dispatcher = email_queue.get_email_dispatcher()
+    dispatcher.backend_factory = FakeSMTP
+    yield dispatcher
+    email_queue.shutdown_email_dispatcher(timeout=5)
+
+
+def test_queue_reuses_connections(dispatcher) -> None:
+    delivered = []
+    dispatcher.deliver = lambda job, smtp: delivered.append((job.email_to, smtp))
+    for n in range(50):
+        assert dispatcher.enqueue(email_queue.EmailJob(email_to=f"user{n}@example.com"))
+    assert dispatcher.flush(timeout=5)
+    assert len(delivered) == 50
+    # One persistent connection per worker at most, never one per message
+    assert len({id(smtp) for _, smtp in delivered}) <= dispatcher.stats.workers
+    stats = email_queue.get_email_queue_stats()
+    assert stats["sent"] == 50
+    assert stats["queue_depth"] == 0
+
+
+def test_failed_delivery_drops_connection(dispatcher) -> None:
+    def deliver(job: email_queue.EmailJob, smtp: FakeSMTP) -> None:
+        if job.email_to.startswith("bad"):
+            raise ConnectionError("server went away")
+
+    dispatcher.deliver = deliver
+    dispatcher.stats.workers = 1
+    for email in ["bad@example.com", "good@example.com"]:
+        dispatcher.enqueue(email_queue.EmailJob(email_to=email))
+    assert dispatcher.flush(timeout=5)
+    stats = email_queue.get_email_queue_stats()
+    assert stats["failed"] == 1
+    assert stats["sent"] == 1
+    # The good message went out over a fresh connection
+    assert FakeSMTP.opened == 2
+
+
+def smtp_response(code: int, refused: dict | None = None) -> SMTPResponse:
+    response = SMTPResponse()
+    response.set_status("data" if code == 250 else "rcpt", code, b"status")
+    response.refused_recipients = refused or {}
+    response._finished = code == 250
+    return response
+
+
+def test_deliver_email_raises_on_refused_message() -> None:
+    job = email_queue.EmailJob(email_to="refused@example.com", template_name="magic_login.html")
+    with patch.object(email_queue, "get_email_templates"), patch.object(email_queue.emails, "Message") as message:
+        message.return_value.send.return_value = smtp_response(250)
+        assert email_queue.deliver_email(job, FakeSMTP()).success
+        message.return_value.send.return_value = smtp_response(550, {"refused@example.com": (550, b"no such user")})
+        with pytest.raises(email_queue.EmailDeliveryError, match="550"):
+            email_queue.deliver_email(job, FakeSMTP())
+
+
+def test_refused_message_counts_as_failed(dispatcher) -> None:
+    responses = iter([smtp_response(550), smtp_response(250)])
+    dispatcher.stats.workers = 1
+    with patch.object(email_queue, "get_email_templates"), patch.object(email_queue.emails, "Message") as message:
+        message.return_value.send.side_effect = lambda **kwargs: next(responses)
+        dispatcher.deliver = email_queue.deliver_email
+        for email in ["refused@example.com", "good@example.com"]:
+            dispatcher.enqueue(email_queue.EmailJob(email_to=email))
+        assert dispatcher.flush(timeout=5)
+    stats = email_queue.get_email_queue_stats()
+    assert stats["failed"] == 1
+    assert stats["sent"] == 1
+    # The connection is dropped after the refusal
+    assert FakeSMTP.opened == 2
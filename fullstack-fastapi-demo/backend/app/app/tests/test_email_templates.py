@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from app.core.config import settings
+from app.utilities.email_templates import get_email_templates, reset_email_templates
+
+
+@pytest.fixture
+def templates_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Generator:
+    (tmp_path / "hello.html").write_text("<p>Hello {{ name }}</p>")
+    monkeypatch.setattr(settings, "EMAIL_TEMPLATES_DIR", str(tmp_path))
+    reset_email_templates()
+    yield tmp_path
+    reset_email_templates()
+
+
+def test_templates_are_compiled_once(templates_dir: Path) -> None:
+    registry = get_email_templates()
+    assert registry.load_all() == 1
+    template = registry.get("hello.html")
+    assert registry.get("hello.html") is template
+    assert template.render(name="Ada") == "<p>Hello Ada</p>"
+    # Without auto reload, later edits on disk are not picked up
+    (templates_dir / "hello.html").write_text("<p>Bye {{ name }}</p>")
+    assert registry.get("hello.html") is template
+
+
+def test_templates_reload_on_mtime_change(templates_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "EMAIL_TEMPLATES_AUTO_RELOAD", True)
+    registry = get_email_templates()
+    template = registry.get("hello.html")
+    assert registry.get("hello.html") is template
+    path = templates_dir / "hello.html"
+    path.write_text("<p>Bye {{ name }}</p>")
+    stat = path.stat()
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+    assert registry.get("hello.html").render(name="Ada") == "<p>Bye Ada</p>"
+
+
+def test_shipped_templates_compile() -> None:
+    build = Path(__file__).resolve().parent.parent / "email-templates" / "build"
+    reset_email_templates()
+    registry = get_email_templates()
+    registry.directory = build
+    assert registry.load_all() == len(list(build.glob("*.html")))
+    reset_email_templates()
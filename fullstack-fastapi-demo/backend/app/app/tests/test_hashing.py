@@ -0,0 +1,27 @@
+import asyncio
+
+import pytest
+
+from app.core import security
+from app.core.hashing import get_hashing_stats
+
+
+@pytest.mark.asyncio
+async def test_async_hash_round_trip() -> None:
+    hashed = await security.get_password_hash_async("correct horse battery staple")
+    assert hashed.startswith("$argon2")
+    assert await security.verify_password_async(plain_password="correct horse battery staple", hashed_password=hashed)
+    assert not await security.verify_password_async(plain_password="wrong password", hashed_password=hashed)
+    # Hashes from the pool are interchangeable with the synchronous helpers
+    assert security.verify_password(plain_password="correct horse battery staple", hashed_password=hashed)
+
+
+@pytest.mark.asyncio
+async def test_hashing_stats_track_concurrent_jobs() -> None:
+    before = get_hashing_stats()
+    await asyncio.gather(*[security.get_password_hash_async(f"password-{i}") for i in range(6)])
+    after = get_hashing_stats()
+    assert after["completed"] - before["completed"] == 6
+    assert after["in_flight"] == 0
+    assert after["queue_depth"] == 0
+    assert after["max_wait_seconds"] >= 0
@@ -0,0 +1,18 @@
+from pymongo import ASCENDING
+
+from app.db.indexes import IndexSpec, registered_indexes
+from app.models import User
+
+
+def test_email_index_is_registered_unique() -> None:
+    specs = {spec.name: spec for spec in registered_indexes()}
+    assert specs["user_email_unique"].unique
+    assert specs["user_email_unique"].keys == (("email", ASCENDING),)
+
+
+def test_index_spec_detects_option_drift() -> None:
+    spec = IndexSpec(User, (("email", ASCENDING),), name="user_email_unique", unique=True)
+    assert spec.options() == {"name": "user_email_unique", "unique": True}
+    assert spec.matches({"key": [("email", 1)], "unique": True})
+    assert not spec.matches({"key": [("email", 1)]})
+    assert not spec.matches({"key": [("email", -1)], "unique": True})
@@ -0,0 +1,99 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from qdrant_client import AsyncQdrantClient
+
+from app.api import metrics
+from app.core.config import settings
+from app.core.metrics import (
+    HTTP_REQUEST_SECONDS,
+    MONGO_COMMAND_SECONDS,
+    QDRANT_CALL_SECONDS,
+    Histogram,
+    InstrumentedQdrantClient,
+    MetricsMiddleware,
+    MongoCommandMetrics,
+)
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    histogram = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+    for value in [0.05, 0.5, 0.5, 5.0]:
+        histogram.observe(("/a",), value)
+    lines = histogram.render()
+    assert '# TYPE test_seconds histogram' in lines
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/a"} 4' in lines
+    assert 'test_seconds_sum{route="/a"} 6.05' in lines
+
+
+def test_middleware_labels_by_route_template() -> None:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: int) -> dict:
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+    for item_id in range(3):
+        assert client.get(f"/items/{item_id}").status_code == 200
+    assert client.get("/items/not-a-number").status_code == 422
+    assert client.get("/missing").status_code == 404
+    counts, _ = HTTP_REQUEST_SECONDS.series[("GET", "/items/{item_id}", "200")]
+    assert sum(counts) >= 3
+    assert ("GET", "/items/{item_id}", "422") in HTTP_REQUEST_SECONDS.series
+    assert ("GET", "<unmatched>", "404") in HTTP_REQUEST_SECONDS.series
+
+
+def test_mongo_listener_records_command_latency() -> None:
+    listener = MongoCommandMetrics()
+    listener.succeeded(SimpleNamespace(command_name="find", duration_micros=1500))
+    listener.failed(SimpleNamespace(command_name="insert", duration_micros=200))
+    assert ("find", "success") in MONGO_COMMAND_SECONDS.series
+    assert ("insert", "failure") in MONGO_COMMAND_SECONDS.series
+
+
+@pytest.mark.asyncio
+async def test_qdrant_client_calls_are_timed() -> None:
+    client = InstrumentedQdrantClient(AsyncQdrantClient(location=":memory:"))
+    await client.get_collections()
+    assert client.get_collections is client.get_collections
+    assert ("get_collections", "success") in QDRANT_CALL_SECONDS.series
+    with pytest.raises(Exception):
+        await client.get_collection("missing")
+    assert ("get_collection", "failure") in QDRANT_CALL_SECONDS.series
+
+
+def test_metrics_token_is_required_when_configured(monkeypatch) -> None:
+    app = FastAPI()
+    app.include_router(metrics.router)
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "QDRANT_SYNC_MODE", "outbox")
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+    metrics.reset_outbox_backlog_cache()
+    with patch.object(metrics, "get_outbox_backlog", AsyncMock(return_value={"pending": 0})):
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        r = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert r.status_code == 200
+    assert "app_user_cache" in r.text
+
+
+@pytest.mark.asyncio
+async def test_outbox_backlog_is_cached_between_scrapes(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "METRICS_OUTBOX_CACHE_SECONDS", 60.0)
+    metrics.reset_outbox_backlog_cache()
+    backlog = AsyncMock(return_value={"pending": 3, "retrying": 1, "oldest_age_seconds": 5.0})
+    with patch.object(metrics, "get_outbox_backlog", backlog):
+        assert await metrics.get_cached_outbox_backlog() == await metrics.get_cached_outbox_backlog()
+        assert backlog.await_count == 1
+        monkeypatch.setattr(settings, "METRICS_OUTBOX_CACHE_SECONDS", 0.0)
+        await metrics.get_cached_outbox_backlog()
+        assert backlog.await_count == 2
+    metrics.reset_outbox_backlog_cache()
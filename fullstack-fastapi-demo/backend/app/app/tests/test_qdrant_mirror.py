@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import Timestamp
+from odmantic import ObjectId
+
+from app.db import qdrant_mirror
+from app.db.qdrant_mirror import UserChangeStreamMirror, classify_change
+from app.db.qdrant_resync import SYNC_STATE_COLLECTION
+from app.db.qdrant_users import SYNC_PAYLOAD, SYNC_UPSERT
+
+
+def _update(user_id: ObjectId, *fields: str, token: str = "t") -> dict:
+    return {
+        "_id": {"_data": token},
+        "operationType": "update",
+        "clusterTime": Timestamp(1_700_000_000, 1),
+        "documentKey": {"_id": user_id},
+        "updateDescription": {"updatedFields": {field: None for field in fields}, "removedFields": []},
+    }
+
+
+class FakeChangeStream:
+    def __init__(self, events: list[dict], on_idle):
+        self.events = list(events)
+        self.on_idle = on_idle
+        self.resume_token = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def try_next(self):
+        if not self.events:
+            self.on_idle()
+            return None
+        event = self.events.pop(0)
+        self.resume_token = event["_id"]
+        return event
+
+
+def _mirror(events: list[dict], stored_token: dict | None = None) -> tuple[UserChangeStreamMirror, MagicMock]:
+    users = MagicMock()
+    state = MagicMock()
+    state.find_one = AsyncMock(return_value={"resume_token": stored_token} if stored_token else None)
+    state.update_one = AsyncMock()
+    db = MagicMock()
+    db.__getitem__.side_effect = lambda name: state if name == SYNC_STATE_COLLECTION else users
+    with patch.object(qdrant_mirror, "get_engine", return_value=MagicMock()):
+        mirror = UserChangeStreamMirror(db, batch_size=100, coalesce_seconds=60)
+    users.watch = MagicMock(return_value=FakeChangeStream(events, mirror.stop))
+    return mirror, state
+
+
+def test_classify_change() -> None:
+    user_id = ObjectId()
+    assert classify_change({"operationType": "insert", "documentKey": {"_id": user_id}}) == (user_id, SYNC_UPSERT)
+    assert classify_change({"operationType": "delete", "documentKey": {"_id": user_id}}) == (user_id, SYNC_UPSERT)
+    assert classify_change(_update(user_id, "email", "email_validated")) == (user_id, SYNC_UPSERT)
+    assert classify_change(_update(user_id, "is_active", "modified")) == (user_id, SYNC_PAYLOAD)
+    assert classify_change(_update(user_id, "totp_counter", "modified")) is None
+
+
+@pytest.mark.asyncio
+async def test_mirror_coalesces_and_persists_resume_token() -> None:
+    renamed, toggled, deleted = ObjectId(), ObjectId(), ObjectId()
+    events = [
+        _update(renamed, "is_active", token="1"),
+        _update(renamed, "totp_counter", token="2"),
+        _update(toggled, "email_validated", token="3"),
+        _update(renamed, "full_name", token="4"),
+        {"_id": {"_data": "5"}, "operationType": "delete", "documentKey": {"_id": deleted}},
+    ]
+    mirror, state = _mirror(events, stored_token={"_data": "0"})
+    with patch.object(qdrant_mirror, "apply_user_changes", new=AsyncMock()) as apply:
+        await mirror.run()
+
+    # Resumed from the stored token, and one Qdrant batch for everything that happened in the window
+    assert mirror.collection.watch.call_args.kwargs["resume_after"] == {"_data": "0"}
+    apply.assert_awaited_once()
+    assert apply.call_args.args[1] == {renamed: SYNC_UPSERT, toggled: SYNC_PAYLOAD, deleted: SYNC_UPSERT}
+    assert mirror.stats()["events"] == 5 and mirror.skipped == 1 and mirror.coalesced == 1
+    assert mirror.lag_seconds > 0
+    saved = state.update_one.call_args.args[1]["$set"]
+    assert saved["resume_token"] == {"_data": "5"}
+    assert saved["stats"]["applied"] == 3
+
+
+@pytest.mark.asyncio
+async def test_mirror_retries_before_advancing_token() -> None:
+    user_id = ObjectId()
+    mirror, state = _mirror([_update(user_id, "is_superuser", token="1")])
+    mirror.coalesce_seconds = 0
+    mirror.collection.watch.return_value.on_idle = lambda: None
+    outcomes = iter([RuntimeError("down"), None])
+
+    async def apply(engine, changes):
+        outcome = next(outcomes)
+        if outcome:
+            # Nothing may be persisted while Qdrant rejects the batch
+            state.update_one.assert_not_awaited()
+            raise outcome
+        mirror.stop()
+
+    with patch.object(qdrant_mirror, "apply_user_changes", new=apply), patch.object(
+        qdrant_mirror, "retry_delay", return_value=timedelta(0)
+    ):
+        await mirror.run()
+    assert mirror.failed == 1 and mirror.applied == 1
+    state.update_one.assert_awaited_once()
+    assert state.update_one.call_args.args[1]["$set"]["resume_token"] == {"_data": "1"}
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from odmantic import ObjectId
+
+from app.core.config import settings
+from app.db import qdrant_outbox
+from app.db.qdrant_outbox import QdrantSyncDispatcher, retry_delay
+from app.db.qdrant_users import user_point_id
+from app.models.user import User
+
+
+def test_retry_delay_is_exponential_and_capped() -> None:
+    assert retry_delay(1) == timedelta(seconds=settings.QDRANT_OUTBOX_BASE_BACKOFF_SECONDS)
+    assert retry_delay(2) == timedelta(seconds=settings.QDRANT_OUTBOX_BASE_BACKOFF_SECONDS * 2)
+    assert retry_delay(100) == timedelta(seconds=settings.QDRANT_OUTBOX_MAX_BACKOFF_SECONDS)
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_batches_upserts_and_deletes() -> None:
+    existing = User(email="outbox@example.com", full_name="Outbox")
+    missing_id = ObjectId()
+    events = [
+        {"_id": ObjectId(), "user_id": existing.id},
+        {"_id": ObjectId(), "user_id": existing.id},
+        {"_id": ObjectId(), "user_id": missing_id},
+    ]
+    engine = MagicMock()
+    engine.find = AsyncMock(return_value=[existing])
+    with patch.object(qdrant_outbox, "get_engine", return_value=engine), patch.object(
+        qdrant_outbox, "upsert_user_points", new=AsyncMock()
+    ) as upsert, patch.object(qdrant_outbox, "delete_user_points", new=AsyncMock()) as delete:
+        dispatcher = QdrantSyncDispatcher()
+        await dispatcher._apply(events)
+
+    # Duplicate events for the same user collapse into one point, all in a single upsert call
+    upsert.assert_awaited_once()
+    points = upsert.call_args.args[0]
+    assert [point.id for point in points] == [user_point_id(str(existing.id))]
+    delete.assert_awaited_once_with([user_point_id(str(missing_id))])
+
+
+@pytest.mark.asyncio
+async def test_dispatcher_sets_payload_for_payload_only_events() -> None:
+    renamed = User(email="renamed@example.com", full_name="Renamed")
+    toggled = User(email="toggled@example.com", is_active=False)
+    events = [
+        {"_id": ObjectId(), "user_id": renamed.id, "op": "payload"},
+        {"_id": ObjectId(), "user_id": renamed.id, "op": "upsert"},
+        {"_id": ObjectId(), "user_id": toggled.id, "op": "payload"},
+    ]
+    engine = MagicMock()
+    engine.find = AsyncMock(return_value=[renamed, toggled])
+    with patch.object(qdrant_outbox, "get_engine", return_value=engine), patch.object(
+        qdrant_outbox, "upsert_user_points", new=AsyncMock()
+    ) as upsert, patch.object(qdrant_outbox, "set_user_payloads", new=AsyncMock()) as set_payloads, patch.object(
+        qdrant_outbox, "delete_user_points", new=AsyncMock()
+    ):
+        await QdrantSyncDispatcher()._apply(events)
+        # Any full upsert for a user wins over its payload-only events
+        assert [point.id for point in upsert.call_args.args[0]] == [user_point_id(str(renamed.id))]
+        set_payloads.assert_awaited_once_with([toggled])
+
+        # A payload update that Qdrant rejects (point not there yet) falls back to an upsert
+        upsert.reset_mock()
+        engine.find.return_value = [toggled]
+        set_payloads.side_effect = KeyError("missing point")
+        await QdrantSyncDispatcher()._apply(events[2:])
+        assert [[point.id for point in call.args[0]] for call in upsert.await_args_list] == [
+            [],
+            [user_point_id(str(toggled.id))],
+        ]
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+
+from app.db import qdrant_reconcile, qdrant_users
+from app.db.qdrant_reconcile import UserReconciler
+from app.db.qdrant_users import SYNC_UPSERT, build_user_payload, build_user_points
+from app.models.user import User
+
+
+async def _qdrant(users: list[User]) -> AsyncQdrantClient:
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    await client.upsert(collection_name=qdrant_users.USER_COLLECTION_NAME, points=build_user_points(users))
+    return client
+
+
+def test_checksum_ignores_modified() -> None:
+    user = User(email="checksum@example.com", full_name="Checksum")
+    before = build_user_payload(user)["checksum"]
+    user.modified = user.modified + timedelta(hours=1)
+    assert build_user_payload(user)["checksum"] == before
+    user.is_active = not user.is_active
+    assert build_user_payload(user)["checksum"] != before
+
+
+@pytest.mark.asyncio
+async def test_reconcile_fixes_only_changed_users_and_orphans() -> None:
+    watermark = datetime(2024, 1, 1, 12, 0, 0)
+    in_sync = User(email="insync@example.com", modified=watermark)
+    stale = User(email="stale@example.com", modified=watermark + timedelta(seconds=5))
+    unsynced = User(email="unsynced@example.com", modified=watermark + timedelta(seconds=9))
+    deleted = User(email="deleted@example.com")
+    client = await _qdrant([in_sync, stale, deleted])
+    # Mongo moved on after the point was written
+    stale.is_superuser = True
+
+    streamed_since = []
+
+    async def stream(db, *, since=None, batch_size=500):
+        streamed_since.append(since)
+        yield [in_sync, stale]
+        yield [unsynced]
+
+    saved = []
+
+    async def save(db, modified, key=qdrant_reconcile.RECONCILE_WATERMARK_KEY):
+        saved.append(modified)
+
+    engine = MagicMock()
+    live = [{"_id": user.id} for user in (in_sync, stale, unsynced)]
+    engine.get_collection.return_value.find.return_value.to_list = AsyncMock(return_value=live)
+    with patch.object(qdrant_reconcile, "get_engine", return_value=engine), patch.object(
+        qdrant_reconcile, "get_qdrant_client", return_value=client
+    ), patch.object(qdrant_users, "get_qdrant_client", return_value=client), patch.object(
+        qdrant_reconcile, "stream_changed_users", stream
+    ), patch.object(
+        qdrant_reconcile, "load_watermark", AsyncMock(return_value=watermark)
+    ), patch.object(
+        qdrant_reconcile, "save_watermark", save
+    ), patch.object(
+        qdrant_reconcile, "apply_user_changes", AsyncMock()
+    ) as apply:
+        report = await UserReconciler(db=None, batch_size=2, overlap_seconds=60).run()
+
+    assert streamed_since == [watermark - timedelta(seconds=60)]
+    assert report.checked == 3 and report.missing == 1 and report.mismatched == 1 and report.fixed == 2
+    assert [call.args[1] for call in apply.await_args_list] == [{stale.id: SYNC_UPSERT}, {unsynced.id: SYNC_UPSERT}]
+    assert saved == [unsynced.modified]
+    # Only the point of the user missing from Mongo is deleted
+    assert report.points_scanned == 3 and report.orphans_deleted == 1
+    remaining = await client.retrieve(
+        qdrant_users.USER_COLLECTION_NAME, ids=[qdrant_users.user_point_id(str(deleted.id))]
+    )
+    assert remaining == []
+    assert report.as_dict()["watermark"] == unsynced.modified.isoformat()
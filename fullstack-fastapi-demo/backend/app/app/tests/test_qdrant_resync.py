@@ -0,0 +1,67 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.db import qdrant_resync
+from app.db.qdrant_resync import UserResyncEngine
+from app.models.user import User
+
+
+def _batches(count: int, size: int) -> list[list[User]]:
+    return [[User(email=f"user{b}-{i}@example.com") for i in range(size)] for b in range(count)]
+
+
+@pytest.mark.asyncio
+async def test_resync_checkpoint_stops_at_first_failed_batch() -> None:
+    batches = _batches(3, 2)
+
+    async def stream(db, *, after=None, batch_size=500):
+        for batch in batches:
+            yield batch
+
+    async def upsert(points):
+        if points[0].payload["email"].startswith("user1-"):
+            raise RuntimeError("qdrant unavailable")
+
+    saved = []
+
+    async def save(db, last_id, key=qdrant_resync.RESYNC_CHECKPOINT_KEY):
+        saved.append(last_id)
+
+    with patch.object(qdrant_resync, "stream_user_batches", stream), patch.object(
+        qdrant_resync, "upsert_user_points", upsert
+    ), patch.object(qdrant_resync, "load_checkpoint", AsyncMock(return_value=None)), patch.object(
+        qdrant_resync, "save_checkpoint", save
+    ):
+        report = await UserResyncEngine(db=None, batch_size=2, concurrency=2).run()
+
+    assert report.synced == 4
+    assert report.failed == 2
+    # The third batch succeeded, but the checkpoint must not skip past the failed second batch
+    assert saved == [batches[0][-1].id]
+    assert report.checkpoint == batches[0][-1].id
+
+
+@pytest.mark.asyncio
+async def test_resync_clean_pass_resets_checkpoint() -> None:
+    batches = _batches(2, 3)
+
+    async def stream(db, *, after=None, batch_size=500):
+        for batch in batches:
+            yield batch
+
+    saved = []
+
+    async def save(db, last_id, key=qdrant_resync.RESYNC_CHECKPOINT_KEY):
+        saved.append(last_id)
+
+    with patch.object(qdrant_resync, "stream_user_batches", stream), patch.object(
+        qdrant_resync, "upsert_user_points", AsyncMock()
+    ), patch.object(qdrant_resync, "load_checkpoint", AsyncMock(return_value=None)), patch.object(
+        qdrant_resync, "save_checkpoint", save
+    ):
+        report = await UserResyncEngine(db=None, batch_size=3, concurrency=4).run()
+
+    assert report.synced == 6
+    assert [batch.index for batch in report.batches] == [0, 1]
+    assert saved == [batches[0][-1].id, batches[1][-1].id, None]
@@ -0,0 +1,268 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from app.db import qdrant_users
+from app.db.qdrant_users import build_user_point, reset_users_collection_state, upsert_user_points
+from app.models.user import User
+
+
+def _mock_client(existing: list[str]) -> AsyncMock:
+    client = AsyncMock()
+    collections = []
+    for name in existing:
+        collection = MagicMock()
+        collection.name = name
+        collections.append(collection)
+    response = MagicMock()
+    response.collections = collections
+    client.get_collections.return_value = response
+    return client
+
+
+@pytest.mark.asyncio
+async def test_collection_bootstrap_runs_once_per_process() -> None:
+    reset_users_collection_state()
+    client = _mock_client([qdrant_users.USER_COLLECTION_NAME])
+    point = build_user_point(User(email="ready@example.com"))
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        await upsert_user_points([point])
+        await upsert_user_points([point])
+    client.get_collections.assert_awaited_once()
+    assert client.upsert.await_count == 2
+
+
+def test_collection_bootstrap_works_across_event_loops() -> None:
+    # Worker processes and tests run separate event loops; the bootstrap lock must not stay bound to the first one
+    point = build_user_point(User(email="loops@example.com"))
+
+    async def bootstrap_concurrently() -> None:
+        reset_users_collection_state()
+        client = _mock_client([qdrant_users.USER_COLLECTION_NAME])
+        collections = client.get_collections.return_value
+
+        async def slow_get_collections() -> MagicMock:
+            await asyncio.sleep(0.01)
+            return collections
+
+        client.get_collections.side_effect = slow_get_collections
+        with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+            await asyncio.gather(*[upsert_user_points([point]) for _ in range(3)])
+        client.get_collections.assert_awaited_once()
+
+    asyncio.run(bootstrap_concurrently())
+    asyncio.run(bootstrap_concurrently())
+    reset_users_collection_state()
+
+
+@pytest.mark.asyncio
+async def test_missing_collection_resets_ready_state() -> None:
+    reset_users_collection_state()
+    client = _mock_client([qdrant_users.USER_COLLECTION_NAME])
+    missing = UnexpectedResponse(404, "Not Found", b"", httpx.Headers())
+    client.upsert.side_effect = [None, missing, None]
+    point = build_user_point(User(email="gone@example.com"))
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        await upsert_user_points([point])
+        await upsert_user_points([point])
+    # Bootstrapped at first write, then again after Qdrant reported the collection missing
+    assert client.get_collections.await_count == 2
+    assert client.upsert.await_count == 3
+
+
+def test_user_vectors_fill_every_dimension() -> None:
+    users = [User(email=f"vector{i}@example.com", full_name=f"Vector {i}") for i in range(8)]
+    vectors = qdrant_users.generate_user_vectors(users)
+    assert vectors.shape == (8, qdrant_users.USER_VECTOR_SIZE)
+    assert vectors.min() >= 0.0 and vectors.max() <= 1.0
+    # No zero padding: the tail of the vector is as populated as the head
+    assert (vectors[:, 32:] != 0).mean() > 0.9
+    # The batch generator and the single-user helper agree and are deterministic
+    assert qdrant_users.generate_user_vector(users[3]) == vectors[3].tolist()
+    assert qdrant_users.generate_user_vectors(users).tolist() == vectors.tolist()
+
+
+def test_user_points_carry_vector_version() -> None:
+    point = build_user_point(User(email="layout@example.com"))
+    assert point.payload["vector_version"] == qdrant_users.USER_VECTOR_VERSION
+    assert len(point.vector) == qdrant_users.USER_VECTOR_SIZE
+
+
+@pytest.mark.asyncio
+async def test_migrate_user_vectors_rewrites_old_layout() -> None:
+    from qdrant_client import AsyncQdrantClient, models
+
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    user = User(email="legacy@example.com", full_name="Legacy")
+    legacy_payload = qdrant_users.build_user_payload(user)
+    del legacy_payload["vector_version"]
+    legacy_vector = [0.5] * 32 + [0.0] * (qdrant_users.USER_VECTOR_SIZE - 32)
+    point_id = qdrant_users.user_point_id(str(user.id))
+    await client.upsert(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        points=[models.PointStruct(id=point_id, vector=legacy_vector, payload=legacy_payload)],
+    )
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        assert await qdrant_users.migrate_user_vectors(batch_size=10) == 1
+        assert await qdrant_users.migrate_user_vectors(batch_size=10) == 0
+    [point] = await client.retrieve(qdrant_users.USER_COLLECTION_NAME, ids=[point_id], with_vectors=True)
+    assert point.payload["vector_version"] == qdrant_users.USER_VECTOR_VERSION
+    expected = build_user_point(user).vector
+    # Cosine collections store normalised vectors, so compare directions
+    norm = sum(v * v for v in expected) ** 0.5
+    assert point.vector == pytest.approx([v / norm for v in expected], abs=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_payload_indexes_created_only_when_missing() -> None:
+    client = AsyncMock()
+    client.get_collection.return_value = MagicMock(payload_schema={"email": MagicMock(), "vector_version": MagicMock()})
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        created = await qdrant_users.ensure_user_payload_indexes()
+    assert created == ["is_active", "is_superuser", "email_validated"]
+    assert [call.kwargs["field_name"] for call in client.create_payload_index.await_args_list] == created
+
+
+@pytest.mark.asyncio
+async def test_filtered_count_and_pages() -> None:
+    from qdrant_client import AsyncQdrantClient, models
+
+    from app.schemas import UserSearchFilter
+
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    users = [User(email=f"search{i}@example.com", is_active=i % 3 != 0, email_validated=i % 2 == 0) for i in range(12)]
+    await client.upsert(collection_name=qdrant_users.USER_COLLECTION_NAME, points=qdrant_users.build_user_points(users))
+
+    assert qdrant_users.build_user_filter(UserSearchFilter()) is None
+    active = qdrant_users.build_user_filter(UserSearchFilter(is_active=True))
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        assert await qdrant_users.count_users_in_qdrant() == 12
+        assert await qdrant_users.count_users_in_qdrant(active) == 8
+        both = qdrant_users.build_user_filter(UserSearchFilter(is_active=True, email_validated=True))
+        assert await qdrant_users.count_users_in_qdrant(both) == 4
+        by_email = qdrant_users.build_user_filter(UserSearchFilter(email="search4@example.com"))
+        assert [p["email"] for p in await qdrant_users.search_users_in_qdrant(query_filter=by_email)] == [
+            "search4@example.com"
+        ]
+        seen, offset = [], None
+        while True:
+            page, offset = await qdrant_users.scroll_users_page(active, limit=3, offset=offset)
+            seen.extend(payload["email"] for payload in page)
+            if offset is None:
+                break
+    assert sorted(seen) == sorted(user.email for user in users if user.is_active)
+
+
+@pytest.mark.asyncio
+async def test_scroll_points_follows_pages_and_prefetches() -> None:
+    import asyncio
+
+    from qdrant_client import AsyncQdrantClient, models
+
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    users = [User(email=f"page{i}@example.com") for i in range(25)]
+    await client.upsert(collection_name=qdrant_users.USER_COLLECTION_NAME, points=qdrant_users.build_user_points(users))
+    scroll = AsyncMock(side_effect=client.scroll)
+    client.scroll = scroll
+
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        stream = qdrant_users.scroll_points(page_size=4, with_payload=["email"])
+        first = await stream.__anext__()
+        await asyncio.sleep(0)
+        # The second page was requested before the caller finished the first
+        assert scroll.await_count == 2
+        rest = [point async for point in stream]
+        points = [first, *rest]
+        assert sorted(point.payload["email"] for point in points) == sorted(user.email for user in users)
+        assert set(points[0].payload) == {"email"} and points[0].vector is None
+        assert scroll.await_count == 7
+
+        limited = [point async for point in qdrant_users.scroll_points(page_size=4, limit=6, with_vectors=True)]
+        assert len(limited) == 6 and len(limited[0].vector) == qdrant_users.USER_VECTOR_SIZE
+        # Stopping early cancels the prefetch instead of leaking it
+        stream = qdrant_users.scroll_points(page_size=4)
+        await stream.__anext__()
+        await stream.aclose()
+        assert len(await qdrant_users.search_users_in_qdrant(limit=20)) == 20
+
+
+def test_user_sync_op_depends_on_changed_fields() -> None:
+    assert qdrant_users.user_sync_op({"email", "email_validated"}) == qdrant_users.SYNC_UPSERT
+    assert qdrant_users.user_sync_op({"full_name"}) == qdrant_users.SYNC_UPSERT
+    assert qdrant_users.user_sync_op({"is_active"}) == qdrant_users.SYNC_PAYLOAD
+    assert qdrant_users.user_sync_op({"totp_counter"}) is None
+    assert qdrant_users.user_sync_op({"hashed_password", "modified"}) is None
+
+
+@pytest.mark.asyncio
+async def test_payload_only_update_keeps_vector() -> None:
+    from qdrant_client import AsyncQdrantClient, models
+
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    user = User(email="partial@example.com", full_name="Partial")
+    point_id = qdrant_users.user_point_id(str(user.id))
+    reset_users_collection_state()
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        # Not in Qdrant yet: the payload update falls back to an upsert
+        user.is_active = False
+        assert await qdrant_users.update_user_in_qdrant(user, {"is_active"})
+        [before] = await client.retrieve(qdrant_users.USER_COLLECTION_NAME, ids=[point_id], with_vectors=True)
+        assert before.payload["is_active"] is False
+
+        client.upsert = AsyncMock(side_effect=client.upsert)
+        user.is_superuser = True
+        assert await qdrant_users.update_user_in_qdrant(user, {"is_superuser", "modified"})
+        assert await qdrant_users.update_user_in_qdrant(user, {"totp_counter"})
+        client.upsert.assert_not_awaited()
+    [after] = await client.retrieve(qdrant_users.USER_COLLECTION_NAME, ids=[point_id], with_vectors=True)
+    assert after.payload["is_superuser"] is True
+    assert after.vector == before.vector
+
+
+@pytest.mark.asyncio
+async def test_payload_only_update_keeps_old_vector_version() -> None:
+    from qdrant_client import AsyncQdrantClient, models
+
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        vectors_config=models.VectorParams(size=qdrant_users.USER_VECTOR_SIZE, distance=models.Distance.COSINE),
+    )
+    user = User(email="v1@example.com", full_name="Version One")
+    point_id = qdrant_users.user_point_id(str(user.id))
+    v1_payload = {**qdrant_users.build_user_payload(user), "vector_version": 1}
+    await client.upsert(
+        collection_name=qdrant_users.USER_COLLECTION_NAME,
+        points=[models.PointStruct(id=point_id, vector=[0.5] * qdrant_users.USER_VECTOR_SIZE, payload=v1_payload)],
+    )
+    reset_users_collection_state()
+    with patch("app.db.qdrant_users.get_qdrant_client", return_value=client):
+        user.is_active = False
+        await qdrant_users.set_user_payloads([user])
+        [point] = await client.retrieve(qdrant_users.USER_COLLECTION_NAME, ids=[point_id])
+        assert point.payload["is_active"] is False
+        assert point.payload["vector_version"] == 1
+        # The checksum still matches the Mongo state, and the point is still up for migration
+        assert point.payload["checksum"] == qdrant_users.build_user_payload(user)["checksum"]
+        assert await qdrant_users.migrate_user_vectors(batch_size=10) == 1
+    [point] = await client.retrieve(qdrant_users.USER_COLLECTION_NAME, ids=[point_id])
+    assert point.payload["vector_version"] == qdrant_users.USER_VECTOR_VERSION
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from typing import Generator
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import schemas
+from app.core import security
+from app.core.config import settings
+from app.core.tokens import (
+    JoseBackend,
+    PyJWTBackend,
+    TokenDecodeError,
+    decode_token,
+    get_token_decoder,
+    reset_token_decoder,
+)
+
+
+@pytest.fixture
+def decoder() -> Generator:
+    reset_token_decoder()
+    yield get_token_decoder()
+    reset_token_decoder()
+
+
+def test_decoded_payload_is_cached_until_exp(decoder) -> None:
+    token = security.create_access_token(subject="64b7f0c2a1b2c3d4e5f60718")
+    payload = decode_token(token, schemas.TokenPayload)
+    assert str(payload.sub) == "64b7f0c2a1b2c3d4e5f60718"
+    assert decode_token(token, schemas.TokenPayload) is payload
+    assert decoder.cache.hits == 1
+    # The same token validated into another schema is a separate entry
+    decode_token(token, schemas.MagicTokenPayload)
+    assert len(decoder.cache) == 2
+
+
+def test_invalid_tokens_are_rejected_and_not_cached(decoder) -> None:
+    expired = security.create_access_token(subject="user", expires_delta=timedelta(seconds=-10))
+    for token in [expired, "not-a-jwt", security.create_access_token(subject="user") + "x"]:
+        with pytest.raises(TokenDecodeError):
+            decode_token(token, schemas.TokenPayload)
+    assert len(decoder.cache) == 0
+
+
+def test_backends_agree() -> None:
+    pytest.importorskip("jwt")
+    token = security.create_refresh_token(subject="user")
+    assert JoseBackend().decode(token, settings.SECRET_KEY, [settings.JWT_ALGO]) == PyJWTBackend().decode(
+        token, settings.SECRET_KEY, [settings.JWT_ALGO]
+    )
+
+
+def test_cached_decode_skips_the_backend(decoder) -> None:
+    token = security.create_access_token(subject="64b7f0c2a1b2c3d4e5f60718")
+    decoder.backend = MagicMock(wraps=decoder.backend)
+    payload = decode_token(token, schemas.TokenPayload)
+    assert decode_token(token, schemas.TokenPayload) is payload
+    decoder.backend.decode.assert_called_once()
+
+
+def test_verify_totp_with_stored_secret() -> None:
+    secret = security.create_new_totp(label="user@example.com").secret.get_secret_value()
+    code = security.totp_factory.from_source(secret).generate().token
+    counter = security.verify_totp(token=code, secret=secret)
+    assert counter
+    # A code is only accepted once
+    assert not security.verify_totp(token=code, secret=secret, last_counter=counter)
+
+
+def test_magic_tokens_decode(decoder) -> None:
+    emailed, claim = security.create_magic_tokens(subject="64b7f0c2a1b2c3d4e5f60718")
+    emailed_payload = decode_token(emailed, schemas.MagicTokenPayload)
+    claim_payload = decode_token(claim, schemas.MagicTokenPayload)
+    assert emailed_payload.sub == "64b7f0c2a1b2c3d4e5f60718"
+    assert claim_payload.sub != emailed_payload.sub
+    assert claim_payload.fingerprint == emailed_payload.fingerprint
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generator
+
+import pytest
+
+from app.core.config import settings
+from app.worker.runtime import async_task, get_worker_loop, run_async, shutdown_worker_loop
+
+
+@pytest.fixture
+def worker_loop(monkeypatch: pytest.MonkeyPatch) -> Generator:
+    monkeypatch.setattr(settings, "CELERY_ASYNC_MAX_IN_FLIGHT", 4)
+    shutdown_worker_loop()
+    yield get_worker_loop()
+    shutdown_worker_loop()
+
+
+@async_task()
+async def double(value: int) -> int:
+    await asyncio.sleep(0)
+    return value * 2
+
+
+def test_async_task_returns_awaited_result(worker_loop) -> None:
+    assert double(21) == 42
+    assert double.apply(args=(4,)).get() == 8
+
+
+def test_tasks_share_one_loop_with_bounded_concurrency(worker_loop) -> None:
+    loops = set()
+    peak = 0
+
+    async def job() -> None:
+        nonlocal peak
+        loops.add(id(asyncio.get_running_loop()))
+        peak = max(peak, worker_loop.in_flight)
+        await asyncio.sleep(0.05)
+
+    # Like `-P threads -c 8`: each pool thread blocks on its own coroutine
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: run_async(job()), range(8)))
+    assert len(loops) == 1
+    assert peak == 4
+
+
+def test_concurrent_first_calls_share_one_loop() -> None:
+    shutdown_worker_loop()
+    threads = 32
+    barrier = threading.Barrier(threads)
+
+    def first_call() -> asyncio.AbstractEventLoop:
+        barrier.wait()
+        return get_worker_loop().loop
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            loops = list(pool.map(lambda _: first_call(), range(threads)))
+        assert len({id(loop) for loop in loops}) == 1
+    finally:
+        shutdown_worker_loop()
+
+
+def test_task_timeout_cancels_the_coroutine(worker_loop) -> None:
+    cancelled = asyncio.Event()
+
+    async def slow() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        run_async(slow(), timeout=0.05)
+    time.sleep(0.05)
+    assert cancelled.is_set()
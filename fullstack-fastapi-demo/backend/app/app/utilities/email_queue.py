@@ -0,0 +1,243 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict
+
+import emails
+from emails.backend.smtp import SMTPBackend
+
+from app.core.config import settings
+from app.utilities.email_templates import get_email_templates
+
+"""
+`emails.Message.send` is blocking and, given a dict of SMTP options, opens a fresh (TLS, authenticated) connection for
+every message. Calling it from an async endpoint stalls the event loop for as long as the SMTP server takes. Instead,
+`send_email` only enqueues; a small pool of daemon threads delivers the queue in batches, each thread reusing one
+persistent SMTP connection until it has been idle for EMAIL_SMTP_IDLE_SECONDS.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class EmailDeliveryError(Exception):
+    """The SMTP server refused the sender or the recipients. `emails` reports this in its response, not by raising."""
+
+
+@dataclass
+class EmailJob:
+    email_to: str
+    subject: str = ""
+    # File name in EMAIL_TEMPLATES_DIR
+    template_name: str = ""
+    environment: Dict[str, Any] = field(default_factory=dict)
+
+
+def get_smtp_options() -> Dict[str, Any]:
+    smtp_options: Dict[str, Any] = {
+        "host": settings.SMTP_HOST,
+        "port": settings.SMTP_PORT,
+        "timeout": settings.EMAIL_SMTP_TIMEOUT_SECONDS,
+    }
+    if settings.SMTP_TLS:
+        # https://python-emails.readthedocs.io/en/latest/
+        smtp_options["ssl"] = True
+    if settings.SMTP_USER:
+        smtp_options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        smtp_options["password"] = settings.SMTP_PASSWORD
+    return smtp_options
+
+
+def create_smtp_backend() -> SMTPBackend:
+    # Raise on failure so the dispatcher can count it and drop the (possibly broken) connection
+    return SMTPBackend(fail_silently=False, **get_smtp_options())
+
+
+def deliver_email(job: EmailJob, smtp: SMTPBackend) -> Any:
+    """
+    Render and send one message over an already configured (and possibly already connected) SMTP backend.
+
+    Raises:
+        EmailDeliveryError: if the server did not accept the message
+    """
+    message = emails.Message(
+        subject=job.subject,
+        html=get_email_templates().get(job.template_name),
+        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    )
+    # Add common template environment elements
+    environment = {
+        **job.environment,
+        "server_host": settings.SERVER_HOST,
+        "server_name": settings.SERVER_NAME,
+        "server_bot": settings.SERVER_BOT,
+    }
+    response = message.send(to=job.email_to, render=environment, smtp=smtp)
+    if response is None or not response.success:
+        status = f"{response.status_code} {response.status_text!r}" if response is not None else "no response"
+        refused = getattr(response, "refused_recipients", None) or {}
+        error = getattr(response, "error", None)
+        raise EmailDeliveryError(f"SMTP server did not accept the message: {status}, refused={refused}, error={error}")
+    return response
+
+
+class EmailQueueStats:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.enqueued = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.connections_opened = 0
+        self.total_delivery_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, **deltas: float) -> None:
+        # Counters are bumped from the worker threads and the event loop thread
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def as_dict(self, queue_depth: int) -> dict[str, float | int]:
+        return {
+            "workers": self.workers,
+            "queue_depth": queue_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "connections_opened": self.connections_opened,
+            "avg_delivery_seconds": self.total_delivery_seconds / (self.sent or 1),
+        }
+
+
+class _EmailDispatcherSingleton:
+    queue: "queue.Queue[EmailJob | None]"
+    stats: EmailQueueStats
+    threads: list[threading.Thread]
+    # Swappable for tests and benchmarks
+    backend_factory: Callable[[], SMTPBackend]
+    deliver: Callable[[EmailJob, SMTPBackend], Any]
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            cls.instance = super(_EmailDispatcherSingleton, cls).__new__(cls)
+            cls.instance.queue = queue.Queue(maxsize=settings.EMAIL_QUEUE_MAX_SIZE)
+            cls.instance.stats = EmailQueueStats(workers=max(1, settings.EMAIL_QUEUE_WORKERS))
+            cls.instance.threads = []
+            cls.instance.backend_factory = create_smtp_backend
+            cls.instance.deliver = deliver_email
+            cls.instance._stopping = threading.Event()
+        return cls.instance
+
+    def start(self) -> None:
+        if self.threads:
+            return
+        for i in range(self.stats.workers):
+            thread = threading.Thread(target=self._work, name=f"email-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def enqueue(self, job: EmailJob) -> bool:
+        """Queue a message without blocking. Returns False (and logs) if the queue is full."""
+        self.start()
+        try:
+            self.queue.put_nowait(job)
+        except queue.Full:
+            self.stats.record(dropped=1)
+            logger.error(f"Email queue is full, dropping message to {job.email_to}")
+            return False
+        self.stats.record(enqueued=1)
+        return True
+
+    def _next_batch(self) -> list[EmailJob | None]:
+        batch = [self.queue.get(timeout=settings.EMAIL_SMTP_IDLE_SECONDS)]
+        while batch[-1] is not None and len(batch) < settings.EMAIL_BATCH_SIZE:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _work(self) -> None:
+        smtp: SMTPBackend | None = None
+        while not self._stopping.is_set():
+            try:
+                batch = self._next_batch()
+            except queue.Empty:
+                # Idle: release the connection rather than let the server time it out
+                if smtp:
+                    smtp.close()
+                    smtp = None
+                continue
+            self.stats.record(batches=1)
+            for job in batch:
+                try:
+                    if job is None:
+                        continue
+                    if smtp is None:
+                        smtp = self.backend_factory()
+                        self.stats.record(connections_opened=1)
+                    started = time.perf_counter()
+                    self.deliver(job, smtp)
+                    self.stats.record(sent=1, total_delivery_seconds=time.perf_counter() - started)
+                except Exception as e:
+                    self.stats.record(failed=1)
+                    logger.error(f"Could not send email to {job.email_to}: {e}")
+                    if smtp:
+                        smtp.close()
+                        smtp = None
+                finally:
+                    self.queue.task_done()
+            if batch[-1] is None:
+                break
+        if smtp:
+            smtp.close()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued message has been attempted. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.queue.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout: float | None = None) -> None:
+        flushed = self.flush(timeout)
+        if not flushed:
+            logger.warning(f"Email queue shut down with {self.queue.qsize()} undelivered message(s)")
+        self._stopping.set()
+        for _ in self.threads:
+            try:
+                self.queue.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        self.threads = []
+
+
+def get_email_dispatcher() -> _EmailDispatcherSingleton:
+    return _EmailDispatcherSingleton()
+
+
+def get_email_queue_stats() -> dict[str, float | int]:
+    dispatcher = get_email_dispatcher()
+    return dispatcher.stats.as_dict(queue_depth=dispatcher.queue.qsize())
+
+
+def enqueue_email(job: EmailJob) -> bool:
+    return get_email_dispatcher().enqueue(job)
+
+
+def shutdown_email_dispatcher(timeout: float | None = None) -> None:
+    if hasattr(_EmailDispatcherSingleton, "instance"):
+        _EmailDispatcherSingleton.instance.shutdown(timeout)
+        del _EmailDispatcherSingleton.instance
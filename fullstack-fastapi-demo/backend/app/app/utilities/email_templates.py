@@ -0,0 +1,74 @@
+import logging
+import os
+import threading
+from pathlib import Path
+
+import jinja2
+from emails.template import JinjaTemplate
+
+from app.core.config import settings
+
+"""
+Email templates are read and compiled once per process and then reused for every send, so a burst of magic-link or
+password-reset emails only pays for rendering. With EMAIL_TEMPLATES_AUTO_RELOAD (for development) each lookup also
+compares the file mtime and recompiles a template that changed on disk.
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class _EmailTemplateRegistrySingleton:
+    directory: Path
+    auto_reload: bool
+    environment: jinja2.Environment
+    templates: dict[str, tuple[float, JinjaTemplate]]
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            cls.instance = super(_EmailTemplateRegistrySingleton, cls).__new__(cls)
+            cls.instance.directory = Path(settings.EMAIL_TEMPLATES_DIR)
+            cls.instance.auto_reload = settings.EMAIL_TEMPLATES_AUTO_RELOAD
+            # One environment shared by every template, rather than one per `JinjaTemplate`
+            cls.instance.environment = jinja2.Environment()
+            cls.instance.templates = {}
+            cls.instance._lock = threading.Lock()
+        return cls.instance
+
+    def _load(self, name: str, path: Path, mtime: float) -> JinjaTemplate:
+        template = JinjaTemplate(path.read_text(), environment=self.environment)
+        # Compile now, under the lock, rather than on first render in a delivery thread
+        template.template
+        self.templates[name] = (mtime, template)
+        return template
+
+    def get(self, name: str) -> JinjaTemplate:
+        entry = self.templates.get(name)
+        if entry and not self.auto_reload:
+            return entry[1]
+        path = self.directory / name
+        mtime = os.stat(path).st_mtime
+        if entry and entry[0] == mtime:
+            return entry[1]
+        with self._lock:
+            entry = self.templates.get(name)
+            if entry and entry[0] == mtime:
+                return entry[1]
+            if entry:
+                logger.info(f"Reloading email template {name}")
+            return self._load(name, path, mtime)
+
+    def load_all(self) -> int:
+        """Compile every template in the directory up front. Returns the number of templates loaded."""
+        with self._lock:
+            for path in sorted(self.directory.glob("*.html")):
+                self._load(path.name, path, os.stat(path).st_mtime)
+        return len(self.templates)
+
+
+def get_email_templates() -> _EmailTemplateRegistrySingleton:
+    return _EmailTemplateRegistrySingleton()
+
+
+def reset_email_templates() -> None:
+    if hasattr(_EmailTemplateRegistrySingleton, "instance"):
+        del _EmailTemplateRegistrySingleton.instance
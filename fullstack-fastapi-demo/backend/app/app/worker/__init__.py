@@ -1,3 +1,4 @@
 from app.core.celery_app import celery_app
 
 from .tests import test_celery
+from .qdrant import drain_qdrant_outbox, reconcile_qdrant_users
@@ -0,0 +1,32 @@
+from typing import Any
+
+from app.db.qdrant_outbox import QdrantSyncDispatcher
+from app.db.qdrant_reconcile import UserReconciler
+from app.db.session import MongoDatabase
+from app.worker.runtime import async_task
+
+
+@async_task(acks_late=True)
+async def drain_qdrant_outbox(max_batches: int = 100) -> int:
+    """
+    Deliver pending Mongo -> Qdrant user syncs from the outbox, for deployments that run the dispatcher in the worker
+    instead of the API (QDRANT_OUTBOX_DISPATCHER_ENABLED=false). Returns the number of events delivered.
+    """
+    dispatcher = QdrantSyncDispatcher()
+    delivered = 0
+    for _ in range(max_batches):
+        batch = await dispatcher.drain_once()
+        delivered += batch
+        if batch < dispatcher.batch_size:
+            break
+    return delivered
+
+
+@async_task(acks_late=True)
+async def reconcile_qdrant_users(full: bool = False, orphans: bool = True) -> dict[str, Any]:
+    """
+    Repair Qdrant points of users changed since the last run, and delete orphaned points; schedule nightly. Returns
+    the reconciliation report.
+    """
+    report = await UserReconciler(MongoDatabase()).run(full=full, orphans=orphans)
+    return report.as_dict()
@@ -0,0 +1,118 @@
+import asyncio
+import functools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Coroutine, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+
+"""
+Stock Celery calls task functions synchronously, so an `async def` task returns an un-awaited coroutine. Tasks declared
+with `async_task` are instead submitted to one long-lived event loop per worker process, running on its own thread.
+Run the worker with the thread pool (`-P threads -c N`): each pool thread only waits on its coroutine, while the loop
+interleaves up to CELERY_ASYNC_MAX_IN_FLIGHT of them. Because every task runs on the same loop, the Motor and Qdrant
+singletons from `app.db.session` and `app.db.qdrant` are created once and shared by all tasks.
+"""
+
+logger = logging.getLogger(__name__)
+
+ResultType = TypeVar("ResultType")
+
+# Pool threads make their first `get_worker_loop()` call concurrently when the worker starts with a backlog
+_worker_loop_lock = threading.Lock()
+
+
+class _WorkerLoopSingleton:
+    loop: asyncio.AbstractEventLoop
+    thread: threading.Thread
+    semaphore: asyncio.Semaphore
+
+    def __new__(cls):
+        if not hasattr(cls, "instance"):
+            with _worker_loop_lock:
+                if not hasattr(cls, "instance"):
+                    # Published only once complete: callers outside the lock must never see a half-built instance
+                    instance = super(_WorkerLoopSingleton, cls).__new__(cls)
+                    instance.loop = asyncio.new_event_loop()
+                    instance.semaphore = asyncio.Semaphore(max(1, settings.CELERY_ASYNC_MAX_IN_FLIGHT))
+                    instance.in_flight = 0
+                    instance.thread = threading.Thread(target=instance._run, name="celery-async-loop", daemon=True)
+                    instance.thread.start()
+                    cls.instance = instance
+        return cls.instance
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _limited(self, coro: Coroutine[Any, Any, ResultType]) -> ResultType:
+        async with self.semaphore:
+            self.in_flight += 1
+            try:
+                return await coro
+            finally:
+                self.in_flight -= 1
+
+    def run(self, coro: Coroutine[Any, Any, ResultType], timeout: float | None = None) -> ResultType:
+        """Run `coro` on the shared loop and block the calling (pool) thread until it finishes."""
+        future = asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+
+def get_worker_loop() -> _WorkerLoopSingleton:
+    return _WorkerLoopSingleton()
+
+
+def run_async(coro: Coroutine[Any, Any, ResultType], timeout: float | None = None) -> ResultType:
+    return get_worker_loop().run(coro, settings.CELERY_ASYNC_TASK_TIMEOUT_SECONDS if timeout is None else timeout)
+
+
+def shutdown_worker_loop() -> None:
+    with _worker_loop_lock:
+        if hasattr(_WorkerLoopSingleton, "instance"):
+            _WorkerLoopSingleton.instance.stop()
+            del _WorkerLoopSingleton.instance
+
+
+def async_task(*task_args: Any, **task_kwargs: Any) -> Callable[[Callable[..., Awaitable[Any]]], Any]:
+    """
+    Register an `async def` function as a Celery task executed on the worker's shared event loop. Accepts the same
+    options as `celery_app.task`.
+    """
+
+    def decorator(func: Callable[..., Coroutine[Any, Any, Any]]) -> Any:
+        @functools.wraps(func)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            return run_async(func(*args, **kwargs))
+
+        return celery_app.task(*task_args, **task_kwargs)(run)
+
+    return decorator
+
+
+@worker_process_init.connect
+def _reset_clients_after_fork(**kwargs: Any) -> None:
+    # Clients created in the parent before a prefork must not be reused in the child
+    from app.db.qdrant import _QdrantClientSingleton
+    from app.db.session import _MongoClientSingleton
+
+    for singleton in (_MongoClientSingleton, _QdrantClientSingleton, _WorkerLoopSingleton):
+        if hasattr(singleton, "instance"):
+            del singleton.instance
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _stop_worker_loop(**kwargs: Any) -> None:
+    shutdown_worker_loop()
@@ -1,8 +1,8 @@
 import sentry_sdk
 import asyncio
 
-from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.worker.runtime import async_task
 
 client_sentry = sentry_sdk.init(
     dsn=settings.SENTRY_DSN,
@@ -16,7 +16,7 @@ client_sentry = sentry_sdk.init(
 )
 
 
-@celery_app.task(acks_late=True)
+@async_task(acks_late=True)
 async def test_celery(word: str) -> str:
     await asyncio.sleep(5)
     return f"test task return {word}"
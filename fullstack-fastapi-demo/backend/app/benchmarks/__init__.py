@@ -0,0 +1,18 @@
+import os
+
+# The app settings require these. Benchmarks run against local stand-ins, never a deployment's services
+BENCHMARK_ENV = {
+    "SERVER_NAME": "benchmark",
+    "SERVER_HOST": "http://localhost",
+    "PROJECT_NAME": "benchmark",
+    "MONGO_DATABASE": "benchmark",
+    "MONGO_DATABASE_URI": "mongodb://localhost:27017",
+    "FIRST_SUPERUSER": "admin@example.com",
+    "FIRST_SUPERUSER_PASSWORD": "benchmark",
+}
+
+
+def apply_benchmark_env() -> None:
+    """Fill in the required settings that are not already set. Call before importing anything from `app`."""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
@@ -0,0 +1,244 @@
+"""
+Benchmark results with the environment they were measured in, and comparison against a stored baseline.
+
+Every metric keeps its raw samples (one per round, lower is better). A metric regresses when its median got slower
+by more than the configured threshold *and* by more than the noise: `noise_factor` times the larger relative median
+absolute deviation of the two runs. With a single sample per run the noise is unknown and only the threshold applies.
+Endpoint error rates regress on any rise, and a metric missing from the current run fails the comparison too: a
+benchmark that errors or crashes must not pass for a fast one.
+"""
+import json
+import os
+import platform
+import statistics
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "baselines" / "baseline.json"
+DEFAULT_THRESHOLD_PCT = 10.0
+DEFAULT_NOISE_FACTOR = 3.0
+# Unit of the endpoint error-rate metrics, which are compared by their absolute change rather than relative speed
+ERROR_RATE_UNIT = "ratio"
+# Environment keys that make timings incomparable when they differ
+COMPARABLE_ENVIRONMENT_KEYS = ("cpu", "cpu_count", "python", "implementation", "argon2")
+
+
+def cpu_model() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def package_version(name: str) -> str | None:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def argon2_parameters() -> dict[str, Any]:
+    from app.core import security
+
+    handler = security.pwd_context.handler("argon2")
+    return {
+        "type": handler.type,
+        "version": handler.version,
+        "memory_cost": handler.memory_cost,
+        "time_cost": handler.rounds or handler.default_rounds,
+        "parallelism": handler.parallelism,
+        "argon2_cffi": package_version("argon2-cffi"),
+    }
+
+
+def collect_environment() -> dict[str, Any]:
+    return {
+        "cpu": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "argon2": argon2_parameters(),
+    }
+
+
+def summarize_samples(samples: list[float], unit: str) -> dict[str, Any]:
+    median = statistics.median(samples)
+    return {
+        "unit": unit,
+        "samples": samples,
+        "median": median,
+        "min": min(samples),
+        "mean": statistics.fmean(samples),
+        "mad": statistics.median(abs(value - median) for value in samples),
+    }
+
+
+def build_results(
+    micro: dict[str, list[float]], endpoint_reports: list[dict[str, Any]], config: dict[str, Any]
+) -> dict[str, Any]:
+    """
+    Results document: microbenchmark samples in microseconds per call, and for every endpoint its error rate and the
+    p50 and p95 latency of its successful requests, with one sample per endpoint-suite run.
+    """
+    metrics: dict[str, Any] = {}
+    for name, seconds in micro.items():
+        metrics[f"micro.{name}"] = summarize_samples([value * 1e6 for value in seconds], "us")
+    if endpoint_reports:
+        for name in endpoint_reports[0]["endpoints"]:
+            for stat in ("p50_ms", "p95_ms"):
+                samples = [report["endpoints"][name][stat] for report in endpoint_reports]
+                metrics[f"endpoint.{name}.{stat}"] = summarize_samples(samples, "ms")
+            samples = [report["endpoints"][name]["error_rate"] for report in endpoint_reports]
+            metrics[f"endpoint.{name}.error_rate"] = summarize_samples(samples, ERROR_RATE_UNIT)
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": collect_environment(),
+        "config": config,
+        "metrics": metrics,
+        "endpoint_reports": endpoint_reports,
+    }
+
+
+def save_results(results: dict[str, Any], path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict[str, Any]:
+    results = json.loads(path.read_text())
+    if results.get("version") != RESULTS_VERSION:
+        raise ValueError(f"{path} has results version {results.get('version')}, expected {RESULTS_VERSION}")
+    return results
+
+
+@dataclass
+class MetricComparison:
+    name: str
+    unit: str
+    baseline: float
+    current: float
+    change_pct: float
+    # The slowdown that still counts as unchanged: the threshold, or the noise when that is larger
+    allowed_pct: float
+    status: str
+
+
+@dataclass
+class ComparisonReport:
+    threshold_pct: float
+    noise_factor: float
+    metrics: list[MetricComparison] = field(default_factory=list)
+    # Metrics present in only one of the two runs
+    missing: list[str] = field(default_factory=list)
+    added: list[str] = field(default_factory=list)
+    # Environment keys whose values differ, as {key: [baseline, current]}
+    environment_changes: dict[str, list[Any]] = field(default_factory=dict)
+
+    @property
+    def regressions(self) -> list[MetricComparison]:
+        return [metric for metric in self.metrics if metric.status == "regression"]
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.regressions or self.missing)
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def relative_noise(summary: dict[str, Any]) -> float:
+    if len(summary["samples"]) < 2 or not summary["median"]:
+        return 0.0
+    return summary["mad"] / summary["median"]
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    threshold_pct: float = DEFAULT_THRESHOLD_PCT,
+    noise_factor: float = DEFAULT_NOISE_FACTOR,
+) -> ComparisonReport:
+    report = ComparisonReport(threshold_pct=threshold_pct, noise_factor=noise_factor)
+    for key in COMPARABLE_ENVIRONMENT_KEYS:
+        before, after = baseline["environment"].get(key), current["environment"].get(key)
+        if before != after:
+            report.environment_changes[key] = [before, after]
+    base_metrics, current_metrics = baseline["metrics"], current["metrics"]
+    report.missing = sorted(set(base_metrics) - set(current_metrics))
+    report.added = sorted(set(current_metrics) - set(base_metrics))
+    for name in sorted(set(base_metrics) & set(current_metrics)):
+        before, after = base_metrics[name], current_metrics[name]
+        if after["unit"] == ERROR_RATE_UNIT:
+            report.metrics.append(compare_error_rates(name, before, after))
+            continue
+        if not before["median"]:
+            continue
+        change_pct = 100 * (after["median"] - before["median"]) / before["median"]
+        noise_pct = 100 * noise_factor * max(relative_noise(before), relative_noise(after))
+        allowed_pct = max(threshold_pct, noise_pct)
+        if change_pct > allowed_pct:
+            status = "regression"
+        elif change_pct < -allowed_pct:
+            status = "improvement"
+        else:
+            status = "unchanged"
+        report.metrics.append(
+            MetricComparison(
+                name=name,
+                unit=after["unit"],
+                baseline=before["median"],
+                current=after["median"],
+                change_pct=round(change_pct, 2),
+                allowed_pct=round(allowed_pct, 2),
+                status=status,
+            )
+        )
+    return report
+
+
+def compare_error_rates(name: str, before: dict[str, Any], after: dict[str, Any]) -> MetricComparison:
+    # Usually zero in the baseline, so the change is in percentage points and any rise is a regression
+    change = after["median"] - before["median"]
+    if change > 0:
+        status = "regression"
+    elif change < 0:
+        status = "improvement"
+    else:
+        status = "unchanged"
+    return MetricComparison(
+        name=name,
+        unit=after["unit"],
+        baseline=before["median"],
+        current=after["median"],
+        change_pct=round(100 * change, 2),
+        allowed_pct=0.0,
+        status=status,
+    )
+
+
+def format_comparison(report: ComparisonReport) -> str:
+    lines = [f"{'metric':<40} {'baseline':>12} {'current':>12} {'change':>9} {'allowed':>9}  status"]
+    for metric in report.metrics:
+        lines.append(
+            f"{metric.name:<40} {metric.baseline:>10.2f}{metric.unit:>2} {metric.current:>10.2f}{metric.unit:>2} "
+            f"{metric.change_pct:>+8.1f}% {metric.allowed_pct:>8.1f}%  {metric.status}"
+        )
+    for name in report.missing:
+        lines.append(f"{name:<40} missing from the current run (failure)")
+    for name in report.added:
+        lines.append(f"{name:<40} not in the baseline")
+    for key, (before, after) in report.environment_changes.items():
+        lines.append(f"warning: environment '{key}' changed from {before!r} to {after!r}; timings may not compare")
+    return "\n".join(lines)
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic dataset: N users with a realistic mix of TOTP, validated and inactive accounts, their refresh
+tokens, and the matching Qdrant points.
+
+The same seed (and `--anchor` date) always produces the same documents: ids, emails, names, flags, TOTP keys, token
+hashes and timestamps all come from one seeded RNG, and the shared password hash uses a salt derived from the seed.
+Users and tokens go to Mongo in unordered `insert_many` batches, and each batch's points are built and upserted with
+`build_user_points` / `upsert_user_points`, the code `save_user_to_qdrant` uses, concurrently with the Mongo writes.
+Indexes are applied after the load, which is faster than maintaining them during it.
+
+Usage: python -m benchmarks.dataset --users 1000000 [--seed 42] [--mongo mongodb://...] [--database benchmark]
+       [--batch-size 2000] [--qdrant server|skip] [--qdrant-collection users_collection_benchmark] [--drop]
+
+Writes into the `--database` database and the `--qdrant-collection` collection on the server configured by
+QDRANT_HOST/QDRANT_PORT. The app's users collection is refused, and so is the app's MONGO_DATABASE unless
+`--allow-app-database` is given. `--drop` empties both first.
+
+Point ids are 32 bits of an md5 of the user id (`user_point_id`), so users collide on a point, the later overwriting
+the earlier, at about n²/2³³ pairs: ~116 at 1M users. `points` reports what the collection actually holds and
+`point_id_collisions` how many users shared a point.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import struct
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Any, Iterator
+
+from benchmarks import apply_benchmark_env
+
+apply_benchmark_env()
+
+from bson import ObjectId  # noqa: E402
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.crud.crud_token import hash_token  # noqa: E402
+from app.db.indexes import apply_indexes  # noqa: E402
+from app.db.qdrant import get_qdrant_client  # noqa: E402
+from app.db.qdrant_users import (  # noqa: E402
+    USER_COLLECTION_NAME,
+    build_user_points,
+    init_users_collection,
+    upsert_user_points,
+)
+from app.db.session import get_engine  # noqa: E402
+from app.models import Token, User  # noqa: E402
+from benchmarks import standins  # noqa: E402
+
+# Every synthetic user logs in with this password
+SYNTHETIC_PASSWORD = "synthetic-password"
+FIRST_NAMES = ["Ada", "Alan", "Barbara", "Claude", "Donald", "Edsger", "Frances", "Grace", "John", "Katherine", "Ken"]
+LAST_NAMES = ["Allen", "Dijkstra", "Hamilton", "Hopper", "Johnson", "Knuth", "Lovelace", "Shannon", "Thompson"]
+EMAIL_DOMAINS = ["example.com", "example.org", "example.net"]
+# Refresh tokens per user follow a Pareto distribution: most users hold a few, some hold hundreds
+TOKEN_PARETO_ALPHA = 1.5
+# Kept apart from the app's users collection, like the Mongo data in `standins.BENCHMARK_DATABASE`
+BENCHMARK_COLLECTION_NAME = f"{USER_COLLECTION_NAME}_benchmark"
+
+
+@dataclass
+class DatasetSpec:
+    users: int
+    seed: int = 42
+    # Day the dataset is generated relative to; users were created over the `history_days` before it
+    anchor: date | None = None
+    history_days: int = 365
+    totp_ratio: float = 0.1
+    validated_ratio: float = 0.7
+    inactive_ratio: float = 0.05
+    superuser_ratio: float = 0.001
+    mean_tokens_per_user: float = 3.0
+    max_tokens_per_user: int = 500
+
+    def anchor_datetime(self) -> datetime:
+        # Today by default: token expiries must lie in the future, or the TTL index reaps them
+        return datetime.combine(self.anchor or datetime.now(timezone.utc).date(), dt_time())
+
+
+@dataclass
+class DatasetStats:
+    users: int = 0
+    tokens: int = 0
+    totp: int = 0
+    validated: int = 0
+    inactive: int = 0
+    superusers: int = 0
+    points: int = 0
+    point_id_collisions: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        stats = asdict(self)
+        stats["users_per_second"] = round(self.users / self.seconds, 1) if self.seconds else 0.0
+        return stats
+
+
+def seeded_object_id(rng: random.Random, at: datetime) -> ObjectId:
+    # Timestamp prefix like a real ObjectId, so `_id` order follows creation order; the rest comes from the RNG
+    return ObjectId(struct.pack(">I", int(at.replace(tzinfo=timezone.utc).timestamp())) + rng.randbytes(8))
+
+
+def seeded_password_hash(seed: int) -> str:
+    salt = hashlib.sha256(f"synthetic-salt:{seed}".encode()).digest()[:16]
+    return security.pwd_context.handler("argon2").using(salt=salt).hash(SYNTHETIC_PASSWORD)
+
+
+def token_count(rng: random.Random, spec: DatasetSpec) -> int:
+    scale = spec.mean_tokens_per_user * (TOKEN_PARETO_ALPHA - 1) / TOKEN_PARETO_ALPHA
+    return min(spec.max_tokens_per_user, int(scale * rng.paretovariate(TOKEN_PARETO_ALPHA)))
+
+
+class SyntheticUsers:
+    def __init__(self, spec: DatasetSpec):
+        """
+        Generates the dataset of `spec` in batches, without touching any database. Two instances with the same spec
+        yield identical batches.
+        """
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.anchor = spec.anchor_datetime()
+        self.hashed_password = seeded_password_hash(spec.seed)
+        self.refresh_lifetime = timedelta(seconds=settings.REFRESH_TOKEN_EXPIRE_SECONDS)
+
+    def _user(self, n: int) -> User:
+        rng, spec = self.rng, self.spec
+        created = self.anchor - timedelta(days=spec.history_days) + timedelta(
+            seconds=int(n * spec.history_days * 86400 / max(spec.users, 1))
+        )
+        modified = min(self.anchor, created + timedelta(seconds=rng.randrange(30 * 86400)))
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        totp = rng.random() < spec.totp_ratio
+        return User(
+            id=seeded_object_id(rng, created),
+            created=created,
+            modified=modified,
+            full_name=f"{first} {last}",
+            email=f"{first.lower()}.{last.lower()}.{n}@{rng.choice(EMAIL_DOMAINS)}",
+            hashed_password=self.hashed_password,
+            totp_secret=security.totp_factory(key=rng.randbytes(20), format="raw").to_json(encrypt=False)
+            if totp
+            else None,
+            totp_counter=rng.randrange(1, 50_000_000) if totp and rng.random() < 0.5 else None,
+            email_validated=rng.random() < spec.validated_ratio,
+            is_active=rng.random() >= spec.inactive_ratio,
+            is_superuser=rng.random() < spec.superuser_ratio,
+        )
+
+    def _tokens(self, user: User) -> list[dict[str, Any]]:
+        # Raw documents in `Token`'s shape: validating millions of models would dominate the load
+        docs = []
+        for _ in range(token_count(self.rng, self.spec)):
+            # Issued within the refresh lifetime before the anchor, so none has expired by the anchor
+            created = self.anchor - timedelta(seconds=self.rng.randrange(int(self.refresh_lifetime.total_seconds())))
+            docs.append(
+                {
+                    "_id": seeded_object_id(self.rng, created),
+                    "token_hash": hash_token(self.rng.randbytes(32).hex()),
+                    "authenticates_id": user.id,
+                    "created": created,
+                    "expires": created + self.refresh_lifetime,
+                }
+            )
+        return docs
+
+    def batches(self, batch_size: int) -> Iterator[tuple[list[User], list[dict[str, Any]]]]:
+        users: list[User] = []
+        tokens: list[dict[str, Any]] = []
+        for n in range(self.spec.users):
+            user = self._user(n)
+            users.append(user)
+            tokens.extend(self._tokens(user))
+            if len(users) >= batch_size:
+                yield users, tokens
+                users, tokens = [], []
+        if users:
+            yield users, tokens
+
+
+def check_mongo_database(database: str, *, allow_app_database: bool = False) -> None:
+    # The default `benchmark` database is what the benchmark settings name as MONGO_DATABASE; anything else is the app's
+    if database == settings.MONGO_DATABASE and database != standins.BENCHMARK_DATABASE and not allow_app_database:
+        raise ValueError(
+            f"Refusing to load synthetic users into the app's '{database}' database without --allow-app-database"
+        )
+
+
+def check_qdrant_collection(collection_name: str) -> None:
+    if collection_name == USER_COLLECTION_NAME:
+        raise ValueError(f"Refusing to write synthetic users into the app's '{USER_COLLECTION_NAME}' collection")
+
+
+async def reset_qdrant_collection(collection_name: str = BENCHMARK_COLLECTION_NAME) -> None:
+    check_qdrant_collection(collection_name)
+    client = get_qdrant_client()
+    if await client.collection_exists(collection_name):
+        await client.delete_collection(collection_name)
+
+
+async def generate_dataset(
+    spec: DatasetSpec, *, batch_size: int = 2000, qdrant_collection: str | None = BENCHMARK_COLLECTION_NAME
+) -> DatasetStats:
+    """
+    Load the dataset into the current Mongo engine and, unless `qdrant_collection` is None, that collection of the
+    current Qdrant client. The app's users collection is refused.
+    """
+    if qdrant_collection:
+        check_qdrant_collection(qdrant_collection)
+        await init_users_collection(qdrant_collection)
+    engine = get_engine()
+    users_collection, tokens_collection = engine.get_collection(User), engine.get_collection(Token)
+    stats = DatasetStats()
+    point_ids: set[int] = set()
+    started = time.perf_counter()
+    for users, tokens in SyntheticUsers(spec).batches(batch_size):
+        writes = [users_collection.insert_many([user.model_dump_doc() for user in users], ordered=False)]
+        if tokens:
+            writes.append(tokens_collection.insert_many(tokens, ordered=False))
+        if qdrant_collection:
+            points = build_user_points(users)
+            point_ids.update(point.id for point in points)
+            writes.append(upsert_user_points(points, collection_name=qdrant_collection))
+        await asyncio.gather(*writes)
+        stats.users += len(users)
+        stats.tokens += len(tokens)
+        stats.totp += sum(1 for user in users if user.totp_secret)
+        stats.validated += sum(1 for user in users if user.email_validated)
+        stats.inactive += sum(1 for user in users if not user.is_active)
+        stats.superusers += sum(1 for user in users if user.is_superuser)
+        print(f"… {stats.users}/{spec.users} users, {stats.tokens} tokens", file=sys.stderr, flush=True)
+    await apply_indexes()
+    if qdrant_collection:
+        stats.points = (await get_qdrant_client().count(qdrant_collection, exact=True)).count
+        stats.point_id_collisions = stats.users - len(point_ids)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+async def load(args: argparse.Namespace) -> DatasetStats:
+    check_mongo_database(args.database, allow_app_database=args.allow_app_database)
+    qdrant_collection = args.qdrant_collection if args.qdrant == "server" else None
+    if qdrant_collection:
+        check_qdrant_collection(qdrant_collection)
+    db = standins.install_mongo(args.mongo, args.database)
+    if args.drop:
+        await standins.reset_database(db)
+        if qdrant_collection:
+            await reset_qdrant_collection(qdrant_collection)
+    spec = DatasetSpec(
+        users=args.users,
+        seed=args.seed,
+        anchor=date.fromisoformat(args.anchor) if args.anchor else None,
+        totp_ratio=args.totp_ratio,
+        validated_ratio=args.validated_ratio,
+        inactive_ratio=args.inactive_ratio,
+        mean_tokens_per_user=args.mean_tokens,
+        max_tokens_per_user=args.max_tokens,
+    )
+    return await generate_dataset(spec, batch_size=args.batch_size, qdrant_collection=qdrant_collection)
+
+
+def main() -> None:
+    defaults = DatasetSpec(users=0)
+    parser = argparse.ArgumentParser(description="Load a deterministic synthetic user dataset into Mongo and Qdrant.")
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--anchor", help="Generate relative to this date (YYYY-MM-DD) instead of today")
+    parser.add_argument("--mongo", default=settings.MONGO_DATABASE_URI, help='MongoDB URI, or "mock"')
+    parser.add_argument("--database", default=standins.BENCHMARK_DATABASE)
+    parser.add_argument(
+        "--allow-app-database", action="store_true", help="Allow --database to be the app's MONGO_DATABASE"
+    )
+    parser.add_argument("--qdrant", choices=["server", "skip"], default="server")
+    parser.add_argument(
+        "--qdrant-collection", default=BENCHMARK_COLLECTION_NAME, help="Qdrant collection; the app's is refused"
+    )
+    parser.add_argument("--batch-size", type=int, default=2000, help="Users per insert_many and Qdrant upsert")
+    parser.add_argument("--drop", action="store_true", help="Empty the database and the Qdrant collection first")
+    parser.add_argument("--totp-ratio", type=float, default=defaults.totp_ratio)
+    parser.add_argument("--validated-ratio", type=float, default=defaults.validated_ratio)
+    parser.add_argument("--inactive-ratio", type=float, default=defaults.inactive_ratio)
+    parser.add_argument("--mean-tokens", type=float, default=defaults.mean_tokens_per_user)
+    parser.add_argument("--max-tokens", type=int, default=defaults.max_tokens_per_user)
+    args = parser.parse_args()
+    try:
+        check_mongo_database(args.database, allow_app_database=args.allow_app_database)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.qdrant == "server" and args.qdrant_collection == USER_COLLECTION_NAME:
+        parser.error(f"--qdrant-collection must not be the app's '{USER_COLLECTION_NAME}' collection")
+    stats = asyncio.run(load(args))
+    print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Email delivery throughput against a local SMTP stand-in.
+
+Compares the previous path (one blocking `emails.Message.send` per message, each opening its own SMTP connection)
+with the background queue (batched delivery over persistent per-worker connections), and prints messages/s as JSON.
+
+Usage: python -m benchmarks.email_delivery [--messages 500] [--workers 2] [--latency-ms 1]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+from benchmarks import apply_benchmark_env
+
+# The benchmark never touches Mongo or Qdrant
+apply_benchmark_env()
+
+from app.core.config import settings  # noqa: E402
+from app.utilities import email_queue  # noqa: E402
+from benchmarks.smtp_sink import SMTPSink  # noqa: E402
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "app" / "email-templates" / "build"
+
+
+def make_job(n: int) -> email_queue.EmailJob:
+    return email_queue.EmailJob(
+        email_to=f"user{n}@example.com",
+        subject="Your benchmark magic login",
+        template_name="magic_login.html",
+        environment={"project_name": "benchmark", "valid_minutes": 30, "link": f"http://localhost?magic={n}"},
+    )
+
+
+def bench_per_message_connection(messages: int) -> float:
+    started = time.perf_counter()
+    for n in range(messages):
+        smtp = email_queue.create_smtp_backend()
+        try:
+            email_queue.deliver_email(make_job(n), smtp)
+        finally:
+            smtp.close()
+    return time.perf_counter() - started
+
+
+def bench_queue(messages: int) -> tuple[float, float]:
+    dispatcher = email_queue.get_email_dispatcher()
+    started = time.perf_counter()
+    for n in range(messages):
+        dispatcher.enqueue(make_job(n))
+    enqueued = time.perf_counter() - started
+    dispatcher.flush()
+    delivered = time.perf_counter() - started
+    email_queue.shutdown_email_dispatcher()
+    return enqueued, delivered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark email delivery against a local SMTP stand-in.")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=settings.EMAIL_QUEUE_WORKERS)
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Delay the sink adds to every SMTP reply")
+    args = parser.parse_args()
+
+    sink = SMTPSink(latency=args.latency_ms / 1000).start()
+    settings.SMTP_HOST = sink.host
+    settings.SMTP_PORT = sink.port
+    settings.SMTP_TLS = False
+    settings.SMTP_USER = None
+    settings.SMTP_PASSWORD = None
+    settings.EMAILS_FROM_EMAIL = "bench@example.com"
+    settings.EMAIL_QUEUE_WORKERS = args.workers
+    settings.EMAIL_TEMPLATES_DIR = str(TEMPLATES_DIR)
+    try:
+        baseline = bench_per_message_connection(args.messages)
+        baseline_connections = sink.connections
+        enqueued, delivered = bench_queue(args.messages)
+        queue_connections = sink.connections - baseline_connections
+    finally:
+        sink.stop()
+
+    print(
+        json.dumps(
+            {
+                "messages": args.messages,
+                "workers": args.workers,
+                "latency_ms": args.latency_ms,
+                "received": sink.messages,
+                "per_message_connection": {
+                    "seconds": round(baseline, 4),
+                    "messages_per_second": round(args.messages / baseline, 1),
+                    "connections": baseline_connections,
+                },
+                "queue": {
+                    "enqueue_seconds": round(enqueued, 4),
+                    "seconds": round(delivered, 4),
+                    "messages_per_second": round(args.messages / delivered, 1),
+                    "connections": queue_connections,
+                },
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Load test of the auth and user endpoints, driven in-process through the ASGI app at a fixed concurrency.
+
+Mongo is mongomock-motor (`--mongo mock`) or a disposable database on a real mongod (`--mongo mongodb://...`, the
+`benchmark` database is dropped first), Qdrant is the in-memory client; see `benchmarks.standins`. Every request of a
+scenario gets its own precomputed arguments (users, refresh tokens, TOTP secrets), so single-use credentials are never
+replayed. Prints per-endpoint error rate, req/s and p50/p95/p99 latency of the successful requests as JSON.
+
+Usage: python -m benchmarks.endpoints [--mongo mock] [--requests 200] [--concurrency 8] [--scenario users_get ...]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from benchmarks import apply_benchmark_env
+
+apply_benchmark_env()
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.crud.crud_token import hash_token, token_expiry  # noqa: E402
+from app.db.indexes import apply_indexes  # noqa: E402
+from app.db.session import get_engine  # noqa: E402
+from app.models import Token, User  # noqa: E402
+from benchmarks import standins  # noqa: E402
+
+BENCHMARK_PASSWORD = "benchmark-password"
+# Users shared by the scenarios whose requests can repeat a user (password logins, reads, profile updates)
+DEFAULT_POOL_SIZE = 50
+
+
+@dataclass
+class BenchContext:
+    db: Any
+    hashed_password: str
+    mailbox: standins.MagicLinkMailbox
+    pool: list[User] = field(default_factory=list)
+    superuser: User | None = None
+    _emails: itertools.count = field(default_factory=itertools.count)
+
+    def next_email(self, prefix: str) -> str:
+        return f"{prefix}-{next(self._emails)}@example.com"
+
+
+@dataclass
+class Scenario:
+    name: str
+    # Builds one argument per request before the clock starts
+    prepare: Callable[[BenchContext, int], Awaitable[list[Any]]]
+    # Makes the request(s) for one argument and returns the final response
+    call: Callable[[httpx.AsyncClient, Any], Awaitable[httpx.Response]]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict[str, Any]:
+    """
+    `latencies` are those of the successful requests: a fast error response must not pass for a speed-up. Throughput
+    counts successful requests too.
+    """
+    latencies = sorted(latencies)
+    succeeded = len(latencies)
+    requests = succeeded + errors
+    return {
+        "requests": requests,
+        "errors": errors,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "seconds": round(seconds, 4),
+        "req_per_s": round(succeeded / seconds, 1) if seconds else 0.0,
+        "mean_ms": round(1000 * sum(latencies) / succeeded, 3) if succeeded else 0.0,
+        "p50_ms": round(1000 * percentile(latencies, 50), 3),
+        "p95_ms": round(1000 * percentile(latencies, 95), 3),
+        "p99_ms": round(1000 * percentile(latencies, 99), 3),
+    }
+
+
+async def insert_users(ctx: BenchContext, count: int, prefix: str, **fields: Any) -> list[User]:
+    """
+    Bulk insert active users sharing one password hash; hashing per user would dominate the setup time. Callable
+    field values are called once per user.
+    """
+    users = [
+        User(
+            email=ctx.next_email(prefix),
+            hashed_password=ctx.hashed_password,
+            is_active=True,
+            **{key: value() if callable(value) else value for key, value in fields.items()},
+        )
+        for _ in range(count)
+    ]
+    if users:
+        await get_engine().get_collection(User).insert_many([user.model_dump_doc() for user in users])
+    return users
+
+
+def pooled(ctx: BenchContext, count: int) -> list[User]:
+    return [ctx.pool[n % len(ctx.pool)] for n in range(count)]
+
+
+def bearer(token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def prepare_pool_logins(ctx: BenchContext, count: int) -> list[Any]:
+    return [user.email for user in pooled(ctx, count)]
+
+
+async def call_oauth(client: httpx.AsyncClient, email: str) -> httpx.Response:
+    return await client.post(
+        f"{settings.API_V1_STR}/login/oauth", data={"username": email, "password": BENCHMARK_PASSWORD}
+    )
+
+
+async def prepare_refresh(ctx: BenchContext, count: int) -> list[Any]:
+    tokens, docs = [], []
+    for n, user in enumerate(pooled(ctx, count)):
+        # Tokens for the same user with the same `exp` are identical JWTs. Expire an hour past the default, one second
+        # apart, so they differ from each other and from every token the API issues during the run
+        expires = timedelta(seconds=settings.REFRESH_TOKEN_EXPIRE_SECONDS + 3600 + n)
+        token = security.create_refresh_token(subject=user.id, expires_delta=expires)
+        tokens.append(token)
+        docs.append(
+            Token(token_hash=hash_token(token), authenticates_id=user.id, expires=token_expiry(token)).model_dump_doc()
+        )
+    if docs:
+        await get_engine().get_collection(Token).insert_many(docs)
+    return tokens
+
+
+async def call_refresh(client: httpx.AsyncClient, token: str) -> httpx.Response:
+    return await client.post(f"{settings.API_V1_STR}/login/refresh", headers=bearer(token))
+
+
+async def prepare_totp(ctx: BenchContext, count: int) -> list[Any]:
+    # One user per request: a TOTP code is accepted once per user and time step
+    users = await insert_users(
+        ctx, count, "totp", totp_secret=lambda: security.create_new_totp(label="benchmark").secret.get_secret_value()
+    )
+    return [(security.create_access_token(subject=user.id, force_totp=True), user.totp_secret) for user in users]
+
+
+async def call_totp(client: httpx.AsyncClient, arg: tuple[str, str]) -> httpx.Response:
+    token, secret = arg
+    code = security.totp_factory.from_source(secret).generate().token
+    return await client.post(f"{settings.API_V1_STR}/login/totp", json={"claim": code}, headers=bearer(token))
+
+
+def make_call_magic(mailbox: standins.MagicLinkMailbox) -> Callable[..., Awaitable[httpx.Response]]:
+    async def call_magic(client: httpx.AsyncClient, email: str) -> httpx.Response:
+        response = await client.post(f"{settings.API_V1_STR}/login/magic/{email}")
+        if response.status_code != 200:
+            return response
+        claim = response.json()["claim"]
+        return await client.post(
+            f"{settings.API_V1_STR}/login/claim", json={"claim": claim}, headers=bearer(mailbox.take(claim))
+        )
+
+    return call_magic
+
+
+async def prepare_access(ctx: BenchContext, count: int) -> list[Any]:
+    return [security.create_access_token(subject=user.id) for user in pooled(ctx, count)]
+
+
+async def call_users_get(client: httpx.AsyncClient, token: str) -> httpx.Response:
+    return await client.get(f"{settings.API_V1_STR}/users/", headers=bearer(token))
+
+
+async def prepare_users_put(ctx: BenchContext, count: int) -> list[Any]:
+    tokens = await prepare_access(ctx, count)
+    return [(token, f"Benchmark User {n}") for n, token in enumerate(tokens)]
+
+
+async def call_users_put(client: httpx.AsyncClient, arg: tuple[str, str]) -> httpx.Response:
+    token, full_name = arg
+    return await client.put(
+        f"{settings.API_V1_STR}/users/",
+        json={"full_name": full_name, "original": BENCHMARK_PASSWORD},
+        headers=bearer(token),
+    )
+
+
+async def prepare_superuser(ctx: BenchContext, count: int) -> list[Any]:
+    return [security.create_access_token(subject=ctx.superuser.id)] * count
+
+
+async def call_users_all(client: httpx.AsyncClient, token: str) -> httpx.Response:
+    return await client.get(f"{settings.API_V1_STR}/users/all", headers=bearer(token))
+
+
+def build_scenarios(ctx: BenchContext) -> list[Scenario]:
+    return [
+        Scenario("login_oauth", prepare_pool_logins, call_oauth),
+        Scenario("login_refresh", prepare_refresh, call_refresh),
+        Scenario("login_totp", prepare_totp, call_totp),
+        Scenario("login_magic_claim", prepare_pool_logins, make_call_magic(ctx.mailbox)),
+        Scenario("users_get", prepare_access, call_users_get),
+        Scenario("users_put", prepare_users_put, call_users_put),
+        Scenario("users_all", prepare_superuser, call_users_all),
+    ]
+
+
+SCENARIO_NAMES = [
+    "login_oauth",
+    "login_refresh",
+    "login_totp",
+    "login_magic_claim",
+    "users_get",
+    "users_put",
+    "users_all",
+]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, ctx: BenchContext, *, requests: int, concurrency: int, warmup: int
+) -> dict[str, Any]:
+    args = await scenario.prepare(ctx, warmup + requests)
+    for arg in args[:warmup]:
+        await scenario.call(client, arg)
+    pending = iter(args[warmup:])
+    latencies: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        # Single-threaded event loop: pulling from a shared iterator needs no lock
+        for arg in pending:
+            started = time.perf_counter()
+            try:
+                response = await scenario.call(client, arg)
+                failed = response.status_code >= 400
+            except Exception:
+                failed = True
+            if failed:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def run_endpoint_suite(
+    *,
+    mongo: str = "mock",
+    requests: int = 200,
+    concurrency: int = 8,
+    warmup: int = 10,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    scenarios: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Run the endpoint scenarios (all of `SCENARIO_NAMES` by default) and return the report. Installs the stand-ins,
+    so call it before anything else imported `app.main`.
+    """
+    db = standins.install_mongo(mongo)
+    standins.install_memory_qdrant()
+    from app.main import app
+
+    if mongo != "mock":
+        await standins.reset_database(db)
+    await apply_indexes()
+    ctx = BenchContext(
+        db=db,
+        hashed_password=security.get_password_hash(BENCHMARK_PASSWORD),
+        mailbox=standins.MagicLinkMailbox(),
+    )
+    ctx.pool = await insert_users(ctx, pool_size, "pool", email_validated=True)
+    ctx.superuser = (await insert_users(ctx, 1, "admin", is_superuser=True, email_validated=True))[0]
+    selected = [scenario for scenario in build_scenarios(ctx) if not scenarios or scenario.name in scenarios]
+    results: dict[str, Any] = {}
+    started = datetime.now(timezone.utc)
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                for scenario in selected:
+                    results[scenario.name] = await run_scenario(
+                        client, scenario, ctx, requests=requests, concurrency=concurrency, warmup=warmup
+                    )
+    finally:
+        ctx.mailbox.close()
+    return {
+        "meta": {
+            "started": started.isoformat(),
+            "mongo": "mongomock" if mongo == "mock" else "mongod",
+            "qdrant": ":memory:",
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "pool_size": pool_size,
+            "python": platform.python_version(),
+        },
+        "endpoints": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the auth and user endpoints in-process.")
+    parser.add_argument("--mongo", default="mock", help='"mock" for mongomock-motor, or a MongoDB URI')
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+    parser.add_argument("--scenario", action="append", choices=SCENARIO_NAMES, help="Run only these (repeatable)")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        run_endpoint_suite(
+            mongo=args.mongo,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+            pool_size=args.pool_size,
+            scenarios=args.scenario,
+        )
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
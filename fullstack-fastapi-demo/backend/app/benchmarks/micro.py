@@ -0,0 +1,107 @@
+"""
+Microbenchmarks of the per-request hot paths: token issuing and decoding (uncached per JWT backend, and cached), the
+authentication dependency, password verification and user vector generation. Each benchmark is timed in `rounds`
+rounds of a fixed number of calls; every round gives one per-call sample, so the spread between rounds is a measure of
+the noise.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from benchmarks import apply_benchmark_env
+
+apply_benchmark_env()
+
+from app import schemas  # noqa: E402
+from app.api import deps  # noqa: E402
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.tokens import JoseBackend, JWTBackend, PyJWTBackend, decode_token  # noqa: E402
+from app.db.qdrant_users import generate_user_vector  # noqa: E402
+from app.db.session import get_engine  # noqa: E402
+from app.models import User  # noqa: E402
+from benchmarks import standins  # noqa: E402
+
+BENCHMARK_PASSWORD = "benchmark-password"
+
+
+@dataclass
+class MicroBenchmark:
+    name: str
+    # Calls per round; argon2 takes tens of milliseconds per call, the rest microseconds
+    calls: int
+    func: Callable[[], Any] | None = None
+    coro: Callable[[], Awaitable[Any]] | None = None
+
+
+async def time_round(benchmark: MicroBenchmark) -> float:
+    """Seconds per call, averaged over one round."""
+    started = time.perf_counter()
+    if benchmark.coro:
+        for _ in range(benchmark.calls):
+            await benchmark.coro()
+    else:
+        for _ in range(benchmark.calls):
+            benchmark.func()
+    return (time.perf_counter() - started) / benchmark.calls
+
+
+async def build_microbenchmarks(mongo: str = "mock") -> list[MicroBenchmark]:
+    db = standins.install_mongo(mongo)
+    if mongo != "mock":
+        await standins.reset_database(db)
+    hashed_password = security.get_password_hash(BENCHMARK_PASSWORD)
+    user = User(email="micro@example.com", full_name="Micro Benchmark", hashed_password=hashed_password, is_active=True)
+    await get_engine().save(user)
+    access_token = security.create_access_token(subject=user.id)
+
+    async def get_current_user() -> None:
+        # Token decode and user cache included, as in a request with a warm cache
+        await deps.get_current_user(db=db, token=access_token)
+
+    def backend_decode(backend: JWTBackend) -> Callable[[], Any]:
+        # What a cache miss costs: signature check and claims validation
+        return lambda: schemas.TokenPayload(
+            **backend.decode(access_token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGO])
+        )
+
+    backends: list[JWTBackend] = [JoseBackend()]
+    try:
+        backends.append(PyJWTBackend())
+    except ImportError:
+        pass
+    return [
+        MicroBenchmark("create_access_token", 2000, func=lambda: security.create_access_token(subject=user.id)),
+        *[MicroBenchmark(f"decode_token_{backend.name}", 2000, func=backend_decode(backend)) for backend in backends],
+        # The warm-up round fills the cache
+        MicroBenchmark("decode_token_cached", 2000, func=lambda: decode_token(access_token, schemas.TokenPayload)),
+        MicroBenchmark("get_current_user", 2000, coro=get_current_user),
+        MicroBenchmark(
+            "verify_password",
+            3,
+            func=lambda: security.verify_password(plain_password=BENCHMARK_PASSWORD, hashed_password=hashed_password),
+        ),
+        MicroBenchmark("generate_user_vector", 2000, func=lambda: generate_user_vector(user)),
+    ]
+
+
+async def run_microbenchmarks(
+    *, rounds: int = 7, mongo: str = "mock", names: list[str] | None = None
+) -> dict[str, list[float]]:
+    """
+    Per-call seconds for each round of each benchmark. One unmeasured round warms caches and imports first.
+    """
+    samples: dict[str, list[float]] = {}
+    for benchmark in await build_microbenchmarks(mongo):
+        if names and benchmark.name not in names:
+            continue
+        await time_round(benchmark)
+        samples[benchmark.name] = [await time_round(benchmark) for _ in range(rounds)]
+    return samples
+
+
+if __name__ == "__main__":
+    results = asyncio.run(run_microbenchmarks())
+    for name, values in results.items():
+        print(f"{name}: {min(values) * 1e6:.1f}us (best of {len(values)})")
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+"""
+A minimal in-process SMTP server that accepts and discards every message. It speaks just enough of RFC 5321 (EHLO,
+MAIL, RCPT, DATA, RSET, NOOP, QUIT) for `smtplib`, and can add a fixed delay per command to stand in for network and
+server latency.
+"""
+
+
+class SMTPSink:
+    def __init__(self, *, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.messages = 0
+        self.connections = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+
+    async def _reply(self, writer: asyncio.StreamWriter, line: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await self._reply(writer, "220 sink ESMTP ready")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    await self._reply(writer, "250 sink")
+                elif command == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    await reader.readuntil(b"\r\n.\r\n")
+                    self.messages += 1
+                    await self._reply(writer, "250 OK queued")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    break
+                else:
+                    # MAIL, RCPT, RSET, NOOP
+                    await self._reply(writer, "250 OK")
+        finally:
+            writer.close()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    def start(self) -> "SMTPSink":
+        """Serve from a background thread; the bound port is available once this returns."""
+        self._thread = threading.Thread(target=self._run, name="smtp-sink", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def stop(self) -> None:
+        if self._loop and self._server:
+            self._loop.call_soon_threadsafe(self._server.close)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
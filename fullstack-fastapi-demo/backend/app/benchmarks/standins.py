@@ -0,0 +1,168 @@
+"""
+Pluggable stand-ins for the services the API depends on, so endpoint benchmarks run in-process without a deployment.
+
+* MongoDB: `mongomock-motor` (`--mongo mock`, needs the `bench` extra), or a real mongod given by URI. The mock client
+  has no sessions, so a no-op session is handed to odmantic and `session=` is dropped before it reaches mongomock.
+* Qdrant: `qdrant_client`'s in-memory `:memory:` mode.
+* Email: the "inbox" is `MagicLinkMailbox`, which keeps the magic-link token the API would have emailed.
+
+Install the stand-ins before importing `app.main` (or anything from `app.crud`), since the CRUD singletons keep a
+reference to the engine they were created with; `install_mongo` re-points them as well to be safe.
+"""
+import functools
+from typing import Any
+
+from benchmarks import apply_benchmark_env
+
+apply_benchmark_env()
+
+from motor import motor_asyncio  # noqa: E402
+from odmantic import AIOEngine  # noqa: E402
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+from app.core.metrics import MongoCommandMetrics  # noqa: E402
+from app.db import qdrant as qdrant_db  # noqa: E402
+from app.db import session as mongo_session  # noqa: E402
+from app.db.qdrant_users import reset_users_collection_state  # noqa: E402
+
+BENCHMARK_DATABASE = "benchmark"
+# Collection methods odmantic and the app call with a `session=` argument
+_MONGOMOCK_SESSION_METHODS = (
+    "aggregate",
+    "bulk_write",
+    "count_documents",
+    "create_index",
+    "create_indexes",
+    "delete_many",
+    "delete_one",
+    "drop_index",
+    "estimated_document_count",
+    "find",
+    "find_one",
+    "find_one_and_delete",
+    "find_one_and_replace",
+    "find_one_and_update",
+    "index_information",
+    "insert_many",
+    "insert_one",
+    "list_indexes",
+    "replace_one",
+    "update_many",
+    "update_one",
+)
+
+
+class _NoSession:
+    """Stands in for a client session (and its transaction) where the database has none."""
+
+    async def __aenter__(self) -> "_NoSession":
+        return self
+
+    async def __aexit__(self, *args: Any) -> bool:
+        return False
+
+    def start_transaction(self) -> "_NoSession":
+        return self
+
+    async def end_session(self) -> None:
+        pass
+
+
+def _strip_sessions(collection_class: type) -> None:
+    if getattr(collection_class, "_benchmark_sessions_stripped", False):
+        return
+
+    def without_session(method):
+        @functools.wraps(method)
+        def call(self, *args, **kwargs):
+            kwargs.pop("session", None)
+            return method(self, *args, **kwargs)
+
+        return call
+
+    for name in _MONGOMOCK_SESSION_METHODS:
+        if hasattr(collection_class, name):
+            setattr(collection_class, name, without_session(getattr(collection_class, name)))
+    collection_class._benchmark_sessions_stripped = True
+
+
+def mock_mongo_client() -> Any:
+    try:
+        import mongomock.collection
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError as e:
+        raise SystemExit(f"--mongo mock needs mongomock-motor (pip install '.[bench]'): {e}")
+    _strip_sessions(mongomock.collection.Collection)
+    client = AsyncMongoMockClient()
+
+    async def start_session(*args: Any, **kwargs: Any) -> _NoSession:
+        return _NoSession()
+
+    client.start_session = start_session
+    return client
+
+
+def install_mongo(target: str, database: str = BENCHMARK_DATABASE) -> Any:
+    """
+    Point the app at `target`: "mock" for mongomock-motor, otherwise a MongoDB URI. Returns the database. Against a
+    real server the benchmark database is expected to be disposable; `reset_database` drops it.
+    """
+    from app import crud
+
+    if target == "mock":
+        client = mock_mongo_client()
+    else:
+        settings.MONGO_DATABASE_URI = target
+        client = motor_asyncio.AsyncIOMotorClient(
+            target,
+            driver=mongo_session.DRIVER_INFO,
+            event_listeners=[MongoCommandMetrics()] if settings.METRICS_ENABLED else [],
+        )
+    settings.MONGO_DATABASE = database
+    instance = object.__new__(mongo_session._MongoClientSingleton)
+    instance.mongo_client = client
+    instance.engine = AIOEngine(client=client, database=database)
+    mongo_session._MongoClientSingleton.instance = instance
+    for crud_object in (crud.user, crud.token):
+        crud_object.engine = instance.engine
+    return client[database]
+
+
+async def reset_database(db: Any) -> None:
+    for name in await db.list_collection_names():
+        await db.drop_collection(name)
+
+
+def install_memory_qdrant() -> AsyncQdrantClient:
+    client = AsyncQdrantClient(location=":memory:")
+    instance = object.__new__(qdrant_db._QdrantClientSingleton)
+    instance.async_client = client
+    qdrant_db._QdrantClientSingleton.instance = instance
+    reset_users_collection_state()
+    return client
+
+
+class MagicLinkMailbox:
+    def __init__(self):
+        """
+        Captures the emailed half of each magic-link pair as `security.create_magic_tokens` creates it, keyed by the
+        claim half that the API returns. Call `close` to restore the original function.
+        """
+        self.tokens: dict[str, str] = {}
+        self._original = security.create_magic_tokens
+
+        @functools.wraps(self._original)
+        def create_magic_tokens(*args: Any, **kwargs: Any) -> list[str]:
+            tokens = self._original(*args, **kwargs)
+            self.tokens[tokens[1]] = tokens[0]
+            return tokens
+
+        security.create_magic_tokens = create_magic_tokens
+
+    def take(self, claim: str) -> str:
+        return self.tokens.pop(claim)
+
+    def close(self) -> None:
+        security.create_magic_tokens = self._original
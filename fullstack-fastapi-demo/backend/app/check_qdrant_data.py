@@ -7,6 +7,7 @@ sys.path.append("/app")
 
 try:
     from app.db.qdrant import get_qdrant_client
+    from app.db.qdrant_users import scroll_points
     from qdrant_client import models
 except ImportError as e:
     print(f"ImportError: {e}")
@@ -37,20 +38,15 @@ async def main():
             print(f"Vector size: {collection_info.config.params.vectors.size}")
             print(f"Distance metric: {collection_info.config.params.vectors.distance}")
             
-            # Scroll through points
-            response = await client.scroll(
-                collection_name=collection_name,
-                limit=100,  # Increased limit to show more data
-                with_payload=True,
-                with_vectors=False 
-            )
-            points = response[0]
-            print(f"\nFound {len(points)} point(s) in '{collection_name}':")
+            # Stream through every point, page by page
             print("-" * 60)
-            for point in points:
+            found = 0
+            async for point in scroll_points(collection_name=collection_name):
+                found += 1
                 print(f"  ID: {point.id}")
                 print(f"  Payload: {point.payload}")
                 print("-" * 60)
+            print(f"\nFound {found} point(s) in '{collection_name}'.")
         else:
             print(f"\n⚠ Collection '{collection_name}' not found.")
             print("  It will be created automatically on next backend initialization.")
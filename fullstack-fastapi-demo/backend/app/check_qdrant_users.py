@@ -5,6 +5,7 @@ import sys
 sys.path.append("/app")
 
 from app.db.qdrant import get_qdrant_client
+from app.db.qdrant_users import USER_COLLECTION_NAME, scroll_points
 
 
 async def check_users():
@@ -14,7 +15,7 @@ async def check_users():
     print("=" * 60)
     
     client = get_qdrant_client()
-    collection_name = "users_collection"
+    collection_name = USER_COLLECTION_NAME
     
     try:
         # Get collection info
@@ -24,25 +25,19 @@ async def check_users():
         print(f"Vector size: {info.config.params.vectors.size}")
         print(f"Distance: {info.config.params.vectors.distance}")
         
-        # Get all points
-        response = await client.scroll(
-            collection_name=collection_name,
-            limit=100,
-            with_payload=True,
-            with_vectors=True
-        )
-        points = response[0]
-        
-        print(f"\nFound {len(points)} point(s):")
+        # Stream every point, page by page
         print("-" * 60)
-        
-        for point in points:
+        found = 0
+        async for point in scroll_points(with_payload=True, with_vectors=True, collection_name=collection_name):
+            found += 1
             print(f"\nPoint ID: {point.id}")
             print(f"Vector length: {len(point.vector)}")
             print(f"Payload:")
             for key, value in point.payload.items():
                 print(f"  {key}: {value}")
             print("-" * 60)
+        
+        print(f"\nFound {found} point(s).")
             
     except Exception as e:
         print(f"\n❌ Error: {e}")
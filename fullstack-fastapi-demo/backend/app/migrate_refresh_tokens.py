@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Move refresh tokens to the hashed, TTL-indexed `token` collection and drop the per-user `refresh_tokens` arrays.
+Usage: docker exec -it <backend_container> python /app/migrate_refresh_tokens.py [--batch-size 1000]
+"""
+import argparse
+import asyncio
+import sys
+
+from app.db.indexes import apply_indexes
+from app.db.session import MongoDatabase
+from app.db.token_migration import migrate_refresh_tokens
+
+
+async def migrate(batch_size: int) -> bool:
+    print("🔄 Migrating refresh tokens...")
+    report = await migrate_refresh_tokens(MongoDatabase(), batch_size=batch_size)
+    print(f"✅ {report.tokens_migrated} token(s) hashed, {report.tokens_removed} unreadable token(s) removed")
+    print(f"✅ refresh_tokens dropped from {report.users_drained} user(s)")
+    results = await apply_indexes()
+    failed = {name: error for name, error in results.items() if error != "ok"}
+    for name, error in failed.items():
+        print(f"❌ Index {name}: {error}")
+    print(f"\n🎉 Migration complete in {report.seconds:.1f}s")
+    return not failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrate refresh tokens to their own collection.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Token documents per bulk write")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(migrate(args.batch_size)) else 1)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Mirror MongoDB users into Qdrant from a change stream on the users collection.
+Requires QDRANT_SYNC_MODE=change_stream and a replica set (a single node started with `--replSet` is enough).
+Usage: docker exec -it <backend_container> python /app/qdrant_mirror.py [--batch-size 256] [--coalesce-seconds 0.5]
+"""
+import argparse
+import asyncio
+import logging
+import signal
+import sys
+
+from app.core.config import settings
+from app.db.qdrant_mirror import UserChangeStreamMirror
+from app.db.session import MongoDatabase
+
+
+async def mirror(batch_size: int | None, coalesce_seconds: float | None) -> None:
+    service = UserChangeStreamMirror(MongoDatabase(), batch_size=batch_size, coalesce_seconds=coalesce_seconds)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, service.stop)
+    print(f"🔄 Mirroring users into Qdrant (batches of {service.batch_size}, {service.coalesce_seconds}s coalescing)")
+    await service.run()
+    print(f"✅ Mirror stopped: {service.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mirror MongoDB users into Qdrant from a change stream.")
+    parser.add_argument("--batch-size", type=int, default=None, help="Maximum users per Qdrant batch")
+    parser.add_argument("--coalesce-seconds", type=float, default=None, help="How long to gather events per batch")
+    args = parser.parse_args()
+    if settings.QDRANT_SYNC_MODE != "change_stream":
+        # In outbox mode the API dispatcher already mirrors users; running both would write everything twice
+        print("❌ Set QDRANT_SYNC_MODE=change_stream to run the mirror service.")
+        sys.exit(1)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(mirror(args.batch_size, args.coalesce_seconds))
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Repair the Qdrant mirror of users changed since the last run, and delete orphaned points.
+Usage: docker exec -it <backend_container> python /app/reconcile_qdrant_users.py [--full] [--skip-orphans]
+"""
+import argparse
+import asyncio
+
+from app.db.session import MongoDatabase
+from app.db.qdrant_reconcile import UserReconciler
+
+
+async def reconcile(full: bool, orphans: bool, batch_size: int | None) -> None:
+    print("🔄 Reconciling Qdrant users with MongoDB...")
+    report = await UserReconciler(MongoDatabase(), batch_size=batch_size).run(full=full, orphans=orphans)
+    scope = "Full pass" if report.since is None else f"Users modified since {report.since}"
+    print(f"{scope}: {report.checked} checked")
+    print(f"✅ {report.fixed} point(s) fixed ({report.missing} missing, {report.mismatched} stale)")
+    if orphans:
+        print(f"✅ {report.orphans_deleted} orphaned point(s) deleted out of {report.points_scanned} scanned")
+    print(f"\n🎉 Reconciliation complete in {report.seconds:.1f}s, watermark now {report.watermark}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile the Qdrant user mirror with MongoDB.")
+    parser.add_argument("--full", action="store_true", help="Check every user, not only those changed since last run")
+    parser.add_argument("--skip-orphans", action="store_true", help="Don't scan Qdrant for points without a user")
+    parser.add_argument("--batch-size", type=int, default=None, help="Users per batch")
+    args = parser.parse_args()
+    asyncio.run(reconcile(args.full, not args.skip_orphans, args.batch_size))
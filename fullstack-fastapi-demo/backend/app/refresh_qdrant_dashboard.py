@@ -5,6 +5,7 @@ import sys
 sys.path.append("/app")
 
 from app.db.qdrant import get_qdrant_client
+from app.db.qdrant_users import scroll_points
 
 
 async def verify_collections():
@@ -33,15 +34,8 @@ async def verify_collections():
                 
                 # Show sample points if any
                 if info.points_count > 0:
-                    response = await client.scroll(
-                        collection_name=col_name,
-                        limit=3,
-                        with_payload=True,
-                        with_vectors=False
-                    )
-                    points = response[0]
                     print(f"   Sample points:")
-                    for point in points[:3]:
+                    async for point in scroll_points(limit=3, collection_name=col_name):
                         payload_preview = str(point.payload)[:80] + "..." if len(str(point.payload)) > 80 else str(point.payload)
                         print(f"     - ID: {point.id}, Payload: {payload_preview}")
             except Exception as e:
@@ -9,7 +9,7 @@ import asyncio
 import sys
 from app.core.security import get_password_hash
 from app.db.session import get_engine
-from app.models.user import User
+from app.models.user import User, datetime_now_sec
 from app.core.config import settings
 
 
@@ -49,6 +49,7 @@ async def reset_admin_password(email: str = None, new_password: str = None):
         # Hash the new password
         hashed = get_password_hash(new_password)
         user.hashed_password = hashed
+        user.modified = datetime_now_sec()
         
         # Save to database
         await engine.save(user)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Run the micro and endpoint benchmarks, store a baseline, and fail on regressions against it.
+Usage:
+    python run_benchmarks.py baseline              # run and store as the baseline
+    python run_benchmarks.py compare [--threshold 10]  # run, compare with the baseline, exit 1 on a regression
+                                                       # or a metric missing from this run
+    python run_benchmarks.py run --output results.json
+    python run_benchmarks.py compare --results results.json  # compare saved results without running
+
+Timings depend on the machine: record the baseline on the same hardware the comparisons run on. Environment
+differences (CPU, Python, argon2 parameters) are reported alongside the comparison.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from benchmarks.baseline import (
+    DEFAULT_BASELINE_PATH,
+    DEFAULT_NOISE_FACTOR,
+    DEFAULT_THRESHOLD_PCT,
+    build_results,
+    compare_results,
+    format_comparison,
+    load_results,
+    save_results,
+)
+
+
+async def run_suites(args: argparse.Namespace) -> dict[str, Any]:
+    # Imported here: both modules point the app settings at the benchmark stand-ins on import
+    from benchmarks.endpoints import run_endpoint_suite
+    from benchmarks.micro import run_microbenchmarks
+
+    print(f"⏱  Microbenchmarks, {args.rounds} rounds...", file=sys.stderr)
+    micro = await run_microbenchmarks(rounds=args.rounds, mongo=args.mongo)
+    endpoint_reports = []
+    for n in range(0 if args.skip_endpoints else args.endpoint_rounds):
+        print(f"⏱  Endpoint suite, run {n + 1}/{args.endpoint_rounds}...", file=sys.stderr)
+        endpoint_reports.append(
+            await run_endpoint_suite(
+                mongo=args.mongo, requests=args.requests, concurrency=args.concurrency, warmup=args.warmup
+            )
+        )
+    config = {
+        "rounds": args.rounds,
+        "endpoint_rounds": 0 if args.skip_endpoints else args.endpoint_rounds,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "mongo": "mongomock" if args.mongo == "mock" else "mongod",
+    }
+    return build_results(micro, endpoint_reports, config)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark baseline and regression checks.")
+    parser.add_argument("command", choices=["run", "baseline", "compare"])
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE_PATH, help="Baseline results file")
+    parser.add_argument("--output", type=Path, help="Also write the results of this run here")
+    parser.add_argument("--results", type=Path, help="compare: use these saved results instead of running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT, help="Allowed slowdown, in %%")
+    parser.add_argument(
+        "--noise-factor",
+        type=float,
+        default=DEFAULT_NOISE_FACTOR,
+        help="Slowdowns within this many relative MADs of the samples count as noise",
+    )
+    parser.add_argument("--mongo", default="mock", help='"mock" for mongomock-motor, or a MongoDB URI')
+    parser.add_argument("--rounds", type=int, default=7, help="Microbenchmark rounds")
+    parser.add_argument("--endpoint-rounds", type=int, default=3, help="Endpoint suite runs")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--requests", type=int, default=100, help="Measured requests per endpoint and run")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="compare: print the comparison as JSON")
+    args = parser.parse_args()
+
+    if args.command == "compare" and not args.baseline.exists():
+        parser.error(f"no baseline at {args.baseline}; record one with `python run_benchmarks.py baseline`")
+    if args.results:
+        results = load_results(args.results)
+    else:
+        results = asyncio.run(run_suites(args))
+    if args.output:
+        save_results(results, args.output)
+    if args.command == "baseline":
+        save_results(results, args.baseline)
+        print(f"✅ Baseline with {len(results['metrics'])} metric(s) saved to {args.baseline}")
+        return 0
+    if args.command == "run":
+        if not args.output:
+            print(json.dumps(results, indent=2))
+        return 0
+
+    report = compare_results(
+        load_results(args.baseline), results, threshold_pct=args.threshold, noise_factor=args.noise_factor
+    )
+    print(json.dumps(report.as_dict(), indent=2) if args.json else format_comparison(report))
+    if report.regressions:
+        names = ", ".join(metric.name for metric in report.regressions)
+        print(f"❌ {len(report.regressions)} regression(s) beyond {args.threshold}%: {names}", file=sys.stderr)
+    if report.missing:
+        names = ", ".join(report.missing)
+        print(f"❌ {len(report.missing)} metric(s) missing from this run: {names}", file=sys.stderr)
+    if report.failed:
+        return 1
+    print("✅ No regressions", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
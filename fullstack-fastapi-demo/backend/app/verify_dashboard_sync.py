@@ -6,6 +6,7 @@ import json
 sys.path.append("/app")
 
 from app.db.qdrant import get_qdrant_client
+from app.db.qdrant_users import scroll_points
 
 
 async def verify():
@@ -30,21 +31,20 @@ async def verify():
             print(f"  ✅ Vector size: {info.config.params.vectors.size}")
             print(f"  ✅ Status: {info.status}")
             
-            # Get sample points
+            # Stream every point: show a sample and check the total against the reported count
             if info.points_count > 0:
-                response = await client.scroll(
-                    collection_name=col_name,
-                    limit=3,
-                    with_payload=True,
-                    with_vectors=False
-                )
-                points = response[0]
+                streamed = 0
                 print(f"  📊 Sample data:")
-                for point in points[:3]:
+                async for point in scroll_points(collection_name=col_name):
+                    streamed += 1
+                    if streamed > 3:
+                        continue
                     if col_name == "users_collection":
                         print(f"     - Email: {point.payload.get('email')}")
                     else:
                         print(f"     - ID: {point.id}, Payload: {point.payload}")
+                if streamed != info.points_count:
+                    print(f"  ⚠️  Streamed {streamed} point(s), collection reports {info.points_count}")
         
         print("\n" + "=" * 60)
         print("✅ API Data is CORRECT!")
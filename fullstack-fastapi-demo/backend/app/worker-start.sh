@@ -2,4 +2,5 @@
 set -e
 
 hatch run python /app/app/celeryworker_pre_start.py
-hatch run celery -A app.worker worker -l info -Q main-queue -c 1
+# Thread pool: async tasks share one event loop per process (see app/worker/runtime.py)
+hatch run celery -A app.worker worker -l info -Q main-queue -P threads -c ${CELERY_CONCURRENCY:-32}
@@ -47,12 +47,19 @@ export default function UserTable() {
   const accessToken = useAppSelector((state: RootState) => token(state));
 
   const [userProfiles, setUserProfiles] = useState([] as IUserProfile[]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loading, setLoading] = useState(false);
 
-  async function getAllUsers() {
+  async function getUsersPage(cursor: string | null = null) {
+    setLoading(true);
     await dispatch(refreshTokens());
     try {
-      const res = await apiAuth.getAllUsers(accessToken);
-      if (res && res.length) setUserProfiles(res);
+      const page = await apiAuth.getAllUsers(accessToken, cursor);
+      // The first page replaces the table, later pages extend it
+      setUserProfiles((profiles) =>
+        cursor ? [...profiles, ...page.users] : page.users,
+      );
+      setNextCursor(page.nextCursor);
     } catch {
       dispatch(
         addNotice({
@@ -62,12 +69,14 @@ export default function UserTable() {
           icon: "error",
         }),
       );
+    } finally {
+      setLoading(false);
     }
   }
 
   useEffect(() => {
     async function fetchUsers() {
-      await getAllUsers();
+      await getUsersPage();
     }
 
     fetchUsers();
@@ -114,6 +123,18 @@ export default function UserTable() {
           {renderUserProfiles(userProfiles)}
         </tbody>
       </table>
+      {nextCursor && (
+        <div className="flex justify-center bg-white px-4 py-3 sm:px-6">
+          <button
+            type="button"
+            disabled={loading}
+            onClick={() => getUsersPage(nextCursor)}
+            className="inline-flex justify-center rounded-md border border-transparent bg-rose-500 py-2 px-4 text-sm font-medium text-white shadow-sm hover:bg-rose-700 focus:outline-none focus:ring-2 focus:ring-rose-600 focus:ring-offset-2 disabled:opacity-50"
+          >
+            {loading ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
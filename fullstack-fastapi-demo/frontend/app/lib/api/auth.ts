@@ -1,5 +1,6 @@
 import {
   IUserProfile,
+  IUserProfilePage,
   IUserProfileUpdate,
   IUserProfileCreate,
   IUserOpenProfileCreate,
@@ -150,10 +151,24 @@ export const apiAuth = {
     });
   },
   // ADMIN USER MANAGEMENT
-  async getAllUsers(token: string): Promise<IUserProfile[]> {
-    return apiCore.fetchJSON<IUserProfile[]>(`${API_URL}/users/all`, {
+  async getAllUsers(
+    token: string,
+    cursor: string | null = null,
+    limit?: number,
+  ): Promise<IUserProfilePage> {
+    // Keyset pagination: one page per call; pass `nextCursor` back as `cursor` for the next one
+    const params = new URLSearchParams();
+    if (cursor) params.set("cursor", cursor);
+    if (limit) params.set("limit", String(limit));
+    const query: string = params.toString() ? `?${params.toString()}` : "";
+    const res: Response = await apiCore.fetch(`${API_URL}/users/all${query}`, {
       method: "GET",
     });
+    if (!res.ok) throw { message: res.statusText, code: res.status, response: res };
+    return {
+      users: (await res.json()) as IUserProfile[],
+      nextCursor: res.headers.get("X-Next-Cursor"),
+    };
   },
   async toggleUserState(
     token: string,
@@ -1,5 +1,6 @@
 import {
   IUserProfile,
+  IUserProfilePage,
   IUserProfileUpdate,
   IUserProfileCreate,
   IUserOpenProfileCreate,
@@ -24,6 +25,7 @@ interface IKeyable {
 export type {
   IKeyable,
   IUserProfile,
+  IUserProfilePage,
   IUserProfileUpdate,
   IUserProfileCreate,
   IUserOpenProfileCreate,
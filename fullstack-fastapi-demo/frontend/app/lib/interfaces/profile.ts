@@ -10,6 +10,12 @@ export interface IUserProfile {
   totp: boolean;
 }
 
+export interface IUserProfilePage {
+  users: IUserProfile[];
+  // Pass back as `cursor` for the next page; null on the last page
+  nextCursor: string | null;
+}
+
 export interface IUserProfileUpdate {
   email?: string;
   fullName?: string;
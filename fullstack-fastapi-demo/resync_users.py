@@ -1,36 +1,64 @@
 #!/usr/bin/env python3
-"""Resync users from MongoDB to Qdrant."""
+"""
+Resync users from MongoDB to Qdrant.
+Usage: docker exec -it <backend_container> python /app/resync_users.py [--batch-size 500] [--concurrency 4] [--restart]
+Or: docker exec -it <backend_container> python /app/resync_users.py --migrate-vectors
+"""
+import argparse
 import asyncio
 import sys
 sys.path.append("/app")
 
 from app.db.session import MongoDatabase
-from app import crud
-from app.db.qdrant_users import save_user_to_qdrant
+from app.db.qdrant_resync import UserResyncEngine
+from app.db.qdrant_users import USER_VECTOR_VERSION, migrate_user_vectors
 
 
-async def resync():
-    """Resync all users from MongoDB to Qdrant."""
+async def resync(batch_size: int, concurrency: int, restart: bool) -> bool:
+    """Resync all users from MongoDB to Qdrant, resuming from the last checkpoint unless `restart` is set."""
     print("🔄 Starting user resync from MongoDB to Qdrant...")
-    
-    db = MongoDatabase()
-    users = await crud.user.get_multi(db)
-    print(f"📊 Found {len(users)} users in MongoDB")
-    
-    success_count = 0
-    for user in users:
-        try:
-            result = await save_user_to_qdrant(user)
-            if result:
-                print(f"✅ Synced: {user.email}")
-                success_count += 1
-            else:
-                print(f"❌ Failed: {user.email}")
-        except Exception as e:
-            print(f"❌ Error syncing {user.email}: {e}")
-    
-    print(f"\n🎉 Resync complete: {success_count}/{len(users)} users synced successfully")
+
+    engine = UserResyncEngine(MongoDatabase(), batch_size=batch_size, concurrency=concurrency)
+    report = await engine.run(resume=not restart)
+    if report.started_after:
+        print(f"↪️  Resumed after user {report.started_after}")
+
+    for batch in report.batches:
+        status = "✅" if not batch.failed else "❌"
+        rate = batch.users / batch.seconds if batch.seconds else 0.0
+        line = f"{status} Batch {batch.index}: {batch.users - batch.failed}/{batch.users} users ({rate:.0f} users/s)"
+        if batch.error:
+            line += f" - {batch.error}"
+        print(line)
+
+    print(
+        f"\n🎉 Resync complete: {report.synced} synced, {report.failed} failed "
+        f"in {report.seconds:.1f}s ({report.users_per_second:.0f} users/s)"
+    )
+    if report.failed:
+        print(f"⚠️  Checkpoint kept at {report.checkpoint}; rerun to retry the failed batches.")
+    return not report.failed
+
+
+async def migrate_vectors(batch_size: int) -> bool:
+    """Rewrite stored user vectors to the current layout without touching MongoDB."""
+    print(f"🔄 Migrating user vectors to layout v{USER_VECTOR_VERSION}...")
+    migrated = await migrate_user_vectors(batch_size=batch_size)
+    print(f"\n🎉 Migration complete: {migrated} point(s) updated")
+    return True
 
 
 if __name__ == "__main__":
-    asyncio.run(resync())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Resync users from MongoDB to Qdrant.")
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per Qdrant upsert")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent batch upserts")
+    parser.add_argument("--restart", action="store_true", help="Ignore the saved checkpoint and start from scratch")
+    parser.add_argument(
+        "--migrate-vectors", action="store_true", help="Only rewrite Qdrant vectors stored with an older layout"
+    )
+    args = parser.parse_args()
+    if args.migrate_vectors:
+        ok = asyncio.run(migrate_vectors(args.batch_size))
+    else:
+        ok = asyncio.run(resync(args.batch_size, args.concurrency, args.restart))
+    sys.exit(0 if ok else 1)